@@ -0,0 +1,230 @@
+"""
+HIRS retention tiering: Closed / Rejected hazards older than ARCHIVE_AFTER_DAYS leave the hot store
+for gzip-compressed monthly partitions (archive/hazards-YYYY-MM.jsonl.gz), taking their CAPA
+actions and investigations with them. Partitions are searched on demand and deleted once every
+report in them is older than RETENTION_YEARS, together with the stored as-of history of those reports.
+"""
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server, no cross-worker lock needed
+    fcntl = None
+
+from config import (
+    ARCHIVE_DIR,
+    ARCHIVE_STATUSES,
+    ARCHIVE_AFTER_DAYS,
+    RETENTION_YEARS,
+    ARCHIVE_INTERVAL_SECONDS,
+    ARCHIVE_BATCH_SIZE,
+)
+from records import HazardRecord
+from search import SEARCH_FIELDS, matches, normalize
+
+PARTITION_PREFIX = "hazards-"
+PARTITION_SUFFIX = ".jsonl.gz"
+_MONTH = re.compile(r"(\d{4})-(\d{2})")
+log = logging.getLogger(__name__)
+
+
+def _partition_path(month: str, archive_dir: str = ARCHIVE_DIR) -> str:
+    return os.path.join(archive_dir, f"{PARTITION_PREFIX}{month}{PARTITION_SUFFIX}")
+
+
+def partitions(archive_dir: str = ARCHIVE_DIR) -> list:
+    """[(month "YYYY-MM", path)] oldest first."""
+    try:
+        names = os.listdir(archive_dir)
+    except FileNotFoundError:
+        return []
+    out = []
+    for name in sorted(names):
+        if name.startswith(PARTITION_PREFIX) and name.endswith(PARTITION_SUFFIX):
+            out.append((name[len(PARTITION_PREFIX):-len(PARTITION_SUFFIX)], os.path.join(archive_dir, name)))
+    return out
+
+
+def _write_partition(path: str, entries: list) -> None:
+    """Append one gzip member (a complete, independently readable block) and fsync it."""
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+            for entry in entries:
+                gz.write(json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_closed(store, now: datetime = None, archive_dir: str = ARCHIVE_DIR, batch_size: int = ARCHIVE_BATCH_SIZE, audit=None) -> int:
+    """Move eligible hazards (and their linked rows) into the archive. Returns how many moved.
+
+    Each batch is written and fsynced before it is deleted from the store, so a crash in between
+    leaves a report in both places; search_archive() skips IDs already seen and re-archiving is harmless.
+    """
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=ARCHIVE_AFTER_DAYS)).isoformat(timespec="seconds")
+    os.makedirs(archive_dir, exist_ok=True)
+    moved = 0
+    while True:
+        hazards = store.archive_candidates(ARCHIVE_STATUSES, cutoff, batch_size)
+        if not hazards:
+            return moved
+        ids = [h["id"] for h in hazards]
+        capa, investigations = {}, {}
+        for row in store.linked("capa", ids):
+            capa.setdefault(row["hazard_id"], []).append(row.to_dict())
+        for row in store.linked("investigations", ids):
+            investigations.setdefault(row["hazard_id"], []).append(row.to_dict())
+        by_month = {}
+        for h in hazards:
+            by_month.setdefault(h["created_at"][:7], []).append({
+                "hazard": h.to_dict(),
+                "capa": capa.get(h["id"], []),
+                "investigations": investigations.get(h["id"], []),
+            })
+        for month, entries in by_month.items():
+            _write_partition(_partition_path(month, archive_dir), entries)
+        store.remove(ids)
+        if audit is not None:
+            for h in hazards:
+                audit.append(h["id"], "archived", "archiver", {"partition": h["created_at"][:7]})
+        moved += len(ids)
+
+
+def read_partition(path: str):
+    """Yield archive entries from one partition; a torn final member (crash mid-write) is ignored."""
+    with gzip.open(path, "rb") as gz:
+        try:
+            for line in gz:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
+        except (EOFError, OSError):
+            return
+
+
+def search_archive(text: str = "", status=None, category=None, date_from: str = None, date_to: str = None,
+                   limit: int = None, archive_dir: str = ARCHIVE_DIR) -> list:
+    """Archived hazards matching `text` as the live hazards list does (a case- and accent-insensitive
+    substring of one of SEARCH_FIELDS["hazards"]), newest month first; at most `limit` of them.
+
+    Only partitions overlapping [date_from, date_to] (ISO dates) are opened.
+    """
+    q = normalize((text or "").strip())
+    fields = SEARCH_FIELDS["hazards"]
+    results, seen = [], set()
+    for month, path in reversed(partitions(archive_dir)):
+        if (date_from and month < date_from[:7]) or (date_to and month > date_to[:7]):
+            continue
+        for entry in read_partition(path):
+            h = entry["hazard"]
+            if h["id"] in seen:
+                continue
+            if status and h.get("status") != status:
+                continue
+            if category and h.get("category") != category:
+                continue
+            if q and not matches(h, q, fields):
+                continue
+            seen.add(h["id"])
+            results.append(HazardRecord.from_dict(h))
+            if limit is not None and len(results) >= limit:
+                return results
+    return results
+
+
+def retention_horizon(now: datetime = None) -> datetime:
+    """Anything older than this is past RETENTION_YEARS."""
+    now = now or datetime.now(timezone.utc)
+    try:
+        return now.replace(year=now.year - RETENTION_YEARS)
+    except ValueError:  # 29 February
+        return now.replace(year=now.year - RETENTION_YEARS, day=28)
+
+
+def purge_expired(now: datetime = None, archive_dir: str = ARCHIVE_DIR, audit=None, store=None) -> list:
+    """Delete partitions whose newest possible report is past retention. Returns the months removed.
+
+    With `store`, the as-of history of the partition's reports and linked rows goes first: their
+    last revisions stopped being current when they were archived, up to ARCHIVE_AFTER_DAYS after the
+    reports were created, so prune_history() alone would keep them readable that much longer.
+    """
+    oldest_kept = retention_horizon(now)
+    removed = []
+    for month, path in partitions(archive_dir):
+        # A partition expires when the last day of its month is older than the retention horizon
+        valid = _MONTH.fullmatch(month)
+        if valid is None or not 1 <= int(valid[2]) <= 12:
+            log.warning("HIRS archiver: skipping %s, which is not named after a month", path)
+            continue
+        year, mon = int(valid[1]), int(valid[2])
+        month_end = datetime(year + mon // 12, mon % 12 + 1, 1, tzinfo=timezone.utc)
+        if month_end <= oldest_kept:
+            if store is not None:
+                _forget_partition(store, path)
+            os.remove(path)
+            removed.append(month)
+            if audit is not None:
+                audit.append(f"archive:{month}", "purged", "archiver", {"retention_years": RETENTION_YEARS})
+    return removed
+
+
+def _forget_partition(store, path: str) -> None:
+    """Drop the stored history of every report in a partition and of its CAPA actions and investigations."""
+    ids = {"hazards": set(), "capa": set(), "investigations": set()}
+    for entry in read_partition(path):
+        ids["hazards"].add(entry["hazard"]["id"])
+        for kind in ("capa", "investigations"):
+            ids[kind].update(row["id"] for row in entry.get(kind, ()))
+    for kind, kind_ids in ids.items():
+        if kind_ids:
+            store.forget(kind, kind_ids)
+
+
+def archive_stats(archive_dir: str = ARCHIVE_DIR) -> dict:
+    parts = partitions(archive_dir)
+    return {
+        "partitions": len(parts),
+        "bytes": sum(os.path.getsize(p) for _, p in parts),
+        "oldest": parts[0][0] if parts else None,
+        "newest": parts[-1][0] if parts else None,
+    }
+
+
+def run_once(store, now: datetime = None, archive_dir: str = ARCHIVE_DIR, audit=None):
+    """One archive + purge pass, or None if another worker holds the archiver lock."""
+    os.makedirs(archive_dir, exist_ok=True)
+    with open(os.path.join(archive_dir, ".archiver.lock"), "a") as lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+        moved, purged = archive_closed(store, now, archive_dir, audit=audit), purge_expired(now, archive_dir, audit, store)
+        # Superseded revisions (as-of history) follow the same retention period
+        store.prune_history(retention_horizon(now).isoformat())
+        return moved, purged
+
+
+def start_archiver(store, interval: float = ARCHIVE_INTERVAL_SECONDS, audit=None) -> threading.Thread:
+    """Background thread running run_once() every `interval` seconds (one worker does the work at a time)."""
+
+    def loop():
+        while True:
+            try:
+                run_once(store, audit=audit)
+            except Exception:  # keep the thread alive; the next pass retries
+                log.exception("HIRS archiver pass failed")
+            stop.wait(interval)
+
+    stop = threading.Event()
+    thread = threading.Thread(target=loop, name="hirs-archiver", daemon=True)
+    thread.start()
+    return thread
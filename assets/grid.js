@@ -0,0 +1,53 @@
+/*
+ * HIRS list tables, scroll view: the table body only holds the rows in sight (see _grid_table in
+ * dash_app.py). When scrolling brings other row blocks into view, tell the server which ones –
+ * through the list's "list-grid-window" store – and it sends those rows in place of the old ones.
+ */
+(function () {
+  var pending = new WeakMap();
+
+  function requestWindow(viewport) {
+    var rowHeight = Number(viewport.dataset.rowHeight) || 52;
+    var block = Number(viewport.dataset.block) || 50;
+    var first = Math.floor(viewport.scrollTop / rowHeight / block);
+    var last = Math.floor((viewport.scrollTop + viewport.clientHeight) / rowHeight / block);
+    if (viewport.dataset.window === first + ":" + last) {
+      return;
+    }
+    viewport.dataset.window = first + ":" + last;
+    if (window.dash_clientside && window.dash_clientside.set_props) {
+      window.dash_clientside.set_props(
+        {type: "list-grid-window", list: viewport.dataset.list},
+        {data: {first: first, last: last}}
+      );
+    }
+  }
+
+  // scroll does not bubble: listen in the capture phase for every grid, present or future
+  document.addEventListener("scroll", function (event) {
+    var viewport = event.target;
+    if (!viewport.classList || !viewport.classList.contains("hazards-grid")) {
+      return;
+    }
+    // At most one request per 100 ms while scrolling, and one where the scrolling stops
+    if (pending.get(viewport)) {
+      return;
+    }
+    requestWindow(viewport);
+    pending.set(viewport, setTimeout(function () {
+      pending.delete(viewport);
+      requestWindow(viewport);
+    }, 100));
+  }, true);
+
+  // A new query re-renders the grid in place (data-key changes): its rows start from the top again
+  new MutationObserver(function (mutations) {
+    mutations.forEach(function (mutation) {
+      var viewport = mutation.target;
+      if (viewport.classList && viewport.classList.contains("hazards-grid")) {
+        delete viewport.dataset.window;
+        viewport.scrollTop = 0;
+      }
+    });
+  }).observe(document.documentElement, {subtree: true, attributes: true, attributeFilter: ["data-key"]});
+})();
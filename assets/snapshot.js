@@ -0,0 +1,321 @@
+/*
+ * HIRS client-side filtering (LIST_CLIENT_FILTER, see snapshots.py): the hazards page holds a
+ * columnar snapshot of the register in a local dcc.Store and filters it here, in the browser, by
+ * status, category and search text – the server is only asked for what the snapshot cannot answer
+ * (query syntax, "As of", archived reports, sorted columns, scroll view, Prev / Next).
+ *
+ * Search follows search.py and fuzzy.py: the typed text as a case- and accent-insensitive substring
+ * of a searchable field, then (fuzzy on) the rows holding it in a close spelling. Rows are built as the
+ * JSON Dash sends for LIST_VIEWS["hazards"] (_list_row in dash_app.py).
+ */
+(function () {
+  var PAD = "\x03\x03";
+  var SEARCH_FIELDS = ["id", "title", "description", "area", "station", "category", "subcategory"];
+  var SPELLED = ["title", "description", "subcategory"];  // FUZZY_FIELDS["hazards"]
+  var MAX_ALTERNATIVES = 8;
+  var MAX_PHRASES = 64;
+  var QUERY_TERM = /(^|\s)(status|category|station|risk|created):?(>=|<=|>|<|[:=])/iu;  // query.py QUERY_FIELDS["hazards"]: left to the server
+  var session = Date.now().toString(36) + Math.random().toString(36).slice(2);
+  var prepared = null;
+
+  function normalize(text) {
+    if (/^[\x00-\x7f]*$/.test(text)) {
+      return text.toLowerCase();
+    }
+    return text.toLowerCase().replace(/ß/g, "ss").normalize("NFKD").replace(/\p{M}/gu, "");
+  }
+
+  function column(snapshot, field) {
+    var col = snapshot.columns[field];
+    return Array.isArray(col) ? col : col.codes.map(function (code) { return col.values[code]; });
+  }
+
+  // -- spellings (fuzzy.py) ------------------------------------------------
+  function maxDistance(word) {
+    return word.length < 5 ? 0 : word.length < 9 ? 1 : 2;
+  }
+
+  function deletes(word, distance) {
+    var found = new Set([word]), edge = [word];
+    for (var d = 0; d < distance; d++) {
+      var next = [];
+      edge.forEach(function (w) {
+        for (var i = 0; w.length > 1 && i < w.length; i++) {
+          var v = w.slice(0, i) + w.slice(i + 1);
+          if (!found.has(v)) { found.add(v); next.push(v); }
+        }
+      });
+      edge = next;
+    }
+    return found;
+  }
+
+  function editDistance(a, b, limit) {
+    if (Math.abs(a.length - b.length) > limit) return limit + 1;
+    var before = null, previous = null, current = [];
+    for (var j = 0; j <= b.length; j++) current.push(j);
+    for (var i = 1; i <= a.length; i++) {
+      before = previous; previous = current; current = [i];
+      for (j = 1; j <= b.length; j++) {
+        var cost = a[i - 1] !== b[j - 1] ? 1 : 0;
+        current[j] = Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost);
+        if (cost && i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) {
+          current[j] = Math.min(current[j], before[j - 2] + 1);
+        }
+      }
+      if (Math.min.apply(null, current) > limit) return limit + 1;
+    }
+    return current[b.length];
+  }
+
+  function Spelling(words) {
+    this.words = new Set();
+    this.index = new Map();  // deletion -> [words]
+    words.forEach(this.add, this);
+  }
+  Spelling.prototype.add = function (word) {
+    if (this.words.has(word)) return;
+    this.words.add(word);
+    deletes(word, maxDistance(word)).forEach(function (variant) {
+      var held = this.index.get(variant);
+      if (held) held.push(word); else this.index.set(variant, [word]);
+    }, this);
+  };
+  Spelling.prototype.lookup = function (word) {
+    var limit = maxDistance(word), found = new Map(), index = this.index;
+    if (!limit) return [];
+    deletes(word, limit).forEach(function (variant) {
+      (index.get(variant) || []).forEach(function (candidate) {
+        if (!found.has(candidate)) found.set(candidate, editDistance(word, candidate, limit));
+      });
+    });
+    var close = [];
+    found.forEach(function (d, w) { if (d <= limit && w !== word) close.push([d, w]); });
+    close.sort(function (x, y) { return x[0] - y[0] || (x[1] < y[1] ? -1 : x[1] > y[1] ? 1 : 0); });
+    return close.slice(0, MAX_ALTERNATIVES).map(function (c) { return c[1]; });
+  };
+  Spelling.prototype.splits = function (word) {
+    var out = [];
+    for (var i = 2; i < word.length - 1; i++) {
+      if (this.words.has(word.slice(0, i)) && this.words.has(word.slice(i))) {
+        out.push(word.slice(0, i) + " " + word.slice(i), word.slice(0, i) + "-" + word.slice(i));
+      }
+    }
+    return out;
+  };
+  Spelling.prototype.variants = function (q) {
+    // Chunks of alternative phrases (fuzzy.py SpellingIndex.variants): words of five letters or more
+    // are matched in any order, everything else stays next to its neighbours as typed
+    var spans = [], m, re = /[\p{L}\p{N}]+/gu;
+    while ((m = re.exec(q))) spans.push([m.index, m.index + m[0].length]);
+    if (!spans.length) return null;
+    var tokens = spans.map(function (s) { return q.slice(s[0], s[1]); });
+    var free = tokens.map(function (t) { return alpha(t) && maxDistance(t) > 0; });
+    var chunks = [], start = 0;
+    for (var i = 1; i <= tokens.length; i++) {
+      if (i === tokens.length || (free[i - 1] && free[i])) {
+        var separators = [];
+        for (var j = start; j < i - 1; j++) separators.push(q.slice(spans[j][1], spans[j + 1][0]));
+        chunks.push(this.phrases(tokens.slice(start, i), separators));
+        start = i;
+      }
+    }
+    return chunks.length === 1 && chunks[0].length === 1 ? null : chunks;
+  };
+  Spelling.prototype.phrases = function (tokens, separators) {
+    var self = this, n = tokens.length, ends = [];
+    var spellings = function (word) {
+      return alpha(word) ? [word].concat(self.lookup(word), self.splits(word)) : [word];
+    };
+    ends[n] = [""];
+    for (var i = n - 1; i >= 0; i--) {
+      var options = spellings(tokens[i]).map(function (s) { return [s, i + 1]; });
+      if (i + 1 < n && alpha(tokens[i] + tokens[i + 1])) {
+        var joined = tokens[i] + tokens[i + 1];
+        options = options.concat([joined].concat(self.lookup(joined)).map(function (s) { return [s, i + 2]; }));
+      }
+      var phrases = new Set();
+      for (var o = 0; o < options.length && phrases.size < MAX_PHRASES; o++) {
+        var spelling = options[o][0], j = options[o][1], sep = j < n ? separators[j - 1] : "";
+        ends[j].forEach(function (rest) { phrases.add(spelling + sep + rest); });
+      }
+      ends[i] = Array.from(phrases).slice(0, MAX_PHRASES);
+    }
+    return ends[0];
+  };
+
+  function alpha(word) {
+    return /^\p{L}+$/u.test(word);
+  }
+
+  function covers(key, chunks) {
+    return chunks.every(function (chunk) { return chunk.some(function (phrase) { return key.indexOf(phrase) >= 0; }); });
+  }
+
+  // -- snapshot ----------------------------------------------------------
+  function prepare(snapshot, templates) {
+    // Decoded columns, search keys and spelling vocabulary, once per snapshot version
+    if (prepared && prepared.version === snapshot.version && prepared.count === snapshot.count) {
+      return prepared;
+    }
+    var rows = {}, keys = [], spelling = null;
+    snapshot.columns.id.forEach(function () { keys.push(""); });
+    Object.keys(snapshot.columns).forEach(function (field) { rows[field] = column(snapshot, field); });
+    SEARCH_FIELDS.forEach(function (field) {
+      rows[field].forEach(function (value, i) { keys[i] += normalize(value) + PAD; });
+    });
+    if (templates.fuzzy) {
+      spelling = new Spelling(templates.words);
+      SPELLED.forEach(function (field) {
+        rows[field].forEach(function (value) {
+          (normalize(value).match(/\p{L}+/gu) || []).forEach(spelling.add, spelling);
+        });
+      });
+    }
+    prepared = {version: snapshot.version, count: snapshot.count, rows: rows, keys: keys, spelling: spelling};
+    return prepared;
+  }
+
+  function merge(delta, snapshot) {
+    // A copy of `snapshot` with the delta's rows replaced or appended and its deleted ids removed
+    var columns = {}, ids = snapshot.columns.id.slice(), at = new Map();
+    for (var i = snapshot.samples; i < ids.length; i++) at.set(ids[i], i);
+    Object.keys(snapshot.columns).forEach(function (field) {
+      var col = snapshot.columns[field];
+      columns[field] = Array.isArray(col) ? col.slice() : {values: col.values.slice(), codes: col.codes.slice()};
+    });
+    columns.id = ids;
+    var upserts = column(delta, "id");
+    Object.keys(columns).forEach(function (field) {
+      var col = columns[field], cells = Array.isArray(col) ? col : col.codes, codes = null;
+      if (!Array.isArray(col)) {
+        codes = new Map(col.values.map(function (v, c) { return [v, c]; }));
+      }
+      column(delta, field).forEach(function (value, r) {
+        if (codes) {
+          if (!codes.has(value)) { codes.set(value, col.values.length); col.values.push(value); }
+          value = codes.get(value);
+        }
+        var row = at.get(upserts[r]);
+        if (row === undefined) cells.push(value); else cells[row] = value;
+      });
+    });
+    upserts.forEach(function (id) { if (!at.has(id)) at.set(id, at.size + snapshot.samples); });
+    var gone = new Set(delta.deleted.filter(function (id) { return at.has(id); }).map(function (id) { return at.get(id); }));
+    if (gone.size) {
+      var keep = function (_, r) { return !gone.has(r); };
+      Object.keys(columns).forEach(function (field) {
+        var col = columns[field];
+        if (Array.isArray(col)) columns[field] = col.filter(keep); else col.codes = col.codes.filter(keep);
+      });
+    }
+    return {format: delta.format, version: delta.version, samples: snapshot.samples, count: columns.id.length, columns: columns};
+  }
+
+  // -- table -------------------------------------------------------------
+  function tag(type, children, props) {
+    return {type: type, namespace: "dash_html_components", props: Object.assign({children: children}, props || {})};
+  }
+
+  function row(rows, i, odd) {
+    var risk = rows.perceived_risk[i] || "—";
+    var level = risk === "Low" || risk === "Moderate" ? "hazards-risk-low" : risk === "High" || risk === "Critical" ? "hazards-risk-high" : "";
+    var actions = [["👁", "view", "View"], ["✏️", "edit", "Edit"], ["🗑", "delete", "Delete"]].map(function (a) {
+      return tag("Span", a[0], {className: "hazards-action hazards-action-" + a[1], title: a[2]});
+    });
+    return tag("Tr", [
+      tag("Td", rows.title[i] || "—", {className: "hazards-td-name"}),
+      tag("Td", rows.category[i] || "—"),
+      tag("Td", rows.area[i] || rows.station[i] || "—"),
+      tag("Td", tag("Span", risk, {className: ("hazards-risk-pill " + level).trim()})),
+      tag("Td", rows.status[i] || "—"),
+      tag("Td", tag("Div", actions, {className: "hazards-actions-cell"}), {className: "hazards-td-actions"}),
+    ], {className: odd ? "hazards-tr-odd" : "hazards-tr-even"});
+  }
+
+  function controls(template, size, shown, total) {
+    var out = JSON.parse(JSON.stringify(template));
+    (function walk(node) {
+      if (Array.isArray(node)) { node.forEach(walk); return; }
+      if (!node || !node.props) return;
+      var type = node.props.id && node.props.id.type;
+      if (type === "list-page-size") node.props.value = size;
+      if (type === "list-page-prev") node.props.disabled = true;
+      if (type === "list-page-next") node.props.disabled = shown >= total;
+      walk(node.props.children);
+    })(out);
+    return out;
+  }
+
+  function table(templates, data, found, size) {
+    var shown = found.slice(0, size);
+    var body = shown.map(function (r, i) { return row(data.rows, r, i % 2 === 1); });
+    var n = shown.length, total = found.length;
+    return tag("Div", [
+      tag("Table", [templates.head, tag("Tbody", body)], {className: "hazards-table"}),
+      tag("Div", [
+        tag("Span", "Showing 1 to " + n.toLocaleString("en-US") + " of " + total.toLocaleString("en-US") + " results.", {className: "hazards-footer-left"}),
+        controls(templates.controls, size, n, total),
+      ], {className: "hazards-footer"}),
+    ], {className: "hazards-table-block"});
+  }
+
+  window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    hirs: {
+      mergeSnapshot: function (delta, snapshot) {
+        // Output: the snapshot and the {format, version} the server is asked for changes since
+        var no_update = window.dash_clientside.no_update;
+        if (!delta) return [no_update, no_update];
+        if (delta.off) return [null, null];
+        var merged;
+        if (delta.full) {
+          merged = {format: delta.format, version: delta.version, samples: delta.samples, count: delta.count, columns: delta.columns};
+        } else if (snapshot && snapshot.format === delta.format && snapshot.version === delta.base) {
+          merged = merge(delta, snapshot);
+        } else {
+          return [no_update, null];  // not the snapshot the delta was made for: ask for a full one
+        }
+        // A count that disagrees means a missed change: keep what we have, refetch it whole next time
+        return [merged, merged.count === delta.count ? {format: merged.format, version: merged.version} : null];
+      },
+
+      filterHazards: function (pathname, status, category, request, archived, asOf, page, snapshot, templates, view, forwarded) {
+        // Output: the table, its page view, and the query handed to the server when it is not answered here
+        var no_update = window.dash_clientside.no_update;
+        if (pathname !== "/hazards") return [no_update, no_update, no_update];
+        var triggered = (window.dash_clientside.callback_context.triggered || []).map(function (t) { return t.prop_id; });
+        var bySnapshot = triggered.length > 0 && triggered.every(function (p) { return p.indexOf("hazards-snapshot.") === 0; });
+        var byPage = triggered.some(function (p) { return p.indexOf('"type":"list-page"}') >= 0; });
+        var text = (request && request.text) || "";
+        page = page || {};
+        var local = snapshot && templates && !(archived && archived.length) && !asOf && !page.sort && !page.grid
+          && !(byPage && (page.after !== undefined || page.before !== undefined))
+          && text.indexOf('"') < 0 && !QUERY_TERM.test(text);
+        if (bySnapshot) {
+          // A refreshed snapshot redraws a list drawn here, never one the server drew (a later page, a sort...)
+          if (!local || (view && !view.client)) return [no_update, no_update, no_update];
+        } else if (!local) {
+          return [no_update, no_update, {
+            session: (request && request.session) || session, seq: ((forwarded && forwarded.seq) || 0) + 1,
+            text: text, status: status, category: category, archived: archived, as_of: asOf, page: page, paging: byPage,
+          }];
+        }
+        var data = prepare(snapshot, templates), rows = data.rows, keys = data.keys;
+        var q = normalize(text.trim()), variants = q && data.spelling ? data.spelling.variants(q) : null;
+        var found = [], spelled = [];
+        for (var i = keys.length - 1; i >= 0; i--) {  // newest first
+          if ((status && rows.status[i] !== status) || (category && rows.category[i] !== category)) continue;
+          if (!q || keys[i].indexOf(q) >= 0) found.push(i);
+          else if (variants && covers(keys[i], variants)) spelled.push(i);
+        }
+        found = found.concat(spelled);  // rows holding the text as typed first
+        var size = page.size || templates.size;
+        if (!found.length) return [templates.empty, null, no_update];
+        var last = found[Math.min(size, found.length) - 1];
+        var pageView = {first: rows.id[found[0]], last: rows.id[last], start: 0, end: Math.min(size, found.length),
+                        size: size, sort: null, desc: false, grid: false, client: true};
+        return [table(templates, data, found, size), pageView, no_update];
+      },
+    },
+  });
+})();
@@ -0,0 +1,448 @@
+"""
+HIRS audit trail: append-only log of submissions, status changes, assignments and closures.
+Entries are JSON lines hash-chained to the entry before them (sha256 over the previous hash and
+the entry), written to size-rolled segment files. When a segment is sealed it gets a sorted index
+sidecar (entity ID -> offsets, timestamps -> offsets) and a line in manifest.json, so one hazard's
+history or a time range is found by bisecting indexes rather than reading every segment.
+A complete but unreadable line in the active segment (a torn write run into another worker's line)
+is moved aside to a .corrupt file; the segment is sealed before it and the log goes on in a new one,
+with an entry recording what was moved.
+Each sealed segment also records the Merkle root of its entry hashes: segments verify independently
+(in parallel), and a single entry can be proven to belong to a segment with a short inclusion proof.
+"""
+import bisect
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+try:
+    import fcntl  # POSIX only – cross-process locking is skipped on Windows dev machines
+except ImportError:
+    fcntl = None
+
+from config import AUDIT_DIR, AUDIT_SEGMENT_BYTES
+
+GENESIS = "0" * 64
+log = logging.getLogger(__name__)
+CSV_COLUMNS = ["seq", "ts", "entity_id", "action", "actor", "details", "prev", "hash", "segment", "merkle_root", "proof"]
+
+
+def entry_hash(entry: dict) -> str:
+    """sha256 of the previous hash + the canonical JSON of the entry (without its own hash)."""
+    body = {k: v for k, v in entry.items() if k != "hash"}
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256((entry["prev"] + canonical).encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Merkle trees over a segment's entry hashes
+# ---------------------------------------------------------------------------
+def _leaf(hex_hash: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(hex_hash)).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def merkle_levels(hashes) -> list:
+    """Every level of the tree, leaves first. An odd node at the end of a level is carried up unchanged."""
+    level = [_leaf(h) for h in hashes]
+    levels = [level]
+    while len(level) > 1:
+        level = [_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def merkle_root(hashes) -> str:
+    levels = merkle_levels(hashes)
+    return levels[-1][0].hex() if levels[0] else ""
+
+
+def merkle_proof(levels: list, index: int) -> str:
+    """Inclusion proof for leaf `index` as "L<hex>;R<hex>…" (sibling side and hash, leaf to root)."""
+    steps = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            steps.append(("L" if sibling < index else "R") + level[sibling].hex())
+        index //= 2
+    return ";".join(steps)
+
+
+def verify_proof(entry_hash_hex: str, proof: str, root: str) -> bool:
+    """True if the entry with this hash is covered by the Merkle root (checkable from a CSV export alone)."""
+    node = _leaf(entry_hash_hex)
+    for step in filter(None, proof.split(";")):
+        sibling = bytes.fromhex(step[1:])
+        node = _node(sibling, node) if step[0] == "L" else _node(node, sibling)
+    return node.hex() == root
+
+
+def verify_segment(path: str, prev: str, first_seq: int, expected: dict = None):
+    """Check one segment file's chain (starting from `prev`) and, if sealed, its manifest entry.
+
+    Module-level so it can run in a worker process. Returns None if intact, else (seq, reason).
+    """
+    seq, hashes = first_seq, []
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n") and expected is None:
+                    break  # torn tail of the active segment; the next append truncates it
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    return seq, "unreadable entry"
+                if entry.get("seq") != seq:
+                    return seq, f"sequence gap (found {entry.get('seq')})"
+                if entry.get("prev") != prev:
+                    return seq, "chain broken (prev hash mismatch)"
+                if entry_hash(entry) != entry.get("hash"):
+                    return seq, "entry modified (hash mismatch)"
+                prev = entry["hash"]
+                hashes.append(prev)
+                seq += 1
+    except FileNotFoundError:
+        return first_seq, "segment file missing"
+    if expected:
+        if len(hashes) != expected["entries"]:
+            return seq, f"{expected['entries'] - len(hashes)} entries missing from the end"
+        if prev != expected["head"]:
+            return seq - 1, "segment head does not match manifest"
+        if expected.get("merkle_root") and merkle_root(hashes) != expected["merkle_root"]:
+            return first_seq, "Merkle root does not match manifest"
+    return None
+
+
+def _new_index() -> dict:
+    return {"entities": {}, "ts": [], "offsets": [], "hashes": [], "first_seq": None, "last_seq": None}
+
+
+def _index_line(index: dict, entry: dict, offset: int) -> None:
+    index["entities"].setdefault(entry["entity_id"], []).append(offset)
+    index["ts"].append(entry["ts"])
+    index["offsets"].append(offset)
+    index["hashes"].append(entry["hash"])
+    if index["first_seq"] is None:
+        index["first_seq"] = entry["seq"]
+    index["last_seq"] = entry["seq"]
+
+
+class AuditLog:
+    """Hash-chained segmented audit log shared by every worker (appends are serialised with flock).
+
+    append() writes the line straight to the OS (no fsync) so it costs well under a millisecond;
+    segments are fsynced when sealed, and the hash chain makes any later edit or gap detectable.
+    """
+
+    def __init__(self, directory: str = AUDIT_DIR, segment_bytes: int = AUDIT_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._manifest_path = os.path.join(directory, "manifest.json")
+        self._lock = threading.Lock()
+        self._lock_fd = None
+        self._fd_pid = None
+        self._manifest_stamp = None
+        self._manifest = []
+        self._sealed_indexes = {}  # segment number -> loaded sidecar (immutable once written)
+        # Tail state for the active segment, refreshed whenever another worker has written to it
+        self._segment = None
+        self._offset = 0
+        self._seq = 0
+        self._head = GENESIS
+        self._last_ts = ""
+        self._active = _new_index()
+
+    # -- files -------------------------------------------------------------
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"audit-{number:06d}.log")
+
+    def _index_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"audit-{number:06d}.idx.json")
+
+    def _flock(self):
+        if self._lock_fd is None or self._fd_pid != os.getpid():
+            self._lock_fd = os.open(os.path.join(self.directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_pid = os.getpid()
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+
+    def _funlock(self):
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def manifest(self) -> list:
+        """Sealed segments, oldest first: {segment, first_seq, last_seq, ts_min, ts_max, head, entries}."""
+        try:
+            st = os.stat(self._manifest_path)
+        except FileNotFoundError:
+            return []
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._manifest_stamp:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                self._manifest = json.load(f)
+            self._manifest_stamp = stamp
+        return self._manifest
+
+    def _sync_tail(self) -> None:
+        """Bring the tail state up to date with whatever other workers appended or sealed (under flock)."""
+        manifest = self.manifest()
+        active = manifest[-1]["segment"] + 1 if manifest else 1
+        if active != self._segment:
+            self._segment, self._offset, self._active = active, 0, _new_index()
+            if manifest:
+                self._seq, self._head, self._last_ts = manifest[-1]["last_seq"], manifest[-1]["head"], manifest[-1]["ts_max"]
+        try:
+            size = os.path.getsize(self._segment_path(active))
+        except FileNotFoundError:
+            size = 0
+        if size == self._offset:
+            return
+        with open(self._segment_path(active), "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crashed worker; the next append starts a fresh line after it
+                try:
+                    entry = json.loads(line)
+                    if not isinstance(entry.get("seq"), int) or not all(isinstance(entry.get(k), str) for k in ("hash", "ts", "entity_id")):
+                        raise ValueError("not an audit entry")
+                except (ValueError, AttributeError):
+                    self._set_aside(size)
+                    return
+                _index_line(self._active, entry, self._offset)
+                self._offset += len(line)
+                self._seq, self._head, self._last_ts = entry["seq"], entry["hash"], entry["ts"]
+        if self._offset != size:
+            # Drop the torn tail so the chain continues from the last complete entry
+            with open(self._segment_path(active), "r+b") as f:
+                f.truncate(self._offset)
+
+    def _set_aside(self, size: int) -> None:
+        """Move the active segment from the current offset (an unreadable line) to `size` into a
+        .corrupt file, seal what came before and record the move as the first entry of the next segment."""
+        number, offset = self._segment, self._offset
+        path = self._segment_path(number)
+        saved = f"{os.path.basename(path)}.corrupt-{offset}"
+        with open(path, "r+b") as f:
+            f.seek(offset)
+            tail = f.read(size - offset)
+            with open(os.path.join(self.directory, saved), "wb") as out:
+                out.write(tail)
+                out.flush()
+                os.fsync(out.fileno())
+            f.truncate(offset)
+        log.warning("HIRS audit: unreadable entry in %s at byte %d; %d bytes moved to %s", path, offset, len(tail), saved)
+        if self._active["offsets"]:
+            self._seal()
+        self._write("audit-log", "set_aside", "system", {"segment": number, "offset": offset, "bytes": len(tail), "file": saved})
+
+    def _seal(self) -> None:
+        """Fsync the active segment, write its index sidecar and add it to the manifest."""
+        number, index = self._segment, self._active
+        with open(self._segment_path(number), "rb") as f:
+            os.fsync(f.fileno())
+        entity_ids = sorted(index["entities"])
+        sidecar = {
+            "entity_ids": entity_ids,
+            "entity_offsets": [index["entities"][e] for e in entity_ids],
+            "ts": index["ts"],
+            "offsets": index["offsets"],
+        }
+        _write_json(self._index_path(number), sidecar)
+        manifest = list(self.manifest()) + [{
+            "segment": number,
+            "first_seq": index["first_seq"],
+            "last_seq": index["last_seq"],
+            "ts_min": index["ts"][0],
+            "ts_max": index["ts"][-1],
+            "head": self._head,
+            "entries": len(index["offsets"]),
+            "merkle_root": merkle_root(index["hashes"]),
+        }]
+        _write_json(self._manifest_path, manifest)
+        self._manifest, self._manifest_stamp = manifest, None
+        self._segment, self._offset, self._active = number + 1, 0, _new_index()
+
+    # -- writing -----------------------------------------------------------
+    def append(self, entity_id: str, action: str, actor: str = "system", details: dict = None) -> dict:
+        """Record one event, e.g. append("HZ-0007", "status", "Jane Smith", {"from": "Submitted", "to": "Triage"})."""
+        with self._lock:
+            self._flock()
+            try:
+                self._sync_tail()
+                return self._write(entity_id, action, actor, details)
+            finally:
+                self._funlock()
+
+    def _write(self, entity_id: str, action: str, actor: str, details: dict) -> dict:
+        """Chain and write one entry after the synced tail (caller holds both locks)."""
+        ts = datetime.now(timezone.utc).isoformat(timespec="microseconds")
+        entry = {
+            "seq": self._seq + 1,
+            "ts": max(ts, self._last_ts),  # keep timestamps sorted within the log
+            "entity_id": entity_id,
+            "action": action,
+            "actor": actor or "",
+            "details": details or {},
+            "prev": self._head,
+        }
+        entry["hash"] = entry_hash(entry)
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False).encode("utf-8") + b"\n"
+        fd = os.open(self._segment_path(self._segment), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        _index_line(self._active, entry, self._offset)
+        self._offset += len(line)
+        self._seq, self._head, self._last_ts = entry["seq"], entry["hash"], entry["ts"]
+        if self._offset >= self.segment_bytes:
+            self._seal()
+        return entry
+
+    # -- reading -----------------------------------------------------------
+    def _sidecar(self, number: int) -> dict:
+        index = self._sealed_indexes.get(number)
+        if index is None:
+            with open(self._index_path(number), encoding="utf-8") as f:
+                index = self._sealed_indexes[number] = json.load(f)
+        return index
+
+    def _read_at(self, number: int, offsets) -> list:
+        out = []
+        with open(self._segment_path(number), "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                out.append(json.loads(f.readline()))
+        return out
+
+    def _active_snapshot(self):
+        with self._lock:
+            self._flock()
+            try:
+                self._sync_tail()
+                return self._segment, self._active
+            finally:
+                self._funlock()
+
+    def history(self, entity_id: str) -> list:
+        """Every entry for one entity (hazard, CAPA, investigation…), oldest first."""
+        out = []
+        for seg in self.manifest():
+            index = self._sidecar(seg["segment"])
+            i = bisect.bisect_left(index["entity_ids"], entity_id)
+            if i < len(index["entity_ids"]) and index["entity_ids"][i] == entity_id:
+                out += self._read_at(seg["segment"], index["entity_offsets"][i])
+        number, active = self._active_snapshot()
+        out += self._read_at(number, list(active["entities"].get(entity_id, [])))
+        return out
+
+    def between(self, ts_from: str = "", ts_to: str = None) -> list:
+        """Entries with ts_from <= ts <= ts_to (ISO strings; a bare date as ts_to covers that whole day)."""
+        if not ts_to or len(ts_to) <= 10:
+            ts_to = (ts_to or "") + "\uffff"
+        out = []
+        segments = [(s["segment"], self._sidecar(s["segment"])) for s in self.manifest()
+                    if s["ts_max"] >= ts_from and s["ts_min"] <= ts_to]
+        segments.append(self._active_snapshot())
+        for number, index in segments:
+            lo = bisect.bisect_left(index["ts"], ts_from)
+            hi = bisect.bisect_right(index["ts"], ts_to)
+            out += self._read_at(number, index["offsets"][lo:hi])
+        return out
+
+    def entries(self):
+        """Every entry in order (exports and verification)."""
+        numbers = [s["segment"] for s in self.manifest()] + [self._active_snapshot()[0]]
+        for number in numbers:
+            try:
+                with open(self._segment_path(number), "rb") as f:
+                    for line in f:
+                        if line.endswith(b"\n"):
+                            yield json.loads(line)
+            except FileNotFoundError:
+                pass
+
+    def verify(self, workers: int = None):
+        """Check every segment, sealed ones in parallel on a process pool.
+
+        Each segment starts from the previous segment's head recorded in the manifest, so segments are
+        independent. Returns None if the log is intact, else {"segment", "seq", "reason"} for the first
+        tampered segment.
+        """
+        manifest = self.manifest()
+        jobs, prev, seq = [], GENESIS, 1
+        for seg in manifest:
+            if seg["first_seq"] != seq:
+                return {"segment": seg["segment"], "seq": seq, "reason": "segment missing from manifest"}
+            jobs.append((seg["segment"], self._segment_path(seg["segment"]), prev, seq, seg))
+            prev, seq = seg["head"], seg["last_seq"] + 1
+        active = manifest[-1]["segment"] + 1 if manifest else 1
+        failures = []
+        if len(jobs) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                results = ex.map(verify_segment, *zip(*[job[1:] for job in jobs]), chunksize=4)
+                failures = [(job[0], r) for job, r in zip(jobs, results) if r]
+        else:
+            failures = [(job[0], r) for job in jobs for r in [verify_segment(*job[1:])] if r]
+        if not failures:
+            result = verify_segment(self._segment_path(active), prev, seq)
+            if result and result[1] != "segment file missing":
+                failures.append((active, result))
+        if not failures:
+            return None
+        segment, (bad_seq, reason) = min(failures)
+        return {"segment": segment, "seq": bad_seq, "reason": reason}
+
+    def proofs(self, entries) -> dict:
+        """{seq: (segment, merkle_root, proof)} for entries in sealed segments (the active one has no root yet)."""
+        manifest = self.manifest()
+        last_seqs = [seg["last_seq"] for seg in manifest]
+        wanted = {}
+        for e in entries:
+            i = bisect.bisect_left(last_seqs, e["seq"])
+            if i < len(manifest) and manifest[i].get("merkle_root"):
+                wanted.setdefault(i, []).append(e["seq"])
+        out = {}
+        for i, seqs in wanted.items():
+            seg = manifest[i]
+            hashes = []
+            with open(self._segment_path(seg["segment"]), "rb") as f:
+                for line in f:
+                    hashes.append(json.loads(line)["hash"])
+            levels = merkle_levels(hashes)
+            for seq in seqs:
+                out[seq] = (seg["segment"], seg["merkle_root"], merkle_proof(levels, seq - seg["first_seq"]))
+        return out
+
+
+def to_csv(entries, proofs: dict = None) -> str:
+    """CSV export; `proofs` (from AuditLog.proofs) fills the segment / merkle_root / proof columns."""
+    proofs = proofs or {}
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for e in entries:
+        segment, root, proof = proofs.get(e["seq"], ("", "", ""))
+        writer.writerow([e["seq"], e["ts"], e["entity_id"], e["action"], e["actor"],
+                         json.dumps(e["details"], ensure_ascii=False), e["prev"], e["hash"], segment, root, proof])
+    return out.getvalue()
+
+
+def _write_json(path: str, data) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
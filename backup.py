@@ -0,0 +1,217 @@
+"""
+HIRS backups: online, incremental, checksum-verified copies of the hazard store, attachments
+and audit trail, plus a timed restore.
+
+Every file is split into fixed-size chunks stored once under BACKUP_DIR/chunks by their sha256
+(zlib-compressed), and each backup is a manifest listing the chunks of every file. A chunk that
+is already in the store is not copied again, so a backup only writes the database pages and
+audit/attachment data that changed since the last one. The database is snapshotted with SQLite's
+online backup API (a WAL read transaction), so submissions carry on while it runs.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+
+from config import ATTACHMENTS_DIR, AUDIT_DIR, BACKUP_CHUNK_BYTES, BACKUP_DIR, HAZARD_DB_PATH
+
+DB_NAME = "hirs.db"  # logical names inside a backup; a restore target can be used as HIRS_DATA_DIR
+
+
+def _chunk_path(backup_dir: str, digest: str) -> str:
+    return os.path.join(backup_dir, "chunks", digest[:2], digest)
+
+
+def _put_chunk(backup_dir: str, data: bytes, stats: dict) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    path = _chunk_path(backup_dir, digest)
+    if os.path.exists(path):
+        stats["chunks_reused"] += 1
+        return digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(zlib.compress(data, 6))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    stats["chunks_written"] += 1
+    stats["bytes_written"] += len(data)
+    return digest
+
+
+def _get_chunk(backup_dir: str, digest: str) -> bytes:
+    """Read one chunk, raising ValueError if it is missing or its content no longer matches its hash."""
+    try:
+        with open(_chunk_path(backup_dir, digest), "rb") as f:
+            data = zlib.decompress(f.read())
+    except FileNotFoundError:
+        raise ValueError(f"chunk {digest[:12]}… is missing") from None
+    except zlib.error:
+        raise ValueError(f"chunk {digest[:12]}… is corrupt") from None
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"chunk {digest[:12]}… fails its checksum")
+    return data
+
+
+def _store_file(backup_dir: str, name: str, path: str, stats: dict, limit: int = None) -> dict:
+    """Chunk one file (optionally only its first `limit` bytes) into the chunk store."""
+    whole = hashlib.sha256()
+    chunks, size = [], 0
+    with open(path, "rb") as f:
+        while limit is None or size < limit:
+            want = BACKUP_CHUNK_BYTES if limit is None else min(BACKUP_CHUNK_BYTES, limit - size)
+            data = f.read(want)
+            if not data:
+                break
+            whole.update(data)
+            chunks.append(_put_chunk(backup_dir, data, stats))
+            size += len(data)
+    stats["bytes_read"] += size
+    st = os.stat(path)
+    return {"name": name, "size": size, "mtime_ns": st.st_mtime_ns, "sha256": whole.hexdigest(), "chunks": chunks}
+
+
+def _snapshot_db(db_path: str, tmp_dir: str) -> str:
+    """Consistent copy of the live database via the online backup API (writers are not blocked in WAL mode)."""
+    snapshot = os.path.join(tmp_dir, DB_NAME)
+    src = sqlite3.connect(db_path, timeout=30)
+    dst = sqlite3.connect(snapshot)
+    try:
+        src.backup(dst)  # one step = one read transaction = one consistent point in time
+    finally:
+        dst.close()
+        src.close()
+    return snapshot
+
+
+def _tree(root: str, prefix: str, skip=()):
+    """(logical name, path) for every regular file under root."""
+    if not os.path.isdir(root):
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename in skip or filename.endswith(".tmp"):
+                continue
+            path = os.path.join(dirpath, filename)
+            yield prefix + os.path.relpath(path, root).replace(os.sep, "/"), path
+
+
+def manifests(backup_dir: str = BACKUP_DIR) -> list:
+    """Backup names (manifest files), oldest first."""
+    try:
+        return sorted(n[:-5] for n in os.listdir(os.path.join(backup_dir, "manifests")) if n.endswith(".json"))
+    except FileNotFoundError:
+        return []
+
+
+def load_manifest(name: str = None, backup_dir: str = BACKUP_DIR) -> dict:
+    """A backup manifest by name (default: the latest)."""
+    names = manifests(backup_dir)
+    if not names:
+        raise ValueError(f"No backups in {backup_dir}")
+    name = name or names[-1]
+    with open(os.path.join(backup_dir, "manifests", name + ".json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_backup(backup_dir: str = BACKUP_DIR, db_path: str = HAZARD_DB_PATH, audit_dir: str = AUDIT_DIR,
+               attachments_dir: str = ATTACHMENTS_DIR) -> dict:
+    """Take one backup and return its manifest (including copy statistics)."""
+    started = time.perf_counter()
+    stats = {"files": 0, "bytes_read": 0, "bytes_written": 0, "chunks_written": 0, "chunks_reused": 0}
+    try:
+        previous = {f["name"]: f for f in load_manifest(None, backup_dir)["files"]}
+    except ValueError:
+        previous = {}
+    files = []
+    with tempfile.TemporaryDirectory(prefix="hirs-backup-") as tmp:
+        if os.path.exists(db_path):
+            files.append(_store_file(backup_dir, DB_NAME, _snapshot_db(db_path, tmp), stats))
+    # Audit segments and attachments only ever grow or stay as they are: a file whose size and
+    # mtime match the previous backup reuses its chunk list without being read again.
+    for name, path in list(_tree(audit_dir, "audit/", skip={".lock"})) + list(_tree(attachments_dir, "attachments/")):
+        st = os.stat(path)
+        old = previous.get(name)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            stats["chunks_reused"] += len(old["chunks"])
+            files.append(old)
+            continue
+        # The active audit segment may be appended to while we read; stop at the size seen now
+        files.append(_store_file(backup_dir, name, path, stats, limit=st.st_size))
+    stats["files"] = len(files)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    created = datetime.now(timezone.utc)
+    manifest = {"name": created.strftime("%Y%m%dT%H%M%S%fZ"), "created": created.isoformat(timespec="seconds"), "files": files, "stats": stats}
+    manifest_dir = os.path.join(backup_dir, "manifests")
+    os.makedirs(manifest_dir, exist_ok=True)
+    path = os.path.join(manifest_dir, manifest["name"] + ".json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+    return manifest
+
+
+def verify_backup(name: str = None, backup_dir: str = BACKUP_DIR) -> list:
+    """Re-read every chunk of a backup and check chunk and whole-file checksums. Returns problems found."""
+    manifest = load_manifest(name, backup_dir)
+    problems = []
+    for entry in manifest["files"]:
+        whole = hashlib.sha256()
+        try:
+            for digest in entry["chunks"]:
+                whole.update(_get_chunk(backup_dir, digest))
+        except ValueError as exc:
+            problems.append(f"{entry['name']}: {exc}")
+            continue
+        if whole.hexdigest() != entry["sha256"]:
+            problems.append(f"{entry['name']}: file checksum mismatch")
+    return problems
+
+
+def restore(target_dir: str, name: str = None, backup_dir: str = BACKUP_DIR) -> dict:
+    """Rebuild a data directory from a backup, verifying every checksum, and time it.
+
+    Returns {"name", "files", "bytes", "seconds", "integrity"}; raises ValueError on any checksum failure.
+    """
+    started = time.perf_counter()
+    manifest = load_manifest(name, backup_dir)
+    if os.path.isdir(target_dir) and os.listdir(target_dir):
+        raise ValueError(f"Restore target {target_dir} is not empty")
+    total = 0
+    for entry in manifest["files"]:
+        path = os.path.join(target_dir, *entry["name"].split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        whole = hashlib.sha256()
+        with open(path, "wb") as f:
+            for digest in entry["chunks"]:
+                data = _get_chunk(backup_dir, digest)
+                whole.update(data)
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if whole.hexdigest() != entry["sha256"]:
+            raise ValueError(f"{entry['name']}: file checksum mismatch after restore")
+        total += entry["size"]
+    integrity = "no database in backup"
+    db_path = os.path.join(target_dir, DB_NAME)
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            integrity = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+    return {
+        "name": manifest["name"],
+        "files": len(manifest["files"]),
+        "bytes": total,
+        "seconds": round(time.perf_counter() - started, 3),
+        "integrity": integrity,
+    }
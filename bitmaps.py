@@ -0,0 +1,347 @@
+"""
+HIRS filter bitmaps: one bitset per (field, value) – status, category, station, risk, CAPA type,
+priority... – over the stored hazards, CAPA actions and investigations. Dropdown filters AND / OR
+bitsets instead of scanning the register, and KPI counts are a popcount. Bits are doc numbers of
+the kind's RecordTable (tables.py), which the search index shares.
+
+Date fields (created, due, started) keep a sorted (value, doc number) list instead, so a date
+range is two bisects and one bitset.
+
+Sortable columns keep a SortedKeys index of (sort key, row id) – sorted blocks, one level of B-tree
+pages – so a sorted page of any selection is a bisect and a walk until the page is full, instead of
+sorting the whole selection per request.
+
+Bitsets are plain Python ints (bit n = doc number n): the bitwise operators and int.bit_count()
+run in C over whole machine words, with no extra dependency. Through its table a BitmapIndex
+follows the store's change feed, so writes from any worker are picked up on the next read.
+"""
+import bisect
+import gc
+import heapq
+
+from tables import RecordTable
+
+FACET_FIELDS = {
+    "hazards": ("status", "category", "station", "perceived_risk"),
+    "capa": ("status", "type", "priority"),
+    "investigations": ("status", "lead"),
+}
+RANGE_FIELDS = {
+    "hazards": ("created_at",),
+    "capa": ("due_date",),
+    "investigations": ("started",),
+}
+SORT_FIELDS = {
+    "hazards": ("title", "category", "perceived_risk", "status"),
+    "capa": ("action", "priority", "status", "due_date"),
+    "investigations": ("title", "status", "started"),
+}
+# Categorical fields with an order (lowest first): sorted, and compared with < / > in queries, by level
+LEVELS = {
+    "perceived_risk": ("Low", "Moderate", "High", "Critical"),
+    "priority": ("Low", "Medium", "High", "Critical"),
+}
+_RANKS = {field: {value: i for i, value in enumerate(levels)} for field, levels in LEVELS.items()}
+_EMPTY = "\U0010ffff"  # sort key of an empty text value: after every other value
+# Bit positions set in each byte value, for turning a bitset back into doc numbers
+_BYTE_BITS = tuple(tuple(b for b in range(8) if v >> b & 1) for v in range(256))
+
+
+def bitset(numbers) -> int:
+    """Bitset with the given bit positions set (built in a bytearray: O(n), not O(n²) of repeated |=)."""
+    numbers = list(numbers)
+    if not numbers:
+        return 0
+    buf = bytearray(max(numbers) // 8 + 1)
+    for n in numbers:
+        buf[n >> 3] |= 1 << (n & 7)
+    return int.from_bytes(buf, "little")
+
+
+def members(bits: int) -> list:
+    """Set bit positions of a bitset, ascending."""
+    out = []
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for i, byte in enumerate(data):
+        if byte:
+            base = i * 8
+            out.extend(base + b for b in _BYTE_BITS[byte])
+    return out
+
+
+def sort_key(field: str, value):
+    """Sort key of one value: its level for LEVELS fields, else case-insensitive text. Empty values
+    (and unknown levels) sort last. Keys are str or int, so they round-trip through JSON in a cursor."""
+    ranks = _RANKS.get(field)
+    if ranks is not None:
+        return ranks.get(value, len(ranks) + (not value))
+    return value.casefold() if value else _EMPTY
+
+
+class SortedKeys:
+    """Sorted list kept in blocks of up to 2 * BLOCK items. An insert or removal bisects to one block
+    and shifts only that block, and a walk from any item starts after two bisects."""
+
+    BLOCK = 1000
+
+    def __init__(self, items=()):
+        items = sorted(items)
+        self._blocks = [items[i:i + self.BLOCK] for i in range(0, len(items), self.BLOCK)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._len = len(items)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, item) -> None:
+        blocks, maxes = self._blocks, self._maxes
+        if not blocks:
+            blocks.append([item])
+            maxes.append(item)
+        else:
+            i = min(bisect.bisect_left(maxes, item), len(blocks) - 1)
+            block = blocks[i]
+            bisect.insort(block, item)
+            maxes[i] = block[-1]
+            if len(block) > 2 * self.BLOCK:
+                blocks[i:i + 1] = [block[:self.BLOCK], block[self.BLOCK:]]
+                maxes[i:i + 1] = [block[self.BLOCK - 1], block[-1]]
+        self._len += 1
+
+    def remove(self, item) -> None:
+        i = bisect.bisect_left(self._maxes, item)
+        block = self._blocks[i]
+        del block[bisect.bisect_left(block, item)]
+        if block:
+            self._maxes[i] = block[-1]
+        else:
+            del self._blocks[i], self._maxes[i]
+        self._len -= 1
+
+    def walk(self, after=None, reverse=False):
+        """Items strictly after `after` (strictly before it when reverse), nearest first; from the
+        first (last) item when None."""
+        blocks = self._blocks
+        if not blocks:
+            return
+        if not reverse:
+            i = 0 if after is None else bisect.bisect_right(self._maxes, after)
+            if i == len(blocks):
+                return
+            j = 0 if after is None else bisect.bisect_right(blocks[i], after)
+            yield from blocks[i][j:]
+            for block in blocks[i + 1:]:
+                yield from block
+        else:
+            i = len(blocks) - 1 if after is None else min(bisect.bisect_left(self._maxes, after), len(blocks) - 1)
+            j = len(blocks[i]) if after is None else bisect.bisect_left(blocks[i], after)
+            yield from reversed(blocks[i][:j])
+            for block in reversed(blocks[:i]):
+                yield from reversed(block)
+
+
+class BitmapIndex:
+    """{field: {value: bitset}} over one kind of stored row. Bit n is doc number n of the kind's
+    RecordTable (records are read from there), so rows come back in store insertion order."""
+
+    def __init__(self, store, kind: str = "hazards", table: RecordTable = None):
+        self.store = store
+        self.kind = kind
+        self.table = table if table is not None else RecordTable(store, kind)
+        self.fields = FACET_FIELDS[kind]
+        self.range_fields = RANGE_FIELDS[kind]
+        self.sort_fields = SORT_FIELDS[kind]
+        self._lock = self.table.lock
+        self._bitmaps = {field: {} for field in self.fields}
+        self._sorted = {field: [] for field in self.range_fields}  # field -> sorted [(value, doc number)]
+        self._order = {}  # field -> SortedKeys of (sort key, row id)
+        self._live = 0
+        self.table.attach(self._load, self._changed)
+
+    def __len__(self):
+        return len(self.table)
+
+    # -- maintenance -------------------------------------------------------
+    def _load(self, table) -> None:
+        """Bulk load: collect doc numbers per value, then build each bitset once."""
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            staged = {field: {} for field in self.fields}
+            order = {field: [] for field in self.sort_fields}
+            for number, record in table.records.items():
+                for field in self.fields:
+                    staged[field].setdefault(record.get(field) or "", []).append(number)
+                for field in self.range_fields:
+                    self._sorted[field].append((record.get(field) or "", number))
+                for field in self.sort_fields:
+                    order[field].append((sort_key(field, record.get(field)), record["id"]))
+            for field, by_value in staged.items():
+                self._bitmaps[field] = {value: bitset(numbers) for value, numbers in by_value.items()}
+            for entries in self._sorted.values():
+                entries.sort()
+            self._order = {field: SortedKeys(entries) for field, entries in order.items()}
+            self._live = bitset(table.records)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _flip(self, number: int, record) -> None:
+        """Toggle one doc's bit in the bitsets of the record's values."""
+        bit = 1 << number
+        for field in self.fields:
+            by_value = self._bitmaps[field]
+            value = record.get(field) or ""
+            bits = by_value.get(value, 0) ^ bit
+            if bits:
+                by_value[value] = bits
+            else:
+                del by_value[value]
+
+    def _place(self, number: int, old, new) -> None:
+        """Move one doc in the sorted range lists (new dates are usually the latest: an append)."""
+        for field in self.range_fields:
+            before = None if old is None else old.get(field) or ""
+            after = None if new is None else new.get(field) or ""
+            if before == after:
+                continue
+            entries = self._sorted[field]
+            if before is not None:
+                del entries[bisect.bisect_left(entries, (before, number))]
+            if after is not None:
+                bisect.insort(entries, (after, number))
+
+    def _reorder(self, row_id, old, new) -> None:
+        """Move one row in the sort indexes (old / new record; None when it is added / removed)."""
+        for field in self.sort_fields:
+            before = None if old is None else sort_key(field, old.get(field))
+            after = None if new is None else sort_key(field, new.get(field))
+            if old is not None and new is not None and before == after:
+                continue
+            if old is not None:
+                self._order[field].remove((before, row_id))
+            if new is not None:
+                self._order[field].add((after, row_id))
+
+    def _changed(self, row_id, number: int, old, new) -> None:
+        """A row added, edited (old -> new) or removed in the table."""
+        self._place(number, old, new)
+        self._reorder(row_id, old, new)
+        if old is not None and new is not None and all((old.get(f) or "") == (new.get(f) or "") for f in self.fields):
+            return
+        if old is not None:
+            self._flip(number, old)
+        if new is not None:
+            self._flip(number, new)
+        if old is None:
+            self._live |= 1 << number
+        elif new is None:
+            self._live &= ~(1 << number)
+
+    def refresh(self) -> int:
+        """Apply store changes made since the last call (by any worker). Returns how many were applied."""
+        return self.table.refresh()
+
+    # -- queries -----------------------------------------------------------
+    def select(self, **filters) -> int:
+        """Bitset of rows matching every filter; a filter value may be one value or a list/tuple (OR).
+        None / empty filters are ignored."""
+        self.refresh()
+        with self._lock:  # every bitset from the same refresh
+            bits = self._live
+            for field, wanted in filters.items():
+                if wanted is None or wanted == "" or wanted == []:
+                    continue
+                by_value = self._bitmaps[field]
+                if isinstance(wanted, (list, tuple, set)):
+                    either = 0
+                    for value in wanted:
+                        either |= by_value.get(value, 0)
+                    bits &= either
+                else:
+                    bits &= by_value.get(wanted, 0)
+            return bits
+
+    def range(self, field: str, low: str = None, high: str = None) -> int:
+        """Bitset of rows whose `field` lies in [low, high) (either end open when None).
+        Rows without a value never match."""
+        self.refresh()
+        with self._lock:
+            entries = self._sorted[field]
+            start = bisect.bisect_left(entries, (low or "\x00",))  # "" (no value) sorts first
+            end = bisect.bisect_left(entries, (high,)) if high is not None else len(entries)
+            return bitset(number for _, number in entries[start:end])
+
+    def values(self, field: str) -> list:
+        """Distinct values a facet field currently has."""
+        self.refresh()
+        with self._lock:
+            return [value for value in self._bitmaps[field] if value]
+
+    def count(self, **filters) -> int:
+        return self.select(**filters).bit_count()
+
+    def counts(self, field: str, bits: int = None) -> dict:
+        """{value: count} for one field, optionally within a selection; values in first-seen order."""
+        if bits is None:
+            self.refresh()
+        with self._lock:
+            if bits is None:
+                return {value: b.bit_count() for value, b in self._bitmaps[field].items()}
+            out = {}
+            for value, b in self._bitmaps[field].items():
+                n = (b & bits).bit_count()
+                if n:
+                    out[value] = n
+            return out
+
+    def bits_of(self, row_ids) -> int:
+        """Bitset of the given rows (ids not in the index are left out)."""
+        with self._lock:
+            numbers = self.table.numbers
+            return bitset(numbers[i] for i in row_ids if i in numbers)
+
+    def ordered(self, field: str, bits: int, after=None, reverse=False, limit: int = 50) -> list:
+        """Up to `limit` (sort key, row id, record) of a selection in `field` order (descending when
+        reverse), starting after the (sort key, row id) `after`."""
+        with self._lock:
+            docs, numbers = self.table.records, self.table.numbers
+            order = self._order[field]
+            if bits.bit_count() * 32 < len(order):
+                # A small selection: sort just its rows rather than walk past everything outside it
+                entries = []
+                for n in members(bits):
+                    record = docs.get(n)
+                    if record is not None:
+                        entry = (sort_key(field, record.get(field)), record["id"])
+                        if after is None or (entry < after if reverse else entry > after):
+                            entries.append(entry + (record,))
+                pick = heapq.nlargest if reverse else heapq.nsmallest
+                return pick(limit, entries, key=lambda e: e[:2])
+            selected = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+            size = len(selected)
+            out = []
+            for key, row_id in order.walk(after, reverse):
+                n = numbers[row_id]
+                if n >> 3 < size and selected[n >> 3] >> (n & 7) & 1:
+                    out.append((key, row_id, docs[n]))
+                    if len(out) == limit:
+                        break
+            return out
+
+    def rows(self, bits: int, limit: int = None) -> list:
+        """Records of a selection in store order."""
+        if limit is not None and limit <= 0:
+            return []
+        numbers = members(bits)
+        with self._lock:
+            docs = self.table.records
+            # A row removed since `bits` was selected is skipped
+            out = []
+            for n in numbers:
+                record = docs.get(n)
+                if record is not None:
+                    out.append(record)
+                    if len(out) == limit:
+                        break
+            return out
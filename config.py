@@ -2,6 +2,7 @@
 HIRS configuration: taxonomy (categories + subcategories), risk matrix, workflow, roles.
 Aligned with requirements doc – configurable by Admin in production.
 """
+import os
 
 # ---------------------------------------------------------------------------
 # Workflow statuses (Section 6.1)
@@ -30,6 +31,8 @@ CLASSIFICATION_TYPES = [
 
 TAGS_OPTIONS = ["Safety", "Security", "Environment", "Quality"]
 
+REPORTING_MODES = ["Named", "Confidential", "Anonymous"]
+
 # ---------------------------------------------------------------------------
 # Hazard taxonomy – categories and subcategories (Section 5)
 # Admin-configurable in production; here as dropdown configuration.
@@ -154,3 +157,60 @@ REFERENCE_LINKS = [
     ("Flight Safety Foundation - Ground Accident Prevention (GAP)", "https://flightsafety.org/toolkits-resources/past-safety-initiatives/ground-accident-prevention-gap/ground-accident-prevention-ramp-operational-safety-procedures/"),
     ("EASA - Ground handling safety", "https://www.easa.europa.eu/en/light/topics/ground-handling-forgotten-piece-aviation-safety-puzzle"),
 ]
+
+# ---------------------------------------------------------------------------
+# Static pages – Requirements, Reference, Exports and the Admin shell depend on config only
+# ---------------------------------------------------------------------------
+STATIC_PAGE_CACHE = os.environ.get("HIRS_STATIC_PAGE_CACHE", "1") != "0"  # build them once, serve with an ETag (static_pages.py)
+
+# ---------------------------------------------------------------------------
+# Charts – page figures are built as plain dicts and kept until the store changes (figures.py)
+# ---------------------------------------------------------------------------
+FIGURE_CACHE = os.environ.get("HIRS_FIGURE_CACHE", "1") != "0"
+FIGURE_CACHE_SIZE = int(os.environ.get("HIRS_FIGURE_CACHE_SIZE", "256"))
+
+# ---------------------------------------------------------------------------
+# List tables – Hazards, CAPA and Investigation lists are sent one page at a time
+# ---------------------------------------------------------------------------
+LIST_PAGE_SIZES = [25, 50, 100, 200]
+LIST_PAGE_SIZE = int(os.environ.get("HIRS_LIST_PAGE_SIZE", "50"))
+LIST_ROW_CACHE_SIZE = int(os.environ.get("HIRS_LIST_ROW_CACHE_SIZE", "20000"))  # rendered table rows kept per worker
+LIST_GRID = os.environ.get("HIRS_LIST_GRID", "0") == "1"  # open the lists in scroll view instead of pages
+LIST_GRID_BLOCK = 50  # rows the scroll view fetches at a time
+LIST_GRID_ROW_PX = 52  # fixed row height in scroll view (must match .hazards-grid-table in assets/hirs.css)
+LIST_CLIENT_FILTER = os.environ.get("HIRS_LIST_CLIENT_FILTER", "0") == "1"  # filter the hazards list in the browser (snapshots.py)
+LIST_CLIENT_FILTER_MAX_ROWS = int(os.environ.get("HIRS_LIST_CLIENT_FILTER_MAX_ROWS", "5000"))  # larger registers stay server-side
+LIST_CLIENT_REFRESH_SECONDS = 30  # how often an open hazards page asks for the changes since its snapshot
+SEARCH_DEBOUNCE_SECONDS = 0.3  # search boxes send their text once typing pauses this long
+SEARCH_FUZZY = os.environ.get("HIRS_SEARCH_FUZZY", "1") != "0"  # also match close spellings ("pusback" -> "pushback")
+
+# ---------------------------------------------------------------------------
+# Storage – hazard register persistence (shared by every gunicorn worker)
+# ---------------------------------------------------------------------------
+DATA_DIR = os.environ.get("HIRS_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+HAZARD_STORE = os.environ.get("HIRS_HAZARD_STORE", "sqlite")  # "sqlite" or "memory"
+HAZARD_DB_PATH = os.environ.get("HIRS_HAZARD_DB", os.path.join(DATA_DIR, "hirs.db"))
+JOURNAL_PATH = os.environ.get("HIRS_JOURNAL", os.path.join(DATA_DIR, "submissions.journal"))
+JOURNAL_CHECKPOINT_BYTES = 4 * 1024 * 1024  # fold the journal into the store once it reaches this size
+ID_BLOCK_SIZE = 20  # HZ-/CA-/INV- numbers leased per worker at a time
+IMPORT_BATCH_SIZE = 5000  # rows per transaction for bulk imports of historical reports
+IMPORT_STATUS_PATH = os.path.join(DATA_DIR, "import-status.json")
+IMPORT_DIR = os.environ.get("HIRS_IMPORT_DIR", os.path.join(DATA_DIR, "imports"))  # the admin page imports files from here only
+SEARCH_SEQUENCE_DB = os.path.join(DATA_DIR, "requests.db")  # latest search request per browser tab (see sequencing.py)
+
+# Retention – closed reports move to compressed monthly archive files, then are purged
+ARCHIVE_DIR = os.environ.get("HIRS_ARCHIVE_DIR", os.path.join(DATA_DIR, "archive"))
+ARCHIVE_STATUSES = ["Closed", "Rejected"]
+ARCHIVE_AFTER_DAYS = int(os.environ.get("HIRS_ARCHIVE_AFTER_DAYS", "365"))
+RETENTION_YEARS = min(7, max(5, int(os.environ.get("HIRS_RETENTION_YEARS", "7"))))  # requirement: 5–7 years
+ARCHIVE_INTERVAL_SECONDS = 6 * 3600
+ARCHIVE_BATCH_SIZE = 1000
+
+# Audit trail – append-only, hash-chained segments
+AUDIT_DIR = os.environ.get("HIRS_AUDIT_DIR", os.path.join(DATA_DIR, "audit"))
+AUDIT_SEGMENT_BYTES = 8 * 1024 * 1024  # roll to a new segment (and index the old one) at this size
+
+# Backups – content-addressed chunks + one manifest per backup (point HIRS_BACKUP_DIR at another disk)
+ATTACHMENTS_DIR = os.environ.get("HIRS_ATTACHMENTS_DIR", os.path.join(DATA_DIR, "attachments"))
+BACKUP_DIR = os.environ.get("HIRS_BACKUP_DIR", os.path.join(DATA_DIR, "backups"))
+BACKUP_CHUNK_BYTES = 256 * 1024  # a multiple of the SQLite page size, so changed pages map to changed chunks
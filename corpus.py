@@ -0,0 +1,41 @@
+"""
+Synthetic HIRS reports for the manage.py benchmarks and the tests: deterministic, so a run can be
+repeated, with the words, places and stations ramp reports use.
+"""
+from config import HAZARD_AREAS, WORKFLOW_STATUSES
+from records import HazardRecord
+
+WORDS = ["FOD", "spill", "cone", "tug", "belt loader", "wing tip", "jet blast", "fuel", "chock", "GPU cable",
+         "marshaller", "lighting", "baggage cart", "pushback", "de-icing", "catering truck", "stand", "apron"]
+PLACES = ["Gate A3", "Gate B12", "Stand 7", "Stand 14", "Cargo Bay A", "Remote stand 31", "Hangar 2"]
+STATIONS = ["Main Ramp", "North Ramp", "Terminal B", "Freight Terminal"]
+PEOPLE = ["J. Banda", "M. Phiri", "Safety Office", "Ramp Ops"]
+
+
+def hazards(count):
+    """`count` HazardRecords HZ-0000000, HZ-0000001, ..."""
+    for i in range(count):
+        w1, w2, w3 = WORDS[i % len(WORDS)], WORDS[(i * 7) % len(WORDS)], WORDS[(i * 13) % len(WORDS)]
+        yield HazardRecord(
+            id=f"HZ-{i:07d}",
+            title=f"{w1.capitalize()} near {PLACES[i % len(PLACES)]}",
+            description=f"Observed {w2} and {w3} during turnaround {i}.",
+            area=PLACES[(i * 3) % len(PLACES)],
+            station=STATIONS[i % len(STATIONS)],
+            category=HAZARD_AREAS[i % len(HAZARD_AREAS)],
+            perceived_risk=("Low", "Moderate", "High", "Critical")[(i // 3) % 4],
+            status=WORKFLOW_STATUSES[(i // 11) % len(WORKFLOW_STATUSES)],
+        )
+
+
+def linked(hazard_rows, count):
+    """(CAPA actions, investigations): `count` of each, spread over the given hazard dicts."""
+    capa, investigations = [], []
+    titled = min(50, len(hazard_rows))  # actions and reviews name one of the first 50 reports
+    for i in range(count):
+        hazard_id = hazard_rows[(i * 7) % len(hazard_rows)]["id"]
+        capa.append({"id": f"CAPA-{i:06d}", "action": f"Re-brief crews on {hazard_rows[i % titled]['title'].lower()}",
+                     "type": "Corrective", "priority": "High", "hazard_id": hazard_id, "status": "Open"})
+        investigations.append({"id": f"INV-{i:06d}", "title": f"Review of {hazard_rows[(i * 3) % titled]['title']}",
+                               "hazard_id": hazard_id, "lead": PEOPLE[i % len(PEOPLE)], "status": "Open"})
+    return capa, investigations
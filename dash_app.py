@@ -1,15 +1,22 @@
 import dash
+import flask
 from dash import html, dcc
-from dash.dependencies import Input, Output, State, ALL
+from dash.dependencies import ClientsideFunction, Input, Output, State, ALL, MATCH
 from dash.exceptions import PreventUpdate
 from dash import callback_context
+from dash.development.base_component import Component
 import json
-import plotly.graph_objects as go
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
 
 from config import (
     WORKFLOW_STATUSES,
     CLASSIFICATION_TYPES,
     TAGS_OPTIONS,
+    REPORTING_MODES,
     HAZARD_AREAS,
     SUBCATEGORIES,
     LIKELIHOOD_LABELS,
@@ -22,8 +29,42 @@ from config import (
     ROLES,
     ROLE_PERMISSIONS,
     REFERENCE_LINKS,
+    HAZARD_STORE,
+    HAZARD_DB_PATH,
+    ARCHIVE_AFTER_DAYS,
+    RETENTION_YEARS,
+    LIST_PAGE_SIZE,
+    LIST_PAGE_SIZES,
+    LIST_ROW_CACHE_SIZE,
+    LIST_GRID,
+    LIST_GRID_BLOCK,
+    LIST_GRID_ROW_PX,
+    LIST_CLIENT_FILTER,
+    LIST_CLIENT_FILTER_MAX_ROWS,
+    LIST_CLIENT_REFRESH_SECONDS,
+    SEARCH_DEBOUNCE_SECONDS,
+    SEARCH_SEQUENCE_DB,
+    STATIC_PAGE_CACHE,
+    FIGURE_CACHE,
+    FIGURE_CACHE_SIZE,
+    IMPORT_DIR,
 )
-
+from archive import search_archive, start_archiver
+from audit import AuditLog, to_csv as audit_to_csv
+from bitmaps import sort_key
+from figures import CLEAR, GRID, FigureCache, bars, chart, donut
+from fuzzy import SpellingIndex
+from ids import SequenceAllocator
+from importer import ImportResult, import_file, import_path, load_status as load_import_status
+from journal import Journal
+from records import CapaRecord, HazardRecord, InvestigationRecord
+from sequencing import RequestSequencer
+from snapshots import SNAPSHOT_FORMAT, snapshot_delta
+from static_pages import StaticPages
+from query import Entity, QueryEngine, QuerySyntaxError, row_matches, sort_rows
+from store import open_store
+
+log = logging.getLogger(__name__)
 
 external_stylesheets = [
     {
@@ -39,38 +80,60 @@ app = dash.Dash(__name__, external_stylesheets=external_stylesheets, suppress_ca
 app.title = "HIRS – Hazard Reporting"
 server = app.server  # Flask app for production WSGI (gunicorn, etc.)
 
-# Simple in-memory store – good enough for a single-user prototype
-HAZARDS = []  # list[dict]
+# Submitted reports live in the hazard store (SQLite/WAL by default) so they survive
+# restarts and every gunicorn worker reads the same register.
+STORE = open_store()
+# Submissions are fsynced to a group-commit journal before they reach the store;
+# replay whatever a crash left behind before serving.
+JOURNAL = Journal()
+JOURNAL.recover(STORE)
+# Hash-chained audit trail of submissions, status changes, assignments and closures
+AUDIT = AuditLog()
+# Closed / Rejected reports past ARCHIVE_AFTER_DAYS move to compressed cold partitions
+ARCHIVER = start_archiver(STORE, audit=AUDIT)
 
 # Dummy reports for the Report page – professional prototype with realistic data
-SAMPLE_REPORTS = [
-    {"id": "HZ-0001", "title": "FOD near stand 7", "category": "Airside / Ramp", "area": "Stand 7", "station": "Main Ramp", "status": "Submitted"},
-    {"id": "HZ-0002", "title": "Vehicle-pedestrian conflict at gate B12", "category": "Airside / Ramp", "area": "Gate B12", "station": "Terminal B", "status": "Triage"},
-    {"id": "HZ-0003", "title": "Spill at refuelling point", "category": "Aircraft servicing", "area": "Stand 14", "station": "North Ramp", "status": "Closed"},
-    {"id": "HZ-0004", "title": "Damaged GPU cable left on stand", "category": "Ground Support Equipment (GSE)", "area": "Stand 22", "station": "Main Ramp", "status": "Assigned actions"},
-    {"id": "HZ-0005", "title": "Insufficient lighting at cargo bay entrance", "category": "Cargo, baggage & loading", "area": "Cargo Bay A", "station": "Freight Terminal", "status": "In progress"},
-]
+SAMPLE_REPORTS = (
+    HazardRecord.from_dict({"id": "HZ-0001", "title": "FOD near stand 7", "category": "Airside / Ramp", "area": "Stand 7", "station": "Main Ramp", "status": "Submitted"}),
+    HazardRecord.from_dict({"id": "HZ-0002", "title": "Vehicle-pedestrian conflict at gate B12", "category": "Airside / Ramp", "area": "Gate B12", "station": "Terminal B", "status": "Triage"}),
+    HazardRecord.from_dict({"id": "HZ-0003", "title": "Spill at refuelling point", "category": "Aircraft servicing", "area": "Stand 14", "station": "North Ramp", "status": "Closed"}),
+    HazardRecord.from_dict({"id": "HZ-0004", "title": "Damaged GPU cable left on stand", "category": "Ground Support Equipment (GSE)", "area": "Stand 22", "station": "Main Ramp", "status": "Assigned actions"}),
+    HazardRecord.from_dict({"id": "HZ-0005", "title": "Insufficient lighting at cargo bay entrance", "category": "Cargo, baggage & loading", "area": "Cargo Bay A", "station": "Freight Terminal", "status": "In progress"}),
+)
 
 # Hardcoded sample data so the Hazards page looks exactly like the reference (always visible)
-SAMPLE_HAZARDS = [
-    {"id": "HZ-0001", "title": "FOD near stand 7", "category": "Airside / Ramp", "area": "Stand 7", "station": "Main Ramp", "perceived_risk": "High", "status": "Submitted"},
-    {"id": "HZ-0002", "title": "Vehicle-pedestrian conflict at gate B12", "category": "Airside / Ramp", "area": "Gate B12", "station": "Terminal B", "perceived_risk": "Moderate", "status": "Triage"},
-    {"id": "HZ-0003", "title": "Spill at refuelling point", "category": "Aircraft servicing", "area": "Stand 14", "station": "North Ramp", "perceived_risk": "Critical", "status": "Closed"},
-]
+SAMPLE_HAZARDS = (
+    HazardRecord.from_dict({"id": "HZ-0001", "title": "FOD near stand 7", "category": "Airside / Ramp", "area": "Stand 7", "station": "Main Ramp", "perceived_risk": "High", "status": "Submitted"}),
+    HazardRecord.from_dict({"id": "HZ-0002", "title": "Vehicle-pedestrian conflict at gate B12", "category": "Airside / Ramp", "area": "Gate B12", "station": "Terminal B", "perceived_risk": "Moderate", "status": "Triage"}),
+    HazardRecord.from_dict({"id": "HZ-0003", "title": "Spill at refuelling point", "category": "Aircraft servicing", "area": "Stand 14", "station": "North Ramp", "perceived_risk": "Critical", "status": "Closed"}),
+)
 
 # Hardcoded sample CAPA actions (same structure as Hazards page)
-SAMPLE_CAPA = [
-    {"id": "CA-0001", "action": "Inspect stand 7 for FOD; reinforce briefing", "type": "Corrective", "priority": "High", "hazard_id": "HZ-0001", "due_date": "2026-03-05", "status": "In progress"},
-    {"id": "CA-0002", "action": "Install additional signage at gate B12", "type": "Preventive", "priority": "Medium", "hazard_id": "HZ-0002", "due_date": "2026-03-12", "status": "Open"},
-    {"id": "CA-0003", "action": "Spill kit replenishment and training", "type": "Immediate", "priority": "Critical", "hazard_id": "HZ-0003", "due_date": "2026-02-28", "status": "Closed"},
-]
+SAMPLE_CAPA = (
+    CapaRecord.from_dict({"id": "CA-0001", "action": "Inspect stand 7 for FOD; reinforce briefing", "type": "Corrective", "priority": "High", "hazard_id": "HZ-0001", "due_date": "2026-03-05", "status": "In progress"}),
+    CapaRecord.from_dict({"id": "CA-0002", "action": "Install additional signage at gate B12", "type": "Preventive", "priority": "Medium", "hazard_id": "HZ-0002", "due_date": "2026-03-12", "status": "Open"}),
+    CapaRecord.from_dict({"id": "CA-0003", "action": "Spill kit replenishment and training", "type": "Immediate", "priority": "Critical", "hazard_id": "HZ-0003", "due_date": "2026-02-28", "status": "Closed"}),
+)
 
 # Hardcoded sample investigations (serious events / REDA-style)
-SAMPLE_INVESTIGATIONS = [
-    {"id": "INV-0001", "title": "FOD incident stand 7 – root cause", "hazard_id": "HZ-0001", "status": "In progress", "lead": "J. Smith", "started": "2026-02-20"},
-    {"id": "INV-0002", "title": "Gate B12 vehicle-pedestrian near miss", "hazard_id": "HZ-0002", "status": "Open", "lead": "—", "started": "2026-02-24"},
-    {"id": "INV-0003", "title": "Refuelling spill stand 14", "hazard_id": "HZ-0003", "status": "Closed", "lead": "A. Jones", "started": "2026-02-18"},
-]
+SAMPLE_INVESTIGATIONS = (
+    InvestigationRecord.from_dict({"id": "INV-0001", "title": "FOD incident stand 7 – root cause", "hazard_id": "HZ-0001", "status": "In progress", "lead": "J. Smith", "started": "2026-02-20"}),
+    InvestigationRecord.from_dict({"id": "INV-0002", "title": "Gate B12 vehicle-pedestrian near miss", "hazard_id": "HZ-0002", "status": "Open", "lead": "—", "started": "2026-02-24"}),
+    InvestigationRecord.from_dict({"id": "INV-0003", "title": "Refuelling spill stand 14", "hazard_id": "HZ-0003", "status": "Closed", "lead": "A. Jones", "started": "2026-02-18"}),
+)
+
+# HZ-/CA-/INV- numbers are leased in blocks per worker so concurrent submissions never collide
+IDS = SequenceAllocator(
+    None if HAZARD_STORE == "memory" else HAZARD_DB_PATH,
+    floors={
+        "HZ": len(SAMPLE_REPORTS) + STORE.count() + 1,
+        "CA": len(SAMPLE_CAPA) + 1,
+        "INV": len(SAMPLE_INVESTIGATIONS) + 1,
+    },
+)
+
+# Search boxes number their requests; superseded ones are dropped before (or discarded after) running
+SEQUENCER = RequestSequencer(None if HAZARD_STORE == "memory" else SEARCH_SEQUENCE_DB)
 
 
 SIDEBAR_ITEMS = [
@@ -256,73 +319,91 @@ def page_shell(page_title: str, body_placeholder: str = None):
 # Report page – real hazard entry form (Module A)
 # ---------------------------------------------------------------------------
 def _next_hazard_id() -> str:
-    """Generate a simple incremental hazard ID (after SAMPLE_REPORTS)."""
-    return f"HZ-{len(SAMPLE_REPORTS) + len(HAZARDS) + 1:04d}"
+    """Next hazard ID (after SAMPLE_REPORTS), unique across threads and workers."""
+    return IDS.next_id("HZ")
+
+
+def change_hazard_status(hazard_id: str, status: str, actor: str, reason: str = ""):
+    """Move a stored hazard to `status` and record it in the audit trail. Returns the previous status."""
+    if status not in WORKFLOW_STATUSES:
+        raise ValueError(f"Unknown status {status!r}")
+    previous = STORE.set_status(hazard_id, status)
+    if previous is None:
+        raise KeyError(hazard_id)
+    details = {"from": previous, "to": status}
+    if reason:
+        details["reason"] = reason
+    AUDIT.append(hazard_id, "closed" if status == "Closed" else "status", actor, details)
+    return previous
+
+
+def _merged_counts(samples, field, empty_label, as_of=None, kind="hazards"):
+    """{value: count} over sample rows plus the store: popcounts of the filter bitmaps for the live
+    register, grouped in the store for a past snapshot (hazards only)."""
+    counts = {}
+    for r in samples:
+        key = r.get(field) or empty_label
+        counts[key] = counts.get(key, 0) + 1
+    stored = QUERIES.bitmaps(kind).counts(field) if as_of is None else STORE.count_by(field, as_of=as_of)
+    for key, n in stored.items():
+        key = key or empty_label
+        counts[key] = counts.get(key, 0) + n
+    return counts
+
+
+# One query layer behind every list: each entity says which rows a list shows and what it can be
+# searched and filtered on; query.py plans queries against the filter bitmaps and search index and
+# caches results until the store's change number moves.
+QUERIES = QueryEngine(STORE)
+QUERIES.register(Entity("reports", "hazards", SAMPLE_REPORTS, newest_first=True))
+QUERIES.register(Entity("hazards", "hazards", SAMPLE_HAZARDS, newest_first=True))
+QUERIES.register(Entity("capa", "capa", SAMPLE_CAPA))
+QUERIES.register(Entity("investigations", "investigations", SAMPLE_INVESTIGATIONS))
+
+# Page charts are plain figure dicts (figures.py), kept per chart until the store's change number
+# moves; charts of fixed data are built once.
+FIGURES = FigureCache(FIGURE_CACHE_SIZE)
+FIGURES.enabled = FIGURE_CACHE
+
+
+def _as_of(date_value):
+    """End of the picked day as an ISO timestamp (None = the live register)."""
+    return f"{date_value[:10]}T23:59:59.999999+00:00" if date_value else None
+
+
+def _as_of_filter(picker_id):
+    """ "As of" date picker for a list toolbar: auditors see the register as it stood at the end of that day."""
+    return html.Div(
+        [
+            html.Label("As of:", className="hazards-filter-inline-label"),
+            dcc.DatePickerSingle(id=picker_id, clearable=True, display_format="YYYY-MM-DD", placeholder="Now"),
+        ],
+        className="hazards-filter-inline",
+    )
 
 
 def report_page():
     """Report dashboard with KPIs, charts, generated reports list, and form (shown on New report)."""
-    # Dummy data for Report dashboard (from SAMPLE_REPORTS + HAZARDS)
-    all_r = list(SAMPLE_REPORTS) + list(HAZARDS)
-    n_total = len(all_r)
-    status_counts = {}
-    for r in all_r:
-        s = r.get("status") or "Unknown"
-        status_counts[s] = status_counts.get(s, 0) + 1
+    version = STORE.current_version()  # read before the counts below: a write meanwhile only makes the cached figures stale
+    # Dummy data for Report dashboard (from SAMPLE_REPORTS + hazard store)
+    n_total = len(SAMPLE_REPORTS) + QUERIES.bitmaps("hazards").count()
+    status_counts = _merged_counts(SAMPLE_REPORTS, "status", "Unknown")
     n_open = status_counts.get("Submitted", 0) + status_counts.get("Triage", 0) + status_counts.get("Assigned actions", 0) + status_counts.get("In progress", 0)
     n_closed = status_counts.get("Closed", 0)
     n_pending = status_counts.get("Submitted", 0) + status_counts.get("Triage", 0)
-    category_counts = {}
-    for r in all_r:
-        c = r.get("category") or "Other"
-        category_counts[c] = category_counts.get(c, 0) + 1
+    category_counts = _merged_counts(SAMPLE_REPORTS, "category", "Other")
     # Chart: Reports by status
     status_labels = list(status_counts.keys()) or ["No data"]
     status_values = list(status_counts.values()) or [0]
     colors_status = ["#5e4a7a", "#10b981", "#3b82f6", "#f59e0b", "#94a3b8", "#ef4444"]
-    report_status_fig = go.Figure(
-        data=[
-            go.Pie(
-                labels=status_labels,
-                values=status_values,
-                hole=0.55,
-                marker_colors=colors_status[: len(status_labels)],
-                textinfo="label+percent",
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Reports by status",
-            margin=dict(l=10, r=10, t=36, b=10),
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            showlegend=False,
-        ),
+    report_status_fig = FIGURES.get(
+        "report-status", lambda: donut("Reports by status", status_labels, status_values, colors_status[: len(status_labels)]), version
     )
     # Chart: Reports by category
     cat_labels = list(category_counts.keys()) or ["No data"]
     cat_values = list(category_counts.values()) or [0]
-    report_cat_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=cat_labels,
-                y=cat_values,
-                marker_color="#5e4a7a",
-                text=cat_values,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Reports by category",
-            margin=dict(l=20, r=20, t=36, b=80),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            xaxis=dict(tickangle=-35),
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
+    report_cat_fig = FIGURES.get(
+        "report-category", lambda: bars("Reports by category", cat_labels, cat_values, "#5e4a7a", bottom=80, tickangle=-35), version
     )
     return html.Div(
         [
@@ -590,11 +671,7 @@ def report_page():
                                             html.Label("Reporting mode"),
                                             dcc.RadioItems(
                                                 id="report-mode",
-                                                options=[
-                                                    {"label": "Named", "value": "Named"},
-                                                    {"label": "Confidential", "value": "Confidential"},
-                                                    {"label": "Anonymous", "value": "Anonymous"},
-                                                ],
+                                                options=[{"label": m, "value": m} for m in REPORTING_MODES],
                                                 value="Named",
                                                 className="form-radio report-radio",
                                             ),
@@ -1022,19 +1099,12 @@ def reference_page():
 # ---------------------------------------------------------------------------
 def hazards_page():
     """Hazards dashboard with KPIs, charts, filters, and table."""
-    all_h = list(SAMPLE_HAZARDS) + list(HAZARDS)
-    n_total = len(all_h)
-    status_counts = {}
-    category_counts = {}
-    risk_counts = {"High": 0, "Critical": 0, "Moderate": 0, "Low": 0}
-    for h in all_h:
-        s = h.get("status") or "Unknown"
-        status_counts[s] = status_counts.get(s, 0) + 1
-        c = h.get("category") or "Other"
-        category_counts[c] = category_counts.get(c, 0) + 1
-        r = h.get("perceived_risk") or ""
-        if r in risk_counts:
-            risk_counts[r] += 1
+    version = STORE.current_version()
+    n_total = len(SAMPLE_HAZARDS) + QUERIES.bitmaps("hazards").count()
+    status_counts = _merged_counts(SAMPLE_HAZARDS, "status", "Unknown")
+    category_counts = _merged_counts(SAMPLE_HAZARDS, "category", "Other")
+    perceived = _merged_counts(SAMPLE_HAZARDS, "perceived_risk", "")
+    risk_counts = {k: perceived.get(k, 0) for k in ("High", "Critical", "Moderate", "Low")}
     n_open = sum(status_counts.get(x, 0) for x in ("Submitted", "Triage", "Assigned actions", "In progress"))
     n_closed = status_counts.get("Closed", 0)
     n_high_critical = risk_counts.get("High", 0) + risk_counts.get("Critical", 0)
@@ -1044,73 +1114,21 @@ def hazards_page():
     status_labels = list(status_counts.keys()) or ["No data"]
     status_vals = list(status_counts.values()) or [0]
     colors = ["#5e4a7a", "#10b981", "#3b82f6", "#f59e0b", "#94a3b8", "#ef4444"]
-    hazards_status_fig = go.Figure(
-        data=[
-            go.Pie(
-                labels=status_labels,
-                values=status_vals,
-                hole=0.55,
-                marker_colors=colors[: len(status_labels)],
-                textinfo="label+percent",
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Hazards by status",
-            margin=dict(l=10, r=10, t=36, b=10),
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            showlegend=False,
-        ),
+    hazards_status_fig = FIGURES.get(
+        "hazards-status", lambda: donut("Hazards by status", status_labels, status_vals, colors[: len(status_labels)]), version
     )
     # Chart: Hazards by category
     cat_labels = list(category_counts.keys()) or ["No data"]
     cat_vals = list(category_counts.values()) or [0]
-    hazards_cat_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=cat_labels,
-                y=cat_vals,
-                marker_color="#5e4a7a",
-                text=cat_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Hazards by category",
-            margin=dict(l=20, r=20, t=36, b=80),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            xaxis=dict(tickangle=-35),
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
+    hazards_cat_fig = FIGURES.get(
+        "hazards-category", lambda: bars("Hazards by category", cat_labels, cat_vals, "#5e4a7a", bottom=80, tickangle=-35), version
     )
     # Chart: By risk level
     risk_labels = [k for k in risk_counts if risk_counts[k] > 0] or ["Low"]
     risk_vals = [risk_counts.get(k, 0) for k in risk_labels] or [0]
     risk_colors = ["#10b981", "#3b82f6", "#f59e0b", "#ef4444"]
-    hazards_risk_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=risk_labels,
-                y=risk_vals,
-                marker_color=risk_colors[: len(risk_labels)],
-                text=risk_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="By risk level",
-            margin=dict(l=20, r=20, t=36, b=50),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=200,
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
+    hazards_risk_fig = FIGURES.get(
+        "hazards-risk", lambda: bars("By risk level", risk_labels, risk_vals, risk_colors[: len(risk_labels)], height=200), version
     )
     return html.Div(
         [
@@ -1207,9 +1225,11 @@ def hazards_page():
                                     dcc.Input(
                                         id="hazards-search",
                                         type="text",
-                                        placeholder="Search by name, category, or location...",
+                                        debounce=SEARCH_DEBOUNCE_SECONDS,
+                                        placeholder="Search by name, description, category, or location… or status:Triage risk>=High created:>2026-01-01",
                                         className="hazards-search-input",
                                     ),
+                                    dcc.Store(id="hazards-search-request"),
                                 ],
                                 className="hazards-search-wrap",
                             ),
@@ -1239,10 +1259,19 @@ def hazards_page():
                                 ],
                                 className="hazards-filter-inline",
                             ),
+                            _as_of_filter("hazards-as-of"),
+                            dcc.Checklist(
+                                id="hazards-include-archived",
+                                options=[{"label": " Include archived", "value": "archived"}],
+                                value=[],
+                                className="hazards-filter-inline",
+                            ),
                         ],
                         className="hazards-toolbar",
                     ),
                     html.Div(id="hazards-list-container", className="hazards-list-container"),
+                    _list_pager("hazards"),
+                    _client_filter_stores() if LIST_CLIENT_FILTER else None,
                 ],
                 className="hazards-body",
             ),
@@ -1256,19 +1285,12 @@ def hazards_page():
 # ---------------------------------------------------------------------------
 def capa_page():
     """Corrective and preventive actions – dashboard (KPIs + charts), then toolbar and table."""
-    all_c = list(SAMPLE_CAPA)
-    n_total = len(all_c)
-    status_counts = {}
-    type_counts = {}
-    priority_counts = {"Low": 0, "Medium": 0, "High": 0, "Critical": 0}
-    for c in all_c:
-        s = c.get("status") or "Unknown"
-        status_counts[s] = status_counts.get(s, 0) + 1
-        t = c.get("type") or "Other"
-        type_counts[t] = type_counts.get(t, 0) + 1
-        p = c.get("priority") or ""
-        if p in priority_counts:
-            priority_counts[p] += 1
+    version = STORE.current_version()
+    n_total = len(SAMPLE_CAPA) + QUERIES.bitmaps("capa").count()
+    status_counts = _merged_counts(SAMPLE_CAPA, "status", "Unknown", kind="capa")
+    type_counts = _merged_counts(SAMPLE_CAPA, "type", "Other", kind="capa")
+    priorities = _merged_counts(SAMPLE_CAPA, "priority", "", kind="capa")
+    priority_counts = {p: priorities.get(p, 0) for p in ("Low", "Medium", "High", "Critical")}
     n_open = status_counts.get("Open", 0)
     n_in_progress = status_counts.get("In progress", 0)
     n_closed = status_counts.get("Closed", 0)
@@ -1278,74 +1300,16 @@ def capa_page():
     type_labels = list(type_counts.keys()) or ["No data"]
     type_vals = list(type_counts.values()) or [0]
     colors = ["#5e4a7a", "#10b981", "#3b82f6", "#f59e0b", "#94a3b8"]
-    capa_type_fig = go.Figure(
-        data=[
-            go.Pie(
-                labels=type_labels,
-                values=type_vals,
-                hole=0.55,
-                marker_colors=colors[: len(type_labels)],
-                textinfo="label+percent",
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="CAPA by type",
-            margin=dict(l=10, r=10, t=36, b=10),
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            showlegend=False,
-        ),
-    )
+    capa_type_fig = FIGURES.get("capa-type", lambda: donut("CAPA by type", type_labels, type_vals, colors[: len(type_labels)]), version)
     # Chart: CAPA by priority (bar)
     prio_labels = [k for k in priority_counts if priority_counts[k] > 0] or ["Low"]
     prio_vals = [priority_counts.get(k, 0) for k in prio_labels] or [0]
     prio_colors = ["#10b981", "#3b82f6", "#f59e0b", "#ef4444"]
-    capa_priority_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=prio_labels,
-                y=prio_vals,
-                marker_color=prio_colors[: len(prio_labels)],
-                text=prio_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="By priority",
-            margin=dict(l=20, r=20, t=36, b=50),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
-    )
+    capa_priority_fig = FIGURES.get("capa-priority", lambda: bars("By priority", prio_labels, prio_vals, prio_colors[: len(prio_labels)]), version)
     # Chart: CAPA by status (bar)
     status_labels = list(status_counts.keys()) or ["No data"]
     status_vals = list(status_counts.values()) or [0]
-    capa_status_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=status_labels,
-                y=status_vals,
-                marker_color="#5e4a7a",
-                text=status_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="By status",
-            margin=dict(l=20, r=20, t=36, b=80),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            xaxis=dict(tickangle=-25),
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
-    )
+    capa_status_fig = FIGURES.get("capa-status", lambda: bars("By status", status_labels, status_vals, "#5e4a7a", bottom=80, tickangle=-25), version)
 
     type_options = [{"label": t, "value": t} for t in CAPA_ACTION_TYPES]
     priority_options = [{"label": p, "value": p} for p in CAPA_PRIORITIES]
@@ -1451,9 +1415,11 @@ def capa_page():
                                     dcc.Input(
                                         id="capa-search",
                                         type="text",
-                                        placeholder="Search by action, hazard ID...",
+                                        debounce=SEARCH_DEBOUNCE_SECONDS,
+                                        placeholder="Search by action, hazard ID… or priority>=High due:<2026-04",
                                         className="hazards-search-input",
                                     ),
+                                    dcc.Store(id="capa-search-request"),
                                 ],
                                 className="hazards-search-wrap",
                             ),
@@ -1483,10 +1449,12 @@ def capa_page():
                                 ],
                                 className="hazards-filter-inline",
                             ),
+                            _as_of_filter("capa-as-of"),
                         ],
                         className="hazards-toolbar",
                     ),
                     html.Div(id="capa-list-container", className="hazards-list-container"),
+                    _list_pager("capa"),
                 ],
                 className="hazards-body",
             ),
@@ -1500,15 +1468,11 @@ def capa_page():
 # ---------------------------------------------------------------------------
 def investigation_page():
     """Structured investigations for serious events – dashboard, icons, then table."""
-    all_inv = list(SAMPLE_INVESTIGATIONS)
-    n_total = len(all_inv)
-    status_counts = {}
-    with_lead = 0
-    for inv in all_inv:
-        s = inv.get("status") or "Unknown"
-        status_counts[s] = status_counts.get(s, 0) + 1
-        if inv.get("lead") and inv.get("lead") != "—":
-            with_lead += 1
+    version = STORE.current_version()
+    n_total = len(SAMPLE_INVESTIGATIONS) + QUERIES.bitmaps("investigations").count()
+    status_counts = _merged_counts(SAMPLE_INVESTIGATIONS, "status", "Unknown", kind="investigations")
+    leads = _merged_counts(SAMPLE_INVESTIGATIONS, "lead", "", kind="investigations")
+    with_lead = n_total - leads.get("", 0) - leads.get("—", 0)
     n_open = status_counts.get("Open", 0)
     n_in_progress = status_counts.get("In progress", 0)
     n_closed = status_counts.get("Closed", 0)
@@ -1517,70 +1481,16 @@ def investigation_page():
     status_labels = list(status_counts.keys()) or ["No data"]
     status_vals = list(status_counts.values()) or [0]
     colors = ["#5e4a7a", "#10b981", "#3b82f6", "#f59e0b", "#94a3b8"]
-    inv_status_fig = go.Figure(
-        data=[
-            go.Pie(
-                labels=status_labels,
-                values=status_vals,
-                hole=0.55,
-                marker_colors=colors[: len(status_labels)],
-                textinfo="label+percent",
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Investigations by status",
-            margin=dict(l=10, r=10, t=36, b=10),
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            showlegend=False,
-        ),
+    inv_status_fig = FIGURES.get(
+        "investigations-status", lambda: donut("Investigations by status", status_labels, status_vals, colors[: len(status_labels)]), version
     )
-    inv_status_bar_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=status_labels,
-                y=status_vals,
-                marker_color="#5e4a7a",
-                text=status_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Status overview",
-            margin=dict(l=20, r=20, t=36, b=80),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            xaxis=dict(tickangle=-25),
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
+    inv_status_bar_fig = FIGURES.get(
+        "investigations-status-bars", lambda: bars("Status overview", status_labels, status_vals, "#5e4a7a", bottom=80, tickangle=-25), version
     )
     # Lead assigned count as simple bar (with lead vs without)
     lead_labels = ["Lead assigned", "No lead"]
     lead_vals = [with_lead, n_total - with_lead]
-    inv_lead_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=lead_labels,
-                y=lead_vals,
-                marker_color=["#10b981", "#94a3b8"],
-                text=lead_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Lead assignment",
-            margin=dict(l=20, r=20, t=36, b=60),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
-    )
+    inv_lead_fig = FIGURES.get("investigations-lead", lambda: bars("Lead assignment", lead_labels, lead_vals, ["#10b981", "#94a3b8"], bottom=60), version)
 
     status_options = [{"label": "Open", "value": "Open"}, {"label": "In progress", "value": "In progress"}, {"label": "Closed", "value": "Closed"}]
     return html.Div(
@@ -1701,9 +1611,11 @@ def investigation_page():
                                     dcc.Input(
                                         id="investigation-search",
                                         type="text",
-                                        placeholder="Search by title, investigation ID, hazard...",
+                                        debounce=SEARCH_DEBOUNCE_SECONDS,
+                                        placeholder="Search by title, investigation ID, hazard… or status:Open lead:\"J. Smith\"",
                                         className="hazards-search-input",
                                     ),
+                                    dcc.Store(id="investigation-search-request"),
                                 ],
                                 className="hazards-search-wrap",
                             ),
@@ -1720,10 +1632,12 @@ def investigation_page():
                                 ],
                                 className="hazards-filter-inline",
                             ),
+                            _as_of_filter("investigation-as-of"),
                         ],
                         className="hazards-toolbar",
                     ),
                     html.Div(id="investigation-list-container", className="hazards-list-container"),
+                    _list_pager("investigations"),
                 ],
                 className="hazards-body",
             ),
@@ -1809,6 +1723,7 @@ def exports_page():
                                         [html.Button("Export as CSV", id="export-audit-csv", className="primary-btn exports-btn")],
                                         className="exports-actions",
                                     ),
+                                    dcc.Download(id="export-audit-download"),
                                 ],
                                 className="exports-card",
                             ),
@@ -1825,92 +1740,37 @@ def exports_page():
 
 def risk_triage_page():
     """Risk & Triage dashboard: KPIs, charts, risk matrix, escalation rules, and hazards table."""
-    all_hazards = list(SAMPLE_HAZARDS) + list(HAZARDS)
-    awaiting = [h for h in all_hazards if h.get("status") in ("Submitted", "Triage")]
-    n_awaiting = len(awaiting)
-    n_high_extreme = sum(1 for h in all_hazards if h.get("perceived_risk") in ("High", "Critical"))
-    n_in_progress = sum(1 for h in all_hazards if h.get("status") in ("Assigned actions", "In progress"))
-    n_closed = sum(1 for h in all_hazards if h.get("status") == "Closed")
-    status_counts = {}
-    risk_counts = {"Low": 0, "Moderate": 0, "High": 0, "Critical": 0}
-    for h in all_hazards:
-        s = h.get("status") or "Unknown"
-        status_counts[s] = status_counts.get(s, 0) + 1
-        r = h.get("perceived_risk") or ""
-        if r in risk_counts:
-            risk_counts[r] += 1
+    version = STORE.current_version()
+    awaiting_statuses = ("Submitted", "Triage")
+    awaiting = [h for h in SAMPLE_HAZARDS if h.get("status") in awaiting_statuses]
+    index = QUERIES.bitmaps("hazards")
+    awaiting += index.rows(index.select(status=awaiting_statuses), limit=max(0, 10 - len(awaiting)))
+    status_counts = _merged_counts(SAMPLE_HAZARDS, "status", "Unknown")
+    perceived = _merged_counts(SAMPLE_HAZARDS, "perceived_risk", "")
+    risk_counts = {k: perceived.get(k, 0) for k in ("Low", "Moderate", "High", "Critical")}
+    n_awaiting = sum(status_counts.get(s, 0) for s in awaiting_statuses)
+    n_high_extreme = risk_counts["High"] + risk_counts["Critical"]
+    n_in_progress = status_counts.get("Assigned actions", 0) + status_counts.get("In progress", 0)
+    n_closed = status_counts.get("Closed", 0)
     # Chart: Hazards by risk level
     risk_labels = [k for k in risk_counts if risk_counts[k] > 0] or ["Low"]
     risk_vals = [risk_counts.get(k, 0) for k in risk_labels] or [0]
     risk_color_map = {"Low": "#10b981", "Moderate": "#3b82f6", "High": "#f59e0b", "Critical": "#ef4444"}
     risk_colors = [risk_color_map.get(k, "#94a3b8") for k in risk_labels]
-    risk_level_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=risk_labels,
-                y=risk_vals,
-                marker_color=risk_colors,
-                text=risk_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Hazards by risk level",
-            margin=dict(l=20, r=20, t=36, b=50),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
-    )
+    risk_level_fig = FIGURES.get("triage-risk", lambda: bars("Hazards by risk level", risk_labels, risk_vals, risk_colors), version)
     # Chart: Triage status (donut)
     status_labels = list(status_counts.keys()) or ["No data"]
     status_vals = list(status_counts.values()) or [0]
     colors = ["#5e4a7a", "#10b981", "#3b82f6", "#f59e0b", "#94a3b8", "#ef4444"]
-    triage_status_fig = go.Figure(
-        data=[
-            go.Pie(
-                labels=status_labels,
-                values=status_vals,
-                hole=0.55,
-                marker_colors=colors[: len(status_labels)],
-                textinfo="label+percent",
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Status breakdown",
-            margin=dict(l=10, r=10, t=36, b=10),
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            showlegend=False,
-        ),
+    triage_status_fig = FIGURES.get(
+        "triage-status", lambda: donut("Status breakdown", status_labels, status_vals, colors[: len(status_labels)]), version
     )
     # Chart: Risk score distribution (dummy distribution for demo)
     score_buckets = ["Low (1-6)", "Medium (7-12)", "High (13-20)", "Extreme (21-25)"]
     score_vals = [4, 3, 2, 1]  # demo counts
-    score_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=score_buckets,
-                y=score_vals,
-                marker_color=["#10b981", "#3b82f6", "#f59e0b", "#ef4444"],
-                text=score_vals,
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Risk score distribution",
-            margin=dict(l=20, r=20, t=36, b=70),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            xaxis=dict(tickangle=-25),
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
+    score_fig = FIGURES.get(
+        "triage-score",
+        lambda: bars("Risk score distribution", score_buckets, score_vals, ["#10b981", "#3b82f6", "#f59e0b", "#ef4444"], bottom=70, tickangle=-25),
     )
     # Build 5×5 matrix
     matrix_header = html.Tr(
@@ -2077,87 +1937,44 @@ def dashboard_page():
     days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
     submitted = [42, 58, 65, 72, 68, 45, 38]
     closed = [35, 48, 52, 61, 55, 40, 32]
-    bar_in_out = go.Figure(
-        data=[
-            go.Bar(name="Submitted", x=days, y=submitted, marker_color="#5e4a7a"),
-            go.Bar(name="Closed", x=days, y=closed, marker_color="#94a3b8"),
+    bar_in_out = FIGURES.get("dashboard-in-out", lambda: chart(
+        [
+            {"type": "bar", "name": "Submitted", "x": days, "y": submitted, "marker": {"color": "#5e4a7a"}},
+            {"type": "bar", "name": "Closed", "x": days, "y": closed, "marker": {"color": "#94a3b8"}},
         ],
-        layout=go.Layout(
-            title="Reports (Submitted vs Closed)",
-            barmode="group",
-            margin=dict(l=20, r=20, t=36, b=20),
-            legend=dict(orientation="h", y=1.02, x=0),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=260,
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)", dtick=20),
-        ),
-    )
+        "Reports (Submitted vs Closed)", 260, (20, 20, 36, 20),
+        barmode="group", legend={"orientation": "h", "y": 1.02, "x": 0}, plot_bgcolor=CLEAR, yaxis=dict(GRID, dtick=20),
+    ))
 
     # Donut: Lead sources style → Report sources / categories
-    donut_sources = go.Figure(
-        data=[
-            go.Pie(
-                labels=["Airside / Ramp", "Aircraft servicing", "GSE", "Cargo", "Other"],
-                values=[42, 28, 18, 8, 4],
-                hole=0.6,
-                marker_colors=["#5e4a7a", "#10b981", "#3b82f6", "#f59e0b", "#94a3b8"],
-                textinfo="label+percent",
-                textposition="outside",
-            )
-        ],
-        layout=go.Layout(
-            title="Report categories",
-            margin=dict(l=10, r=10, t=36, b=10),
-            paper_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=260,
-            showlegend=False,
-        ),
-    )
+    donut_sources = FIGURES.get("dashboard-categories", lambda: donut(
+        "Report categories",
+        ["Airside / Ramp", "Aircraft servicing", "GSE", "Cargo", "Other"],
+        [42, 28, 18, 8, 4],
+        ["#5e4a7a", "#10b981", "#3b82f6", "#f59e0b", "#94a3b8"],
+        hole=0.6,
+        height=260,
+    ))
 
     # Line chart: Weekly trends (Conversations + Open)
     weeks = ["W1", "W2", "W3", "W4"]
     conversations = [120, 165, 195, 180]
     hot_leads = [14, 18, 22, 19]
-    line_trends = go.Figure(
-        data=[
-            go.Scatter(name="Reports", x=weeks, y=conversations, mode="lines+markers", line=dict(color="#5e4a7a", width=2), marker=dict(size=8)),
-            go.Scatter(name="Open", x=weeks, y=hot_leads, mode="lines+markers", line=dict(color="#10b981", width=2), marker=dict(size=8)),
+    line_trends = FIGURES.get("dashboard-trends", lambda: chart(
+        [
+            {"type": "scatter", "name": "Reports", "x": weeks, "y": conversations, "mode": "lines+markers", "line": {"color": "#5e4a7a", "width": 2}, "marker": {"size": 8}},
+            {"type": "scatter", "name": "Open", "x": weeks, "y": hot_leads, "mode": "lines+markers", "line": {"color": "#10b981", "width": 2}, "marker": {"size": 8}},
         ],
-        layout=go.Layout(
-            title="Weekly trends",
-            margin=dict(l=20, r=20, t=36, b=20),
-            legend=dict(orientation="h", y=1.02, x=0),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=220,
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
-    )
+        "Weekly trends", 220, (20, 20, 36, 20),
+        legend={"orientation": "h", "y": 1.02, "x": 0}, plot_bgcolor=CLEAR, yaxis=dict(GRID),
+    ))
 
     # Reports by risk level (replaces Bot vs Human)
     risk_labels = ["Low", "Medium", "High", "Critical"]
     risk_values = [42, 28, 18, 12]
-    risk_level_fig = go.Figure(
-        data=[
-            go.Bar(
-                x=risk_labels,
-                y=risk_values,
-                marker_color=["#10b981", "#3b82f6", "#f59e0b", "#ef4444"],
-            ),
-        ],
-        layout=go.Layout(
-            title="Reports by risk level",
-            margin=dict(l=20, r=20, t=36, b=50),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=200,
-            yaxis=dict(gridcolor="rgba(0,0,0,0.06)"),
-        ),
+    risk_level_fig = FIGURES.get(
+        "dashboard-risk",
+        lambda: bars("Reports by risk level", risk_labels, risk_values, ["#10b981", "#3b82f6", "#f59e0b", "#ef4444"], height=200, values=False),
     )
     # Alias so any reference to the old chart name still works
     bot_human = risk_level_fig
@@ -2165,18 +1982,9 @@ def dashboard_page():
     # Response time distribution
     resp_labels = ["< 1 day", "1–2 days", "2–5 days", "> 5 days"]
     resp_values = [48, 28, 16, 8]
-    resp_dist = go.Figure(
-        data=[
-            go.Bar(x=resp_labels, y=resp_values, marker_color=["#10b981", "#3b82f6", "#f59e0b", "#94a3b8"]),
-        ],
-        layout=go.Layout(
-            title="Time to triage",
-            margin=dict(l=20, r=20, t=36, b=60),
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(size=11),
-            height=200,
-        ),
+    resp_dist = FIGURES.get(
+        "dashboard-triage-time",
+        lambda: bars("Time to triage", resp_labels, resp_values, ["#10b981", "#3b82f6", "#f59e0b", "#94a3b8"], height=200, bottom=60, values=False, grid=False),
     )
 
     return html.Div(
@@ -2498,6 +2306,8 @@ def _admin_section_system():
     fields = [
         ("Application name", "HIRS – Hazard Identification & Reporting System"),
         ("Audit log retention", "365 days"),
+        ("Archive closed reports after", f"{ARCHIVE_AFTER_DAYS} days"),
+        ("Report retention", f"{RETENTION_YEARS} years (archived reports are purged after this)"),
         ("Time zone", "UTC"),
         ("Session timeout", "8 hours"),
     ]
@@ -2509,6 +2319,33 @@ def _admin_section_system():
     )
 
 
+def _import_status_text(status):
+    """One-line summary of the last bulk import (shared by every worker via the status file)."""
+    if not status:
+        return html.Span("No import has been run yet.", className="admin-card-desc")
+    lines = [html.Div(f"{status['path']}: {status['state']} – {status['summary']}", className="admin-toast-msg")]
+    lines += [html.Div(e, className="admin-card-desc") for e in status.get("errors", [])]
+    return lines
+
+
+def _admin_section_data():
+    """Data management: bulk import of historical hazard reports."""
+    import_body = [
+        html.P(
+            f"CSV or JSONL file in the server's import folder, {IMPORT_DIR} (one report per row: title, category, subcategory, status, station, area, created_at, likelihood, severity …). "
+            "Rows are validated against the taxonomy and risk matrix and imported in batches.",
+            className="admin-inline-list",
+        ),
+        dcc.Input(id="admin-import-path", type="text", placeholder="history-2019-2025.csv", className="form-input"),
+        html.Div(_import_status_text(load_import_status()), id="admin-import-status"),
+        dcc.Interval(id="admin-import-poll", interval=2000),
+    ]
+    return html.Div(
+        [_admin_card("Import historical reports", "📥", "Migrate past ramp-safety reports into HIRS. Each row gets a new HZ- ID; the source ID is kept as legacy ID.", import_body, "Start import", "admin-import-btn")],
+        className="admin-section-content",
+    )
+
+
 ADMIN_SECTIONS = {
     "users": _admin_section_users,
     "stations": _admin_section_stations,
@@ -2517,6 +2354,7 @@ ADMIN_SECTIONS = {
     "risk": _admin_section_risk,
     "capa": _admin_section_capa,
     "system": _admin_section_system,
+    "data": _admin_section_data,
 }
 
 ADMIN_NAV_ITEMS = [
@@ -2527,6 +2365,7 @@ ADMIN_NAV_ITEMS = [
     ("risk", "⚠️", "Risk matrix & escalation"),
     ("capa", "📌", "CAPA settings"),
     ("system", "⚙️", "System"),
+    ("data", "🗄️", "Data management"),
 ]
 
 
@@ -2582,6 +2421,46 @@ def admin_page():
     )
 
 
+def requirements_page():
+    return html.Div(
+        [
+            html.Div(
+                [html.H2("Requirements", className="page-title")],
+                className="page-header",
+            ),
+            requirements_document(),
+        ]
+    )
+
+
+# Pages built from config alone: built once, sent as stored JSON with an ETag (static_pages.py)
+STATIC_PAGES = StaticPages()
+STATIC_PAGES.register("requirements", requirements_page)
+STATIC_PAGES.register("reference", reference_page)
+STATIC_PAGES.register("exports", exports_page)
+STATIC_PAGES.register("admin", admin_page)
+if STATIC_PAGE_CACHE:
+    STATIC_PAGES.rebuild()
+
+
+@server.route(app.config.routes_pathname_prefix + "_hirs/pages/<name>.json")
+def static_page_json(name):
+    """A static page's component JSON. Revalidated on every visit (no-cache): if the browser's copy
+    carries the current ETag the answer is an empty 304."""
+    if not STATIC_PAGE_CACHE or name not in STATIC_PAGES:
+        flask.abort(404)
+    etag, body = STATIC_PAGES.get(name)
+    response = flask.Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(flask.request)
+
+
+def _static_page(name):
+    """Placeholder the static page's JSON is loaded into, in the browser."""
+    return html.Div([dcc.Store(id="static-page-name", data=name), html.Div(id="static-page-body")])
+
+
 def page_for_path(pathname: str):
     name = (pathname or "/dashboard").lstrip("/") or "dashboard"
     valid_names = {n for n, _, _ in SIDEBAR_ITEMS}
@@ -2589,20 +2468,14 @@ def page_for_path(pathname: str):
         name = "report"
     title = next(label for n, _, label in SIDEBAR_ITEMS if n == name)
 
+    if STATIC_PAGE_CACHE and name in STATIC_PAGES:
+        return _static_page(name)
     if name == "report":
         return report_page()
     if name == "dashboard":
         return dashboard_page()
     if name == "requirements":
-        return html.Div(
-            [
-                html.Div(
-                    [html.H2("Requirements", className="page-title")],
-                    className="page-header",
-                ),
-                requirements_document(),
-            ]
-        )
+        return requirements_page()
     if name == "reference":
         return reference_page()
     if name == "hazards":
@@ -2842,6 +2715,60 @@ def admin_table_action_toast(*_):
     raise PreventUpdate
 
 
+def _run_import(path):
+    """Background import thread: the Admin card follows the status file, which always ends done or failed."""
+    latest = []
+
+    def progress(result):
+        latest[:] = [result]
+        result.save()
+
+    try:
+        import_file(path, STORE, IDS, progress=progress)
+    except Exception as exc:
+        log.exception("HIRS import of %s failed", path)
+        result = latest[0] if latest else ImportResult(path)
+        result.state = "failed"
+        if not result.errors or result.errors[-1] != str(exc):
+            result.errors.append(f"{type(exc).__name__}: {exc}")
+        try:
+            result.save()
+        except OSError:
+            log.exception("HIRS import status could not be written")
+
+
+@app.callback(
+    Output("admin-import-status", "children"),
+    Input("admin-import-btn", "n_clicks"),
+    State("admin-import-path", "value"),
+    prevent_initial_call=True,
+)
+def admin_start_import(n_clicks, path):
+    """Start a background bulk import of a file from the import folder."""
+    if not n_clicks:
+        raise PreventUpdate
+    name = (path or "").strip()
+    try:
+        path = import_path(name)
+    except ValueError as exc:
+        return html.Span(str(exc) if name else "Enter the name of a file in the import folder.", className="admin-toast-msg")
+    threading.Thread(target=_run_import, args=(path,), daemon=True).start()
+    return html.Span(f"Import of {name} started…", className="admin-toast-msg")
+
+
+@app.callback(
+    Output("admin-import-status", "children", allow_duplicate=True),
+    Input("admin-import-poll", "n_intervals"),
+    prevent_initial_call=True,
+)
+def admin_import_progress(_):
+    """Refresh import progress while the Data management section is open."""
+    status = load_import_status()
+    if not status:
+        raise PreventUpdate
+    return _import_status_text(status)
+
+
 @app.callback(
     Output("report-form-visible", "data"),
     Input("report-new-btn", "n_clicks"),
@@ -2876,15 +2803,15 @@ def show_hide_report_form(visible):
     Input("report-submit", "n_clicks"),
 )
 def update_report_list(pathname, n_clicks):
-    """Build the list of generated reports from dummy data + HAZARDS (newest first)."""
+    """Build the list of generated reports from dummy data + hazard store (newest first)."""
     if pathname != "/report":
         raise PreventUpdate
     # Show dummy reports first for a professional prototype, then user-submitted (newest first)
-    all_reports = list(SAMPLE_REPORTS) + list(HAZARDS)
+    all_reports = QUERIES.run("reports")
     if not all_reports:
         return html.P("No reports yet. Use the form below to submit your first report.", className="report-list-empty")
     items = []
-    for h in reversed(all_reports):  # newest first
+    for h in all_reports:  # newest first
         items.append(
             html.Div(
                 [
@@ -2907,45 +2834,220 @@ def update_report_list(pathname, n_clicks):
     return html.Div(items, className="report-list")
 
 
-@app.callback(
-    Output("hazards-list-container", "children"),
-    Input("url", "pathname"),
-    Input("hazards-filter-status", "value"),
-    Input("hazards-filter-category", "value"),
-    Input("hazards-search", "value"),
-)
-def update_hazards_list(pathname, filter_status, filter_category, search_text):
-    """Build the hazards table and footer from hardcoded sample data + HAZARDS, applying filters and search."""
-    if pathname != "/hazards":
-        raise PreventUpdate
-    # Use hardcoded sample data first so the page always looks like the reference
-    hazards = list(SAMPLE_HAZARDS) + list(HAZARDS)
-    if filter_status:
-        hazards = [h for h in hazards if h.get("status") == filter_status]
-    if filter_category:
-        hazards = [h for h in hazards if h.get("category") == filter_category]
-    if search_text and search_text.strip():
-        q = search_text.strip().lower()
-        hazards = [
-            h for h in hazards
-            if q in (h.get("id") or "").lower()
-            or q in (h.get("title") or "").lower()
-            or q in (h.get("area") or "").lower()
-            or q in (h.get("station") or "").lower()
-            or q in (h.get("category") or "").lower()
+# ---------------------------------------------------------------------------
+# List tables – Hazards, CAPA and Investigation lists share one renderer
+# ---------------------------------------------------------------------------
+def _tag(tag, children=None, **props):
+    """html.<tag>(children, **props) as the plain JSON Dash sends for it. Table rows are built this way:
+    constructing and serialising Dash components costs ~0.5 ms a row, which scrolling a long list
+    through the scroll view would pay for every block of new rows."""
+    return {"props": {"children": children, **props}, "type": tag, "namespace": "dash_html_components"}
+
+
+def _pill(value, low_values):
+    level = "hazards-risk-low" if value in low_values else "hazards-risk-high" if value in ("High", "Critical") else ""
+    return _tag("Span", value, className=f"hazards-risk-pill {level}".strip())
+
+
+# Per list: columns (header, cell content, field its header sorts by or None), the pattern-matching id prefix of its row action
+# buttons (None = plain icons) and the empty-state message
+LIST_VIEWS = {
+    "hazards": {
+        "columns": [
+            ("NAME", lambda h: h.get("title") or "—", "title"),
+            ("CATEGORY", lambda h: h.get("category") or "—", "category"),
+            ("LOCATION", lambda h: h.get("area") or h.get("station") or "—", None),
+            ("RISK", lambda h: _pill(h.get("perceived_risk") or "—", ("Low", "Moderate")), "perceived_risk"),
+            ("STATUS", lambda h: h.get("status", "—"), "status"),
+        ],
+        "actions": None,
+        "empty": "No hazards match your filters. Try adjusting filters or submit a new report.",
+    },
+    "capa": {
+        "columns": [
+            ("ACTION", lambda c: c.get("action") or "—", "action"),
+            ("TYPE", lambda c: c.get("type") or "—", None),
+            ("PRIORITY", lambda c: _pill(c.get("priority") or "—", ("Low", "Medium")), "priority"),
+            ("HAZARD", lambda c: c.get("hazard_id") or "—", None),
+            ("DUE DATE", lambda c: c.get("due_date") or "—", "due_date"),
+            ("STATUS", lambda c: c.get("status", "—"), "status"),
+        ],
+        "actions": "capa-action",
+        "empty": "No actions match your filters.",
+    },
+    "investigations": {
+        "columns": [
+            ("INVESTIGATION", lambda i: i.get("title") or "—", "title"),
+            ("HAZARD", lambda i: i.get("hazard_id") or "—", None),
+            ("STATUS", lambda i: i.get("status", "—"), "status"),
+            ("LEAD", lambda i: i.get("lead") or "—", None),
+            ("STARTED", lambda i: i.get("started") or "—", "started"),
+        ],
+        "actions": "inv-action",
+        "empty": "No investigations match your filters.",
+    },
+}
+
+
+def _row_actions(row, prefix):
+    """View / Edit / Delete cell; with a prefix the icons are buttons with pattern-matching ids."""
+    icons = (("👁", "view", "View"), ("✏️", "edit", "Edit"), ("🗑", "delete", "Delete"))
+    if prefix is None:
+        items = [_tag("Span", icon, className=f"hazards-action hazards-action-{name}", title=title) for icon, name, title in icons]
+    else:
+        items = [
+            _tag("Button", icon, id={"type": f"{prefix}-{name}", "index": row["id"]}, className=f"hazards-action hazards-action-{name}", title=title, n_clicks=0)
+            for icon, name, title in icons
+        ]
+    return _tag("Td", _tag("Div", items, className="hazards-actions-cell"), className="hazards-td-actions")
+
+
+# Rendered table rows by (list, record id, record version, stripe). A stored record revision never
+# changes, so its row is built once – as the plain JSON structure Dash sends, which encodes far
+# faster than a component tree – and a filter, search or page change only builds rows that have not
+# been shown before. Sample rows (no version) are fixed.
+_ROW_CACHE = OrderedDict()
+_ROW_CACHE_LOCK = threading.Lock()
+ROW_CACHE_STATS = {"hits": 0, "misses": 0}
+
+
+def _plain(value):
+    """A component (tree) as the dicts and lists it is sent as (cells may return components)."""
+    if isinstance(value, Component):
+        data = value.to_plotly_json()
+        return dict(data, props={k: _plain(v) for k, v in data["props"].items()})
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _list_row(name, row, odd):
+    """One table row of list `name`, from the row cache when this revision was rendered before."""
+    key = (name, row["id"], row.get("version"), odd)
+    with _ROW_CACHE_LOCK:
+        cached = _ROW_CACHE.get(key)
+        if cached is not None:
+            _ROW_CACHE.move_to_end(key)
+            ROW_CACHE_STATS["hits"] += 1
+            return cached
+        ROW_CACHE_STATS["misses"] += 1
+    view = LIST_VIEWS[name]
+    (_, name_cell, _), *columns = view["columns"]
+    cells = [_tag("Td", _plain(name_cell(row)), className="hazards-td-name")]
+    cells += [_tag("Td", _plain(cell(row))) for _, cell, _ in columns]
+    cells.append(_row_actions(row, view["actions"]))
+    rendered = _tag("Tr", cells, className="hazards-tr-odd" if odd else "hazards-tr-even")
+    with _ROW_CACHE_LOCK:
+        _ROW_CACHE[key] = rendered
+        while len(_ROW_CACHE) > LIST_ROW_CACHE_SIZE:
+            _ROW_CACHE.popitem(last=False)
+    return rendered
+
+
+def _list_pager(name):
+    """Per-list page state, placed next to the list container: the cursor and page size the table is
+    asked for ("list-page"), the page last rendered ("list-page-view", read by Prev / Next) and, in
+    scroll view, the row blocks in sight ("list-grid-window", set by assets/grid.js)."""
+    return html.Div(
+        [
+            dcc.Store(id={"type": "list-page", "list": name}, data={"size": LIST_PAGE_SIZE, "grid": LIST_GRID}),
+            dcc.Store(id={"type": "list-page-view", "list": name}, data=None),
+            dcc.Store(id={"type": "list-grid-window", "list": name}, data=None),
         ]
-    n = len(hazards)
-    # Empty state
-    if n == 0:
+    )
+
+
+def _client_filter_stores():
+    """Client-side filtering (LIST_CLIENT_FILTER) of the hazards list: the register snapshot and the
+    version it is at (kept in the browser's local storage, so a return visit only fetches changes),
+    the changes the server sends, the query handed to the server when the browser cannot answer it,
+    and what assets/snapshot.js needs to draw the table as the server would."""
+    templates = {
+        "head": _plain(_table_head("hazards", (None, False))),
+        "empty": _plain(_list_table("hazards", ())),
+        "controls": _plain(_page_controls("hazards", 0, 0, 0, LIST_PAGE_SIZE)),
+        "size": LIST_PAGE_SIZE,
+        "fuzzy": QUERIES.fuzzy,
+        "words": sorted(SpellingIndex("hazards").words),  # the taxonomy; record words come with the rows
+    }
+    return html.Div(
+        [
+            dcc.Store(id="hazards-snapshot", storage_type="local"),
+            dcc.Store(id="hazards-snapshot-version", storage_type="local"),
+            dcc.Store(id="hazards-snapshot-delta"),
+            dcc.Store(id="hazards-server-query"),
+            dcc.Store(id="hazards-client-templates", data=templates),
+            dcc.Interval(id="hazards-snapshot-poll", interval=LIST_CLIENT_REFRESH_SECONDS * 1000),
+        ]
+    )
+
+
+def _page_controls(name, start, shown, total, size, grid=False):
+    """Rows per page, Prev / Next (kept, hidden, in scroll view: the page callback listens to them) and the view toggle."""
+    return html.Div(
+        [
+            html.Div(
+                [
+                    html.Label("Rows per page", className="hazards-pager-label"),
+                    dcc.Dropdown(
+                        id={"type": "list-page-size", "list": name},
+                        options=[{"label": str(n), "value": n} for n in LIST_PAGE_SIZES],
+                        value=size,
+                        clearable=False,
+                        searchable=False,
+                        className="hazards-pager-size",
+                    ),
+                    html.Button("‹ Prev", id={"type": "list-page-prev", "list": name}, className="hazards-pager-btn", n_clicks=0, disabled=start == 0),
+                    html.Button("Next ›", id={"type": "list-page-next", "list": name}, className="hazards-pager-btn", n_clicks=0, disabled=start + shown >= total),
+                ],
+                className="hazards-pager",
+                hidden=grid,
+            ),
+            html.Button(
+                "Page view" if grid else "Scroll view",
+                id={"type": "list-grid-toggle", "list": name},
+                className="hazards-pager-btn",
+                n_clicks=0,
+                title="Show the results a page at a time" if grid else "Scroll through every result",
+            ),
+        ],
+        className="hazards-footer-right hazards-pager",
+    )
+
+
+def _header(name, label, field, sort, className=None):
+    """Column header; a sortable one is a button cycling ascending / descending / list order."""
+    if field is None:
+        return html.Th(label, className=className)
+    sorted_by, descending = sort
+    arrow = (" ▼" if descending else " ▲") if field == sorted_by else ""
+    button = html.Button(label + arrow, id={"type": "list-sort", "list": name, "field": field}, className="hazards-th-sort", n_clicks=0)
+    return html.Th(button, className=className, **{"aria-sort": ("descending" if descending else "ascending") if field == sorted_by else "none"})
+
+
+def _table_head(name, sort):
+    """Header row of a list table with rows (the name column styled apart)."""
+    (label, _, field), *columns = LIST_VIEWS[name]["columns"]
+    headers = [_header(name, label, field, sort, className="hazards-th-name")]
+    headers += [_header(name, label, field, sort) for label, _, field in columns] + [html.Th("ACTIONS")]
+    return html.Thead(html.Tr(headers))
+
+
+def _list_table(name, rows, error=None, start=0, total=None, size=LIST_PAGE_SIZE, sort=(None, False)):
+    """Table and footer for one page of a list: `rows` are the page (already in display order) starting
+    at position `start` of `total` results, `sort` the (field, descending) it is ordered by. Or the
+    query error instead."""
+    view = LIST_VIEWS[name]
+    n = len(rows)
+    total = n if total is None else total
+    if n == 0 or error:
+        headers = [_header(name, label, field, sort) for label, _, field in view["columns"]] + [html.Th("ACTIONS")]
         return html.Div(
             [
-                html.Table(
-                    [html.Thead(html.Tr([html.Th(c) for c in ["NAME", "CATEGORY", "LOCATION", "RISK", "STATUS", "ACTIONS"]])), html.Tbody([])],
-                    className="hazards-table",
-                ),
+                html.Table([html.Thead(html.Tr(headers)), html.Tbody([])], className="hazards-table"),
                 html.Div(
                     [
-                        html.Span("No hazards match your filters. Try adjusting filters or submit a new report.", className="hazards-footer-left"),
+                        html.Span(error, className="hazards-footer-left hazards-query-error") if error else html.Span(view["empty"], className="hazards-footer-left"),
                         html.Span("No data", className="hazards-footer-right"),
                     ],
                     className="hazards-footer",
@@ -2953,177 +3055,325 @@ def update_hazards_list(pathname, filter_status, filter_category, search_text):
             ],
             className="hazards-table-block",
         )
-    # Table header
-    thead = html.Thead(
-        html.Tr(
-            [
-                html.Th("NAME", className="hazards-th-name"),
-                html.Th("CATEGORY"),
-                html.Th("LOCATION"),
-                html.Th("RISK"),
-                html.Th("STATUS"),
-                html.Th("ACTIONS"),
-            ]
-        )
-    )
-    rows = []
-    for i, h in enumerate(reversed(hazards)):
-        risk = h.get("perceived_risk") or "—"
-        risk_class = "hazards-risk-low" if risk in ("Low", "Moderate") else "hazards-risk-high" if risk in ("High", "Critical") else ""
-        row_class = "hazards-tr-even" if i % 2 == 0 else "hazards-tr-odd"
-        location = h.get("area") or h.get("station") or "—"
-        actions = html.Td(
-            html.Div(
-                [
-                    html.Span("👁", className="hazards-action hazards-action-view", title="View"),
-                    html.Span("✏️", className="hazards-action hazards-action-edit", title="Edit"),
-                    html.Span("🗑", className="hazards-action hazards-action-delete", title="Delete"),
-                ],
-                className="hazards-actions-cell",
-            ),
-            className="hazards-td-actions",
-        )
-        rows.append(
-            html.Tr(
-                [
-                    html.Td(h.get("title") or "—", className="hazards-td-name"),
-                    html.Td(h.get("category") or "—"),
-                    html.Td(location),
-                    html.Td(html.Span(risk, className=f"hazards-risk-pill {risk_class}".strip())),
-                    html.Td(h.get("status", "—")),
-                    actions,
-                ],
-                className=row_class,
-            )
-        )
-    tbody = html.Tbody(rows)
-    table = html.Table([thead, tbody], className="hazards-table")
+    body = [_list_row(name, row, i % 2 == 1) for i, row in enumerate(rows)]
+    table = html.Table([_table_head(name, sort), html.Tbody(body)], className="hazards-table")
     footer = html.Div(
         [
-            html.Span(f"Showing 1 to {n} of {n} results.", className="hazards-footer-left"),
-            html.Span("All data displayed.", className="hazards-footer-right"),
+            html.Span(f"Showing {start + 1:,} to {start + n:,} of {total:,} results.", className="hazards-footer-left"),
+            _page_controls(name, start, n, total, size),
         ],
         className="hazards-footer",
     )
     return html.Div([table, footer], className="hazards-table-block")
 
 
+def _grid_window(name, rows, first=0, last=0):
+    """Table body for scroll view: the rows of blocks first-1 .. last+1 (LIST_GRID_BLOCK rows each)
+    between two spacer rows standing in for the rest, so the scrollbar spans the whole result."""
+    columns = len(LIST_VIEWS[name]["columns"]) + 1
+    low = max(0, first - 1) * LIST_GRID_BLOCK
+    high = min(len(rows), (last + 2) * LIST_GRID_BLOCK)
+    low = min(low, high)
+    body = [_list_row(name, row, i % 2 == 1) for i, row in enumerate(rows[low:high], start=low)]
+    if low:
+        body.insert(0, html.Tr(html.Td(colSpan=columns), className="hazards-grid-spacer", style={"height": f"{low * LIST_GRID_ROW_PX}px"}))
+    if high < len(rows):
+        body.append(html.Tr(html.Td(colSpan=columns), className="hazards-grid-spacer", style={"height": f"{(len(rows) - high) * LIST_GRID_ROW_PX}px"}))
+    return body
+
+
+def _grid_table(name, rows, sort, size, key):
+    """Scroll view of a whole result: a fixed-height viewport over a table whose body holds only the
+    rows in sight. assets/grid.js reports the blocks scrolled to and list_grid_window() sends them.
+    `key` identifies the query: when it changes, grid.js scrolls the new result back to the top."""
+    table = html.Table(
+        [_table_head(name, sort), html.Tbody(_grid_window(name, rows), id={"type": "list-grid-body", "list": name})],
+        className="hazards-table hazards-grid-table",
+    )
+    viewport = html.Div(
+        table,
+        className="hazards-grid",
+        **{"data-list": name, "data-key": key, "data-row-height": LIST_GRID_ROW_PX, "data-block": LIST_GRID_BLOCK},
+    )
+    footer = html.Div(
+        [
+            html.Span(f"{len(rows):,} results – scroll to browse.", className="hazards-footer-left"),
+            _page_controls(name, 0, len(rows), len(rows), size, grid=True),
+        ],
+        className="hazards-footer",
+    )
+    return html.Div([viewport, footer], className="hazards-table-block")
+
+
+def _archived_hazards(spec):
+    """Archived hazards for "Include archived": every match, listed (and paged) after the live ones,
+    newest month first. The cold tier has no indexes: query-syntax terms are checked on each archived row. `spec` is JSON
+    (it is kept in the page view for scroll view), so filter values arrive as lists."""
+    archived = search_archive(spec["text"], status=spec["status"], category=spec["category"])
+    filters = {f: tuple(v) if isinstance(v, list) else v for f, v in spec["filters"].items()}
+    if filters or spec["ranges"]:
+        archived = [h for h in archived if row_matches(h, "", filters, (), spec["ranges"])]
+    return archived
+
+
+def _search_ticket(store_id, name, request):
+    """(session, list, number) of the search request that fired a list callback, or None if something
+    else fired it. Raises PreventUpdate if a newer request from the same tab is already known."""
+    request = request or {}
+    if callback_context.triggered_id != store_id or not request.get("session"):
+        return None
+    ticket = (str(request["session"]), name, int(request.get("seq") or 0))
+    if not SEQUENCER.begin(*ticket):
+        raise PreventUpdate
+    return ticket
+
+
+def _latest(ticket, result):
+    """`result`, unless a newer search request from the same tab arrived while it was computed."""
+    if ticket is not None and not SEQUENCER.finish(*ticket):
+        raise PreventUpdate
+    return result
+
+
+def _page_sort(page):
+    return (page or {}).get("sort"), bool((page or {}).get("desc"))
+
+
+def _grid_rows(name, view):
+    """The whole result a scroll view shows, from the query kept in its page view (cached results)."""
+    query, field, descending = view["query"], view["sort"], view["desc"]
+    args = dict(text=query["text"], as_of=query["as_of"], ranges=query["ranges"], **query["filters"])
+    if not view.get("archived"):
+        return QUERIES.ordered(name, field, descending, **args)
+    rows = QUERIES.run(name, **args) + tuple(_archived_hazards(view["archived"]))
+    return sort_rows(rows, field, descending) if field else rows
+
+
+def _paged_list(name, page, query, as_of=None, archived=None, paging=None):
+    """(table, page view) for the page of a compiled list query the list's page store asks for, in
+    list order or by the sorted column – or, in scroll view, the whole result. `archived` (a spec for
+    _archived_hazards) adds archived hazards after the query's rows. Any other input – a filter,
+    the search box, navigating to the page – starts from the first page. `paging` says whether the
+    page store fired the callback (default: callback_context), for queries forwarded by the browser."""
+    page = page or {}
+    size = page.get("size") or LIST_PAGE_SIZE
+    field, descending = _page_sort(page)
+    if page.get("grid"):
+        view = {"grid": True, "size": size, "sort": field, "desc": descending, "archived": archived,
+                "query": dict(query, as_of=as_of)}
+        rows = _grid_rows(name, view)
+        if not rows:
+            return _list_table(name, (), sort=(field, descending)), view
+        key = json.dumps([view["query"], field, descending, archived], sort_keys=True)
+        return _grid_table(name, rows, (field, descending), size, key), view
+    extra = _archived_hazards(archived) if archived else ()
+    if paging is None:
+        paging = callback_context.triggered_id == {"type": "list-page", "list": name}
+    cursor = page if paging else None
+    if cursor is not None and "after" not in cursor and "before" not in cursor:
+        cursor = None
+    args = dict(text=query["text"], as_of=as_of, ranges=query["ranges"], **query["filters"])
+    if field and not extra:
+        start, shown, total = QUERIES.sorted_page(name, field, descending, cursor, size, **args)
+    else:
+        # List order (a cached result), or a sort over rows the sort indexes do not hold
+        rows = QUERIES.run(name, **args) + tuple(extra)
+        if field:
+            rows = sort_rows(rows, field, descending)
+        start, shown = QUERIES.page(rows, cursor, size)
+        total = len(rows)
+    view = None
+    if shown:
+        first, last = shown[0], shown[-1]
+        view = {"first": first["id"], "last": last["id"], "start": start, "end": start + len(shown), "size": size, "sort": field, "desc": descending, "grid": False}
+        if field:
+            view["first_key"], view["last_key"] = sort_key(field, first.get(field)), sort_key(field, last.get(field))
+    return _list_table(name, shown, start=start, total=total, size=size, sort=(field, descending)), view
+
+
+@app.callback(
+    Output({"type": "list-page", "list": MATCH}, "data"),
+    Input({"type": "list-page-prev", "list": MATCH}, "n_clicks"),
+    Input({"type": "list-page-next", "list": MATCH}, "n_clicks"),
+    Input({"type": "list-page-size", "list": MATCH}, "value"),
+    Input({"type": "list-grid-toggle", "list": MATCH}, "n_clicks"),
+    State({"type": "list-page-view", "list": MATCH}, "data"),
+    prevent_initial_call=True,
+)
+def list_page_nav(prev_clicks, next_clicks, size, toggles, view):
+    """Prev / Next / rows per page: a keyset cursor on the first or last row shown, for the list
+    callback. The view toggle switches between pages and scroll view, from the top."""
+    trigger = callback_context.triggered_id
+    if not view or not trigger:
+        raise PreventUpdate
+    page = {"size": view["size"], "sort": view["sort"], "desc": view["desc"], "grid": view.get("grid", False)}
+    if trigger["type"] == "list-grid-toggle":
+        if not toggles:
+            raise PreventUpdate
+        page["grid"] = not page["grid"]
+    elif trigger["type"] == "list-page-size":
+        page["size"] = size
+    elif trigger["type"] == "list-page-prev" and prev_clicks:
+        page.update({"before": view["first"], "key": view.get("first_key"), "at": view["start"]})
+    elif trigger["type"] == "list-page-next" and next_clicks:
+        page.update({"after": view["last"], "key": view.get("last_key"), "at": view["end"] - 1})
+    else:
+        raise PreventUpdate
+    return page
+
+
+@app.callback(
+    Output({"type": "list-page", "list": MATCH}, "data", allow_duplicate=True),
+    Input({"type": "list-sort", "list": MATCH, "field": ALL}, "n_clicks"),
+    State({"type": "list-page", "list": MATCH}, "data"),
+    prevent_initial_call=True,
+)
+def list_sort(clicks, page):
+    """A sortable header: ascending, then descending, then back to list order – from the first page."""
+    trigger = callback_context.triggered_id
+    if not trigger or not any(clicks):
+        raise PreventUpdate
+    page = page or {}
+    field, descending = page.get("sort"), page.get("desc")
+    if field != trigger["field"]:
+        field, descending = trigger["field"], False
+    elif not descending:
+        descending = True
+    else:
+        field, descending = None, False
+    return {"size": page.get("size") or LIST_PAGE_SIZE, "sort": field, "desc": descending, "grid": bool(page.get("grid"))}
+
+
+@app.callback(
+    Output({"type": "list-grid-body", "list": MATCH}, "children"),
+    Input({"type": "list-grid-window", "list": MATCH}, "data"),
+    State({"type": "list-page-view", "list": MATCH}, "data"),
+    prevent_initial_call=True,
+)
+def list_grid_window(window, view):
+    """Scroll view: the row blocks scrolled into sight (first / last block index, from assets/grid.js)."""
+    if not window or not view or not view.get("grid"):
+        raise PreventUpdate
+    name = callback_context.triggered_id["list"]
+    first, last = max(0, int(window.get("first") or 0)), max(0, int(window.get("last") or 0))
+    return _grid_window(name, _grid_rows(name, view), first, max(first, last))
+
+
+_HAZARDS_LIST = (
+    Output("hazards-list-container", "children"),
+    Output({"type": "list-page-view", "list": "hazards"}, "data"),
+)
+_HAZARDS_LIST_INPUTS = (
+    Input("url", "pathname"),
+    Input("hazards-filter-status", "value"),
+    Input("hazards-filter-category", "value"),
+    Input("hazards-search-request", "data"),
+    Input("hazards-include-archived", "value"),
+    Input("hazards-as-of", "date"),
+    Input({"type": "list-page", "list": "hazards"}, "data"),
+)
+
+
+def update_hazards_list(pathname, filter_status, filter_category, search_request, include_archived=None, as_of_date=None, page=None):
+    """Build one page of the hazards table and its footer from hardcoded sample data + hazard store, applying
+    filters and search. Archived (cold) reports are only read when "Include archived" is ticked; "As of"
+    shows a past snapshot."""
+    if pathname != "/hazards":
+        raise PreventUpdate
+    ticket = _search_ticket("hazards-search-request", "hazards", search_request)
+    search_text = (search_request or {}).get("text")
+    return _latest(ticket, _hazards_list(filter_status, filter_category, search_text, include_archived, as_of_date, page))
+
+
+def _hazards_list(filter_status, filter_category, search_text, include_archived, as_of_date, page, paging=None):
+    try:
+        query = QUERIES.compile("hazards", search_text, status=filter_status, category=filter_category)
+        parsed = QUERIES.parse("hazards", search_text)
+    except QuerySyntaxError as exc:
+        return _list_table("hazards", (), error=str(exc), sort=_page_sort(page)), None
+    archived = None
+    if include_archived:
+        archived = {"text": parsed["text"], "status": filter_status or None, "category": filter_category or None,
+                    "filters": parsed["filters"], "ranges": parsed["ranges"]}
+    return _paged_list("hazards", page, query, as_of=_as_of(as_of_date), archived=archived, paging=paging)
+
+
+def forwarded_hazards_list(query):
+    """Client-side filtering: a hazards query the browser could not answer from its snapshot (see
+    filterHazards in assets/snapshot.js). Numbered per tab like search requests."""
+    if not query:
+        raise PreventUpdate
+    ticket = _search_ticket("hazards-server-query", "hazards", query)
+    return _latest(ticket, _hazards_list(query["status"], query["category"], query["text"], query["archived"],
+                                         query["as_of"], query["page"], paging=bool(query["paging"])))
+
+
+def hazards_snapshot(pathname, _, known):
+    """Client-side filtering: the changes since the snapshot the browser holds (snapshots.py), on
+    opening the hazards page and every LIST_CLIENT_REFRESH_SECONDS while it is open."""
+    if pathname != "/hazards":
+        raise PreventUpdate
+    since = known.get("version") if known and known.get("format") == SNAPSHOT_FORMAT else None
+    delta = snapshot_delta(STORE, since, SAMPLE_HAZARDS, max_rows=LIST_CLIENT_FILTER_MAX_ROWS)
+    if delta is None:
+        raise PreventUpdate
+    return delta
+
+
+if not LIST_CLIENT_FILTER:
+    app.callback(*_HAZARDS_LIST, *_HAZARDS_LIST_INPUTS)(update_hazards_list)
+else:
+    # The browser filters the snapshot itself and forwards only what it cannot answer
+    app.clientside_callback(
+        ClientsideFunction("hirs", "filterHazards"),
+        *_HAZARDS_LIST,
+        Output("hazards-server-query", "data"),
+        *_HAZARDS_LIST_INPUTS,
+        Input("hazards-snapshot", "data"),
+        State("hazards-client-templates", "data"),
+        State({"type": "list-page-view", "list": "hazards"}, "data"),
+        State("hazards-server-query", "data"),
+    )
+    app.callback(
+        *(Output(o.component_id, o.component_property, allow_duplicate=True) for o in _HAZARDS_LIST),
+        Input("hazards-server-query", "data"),
+        prevent_initial_call=True,
+    )(forwarded_hazards_list)
+    app.callback(
+        Output("hazards-snapshot-delta", "data"),
+        Input("url", "pathname"),
+        Input("hazards-snapshot-poll", "n_intervals"),
+        State("hazards-snapshot-version", "data"),
+    )(hazards_snapshot)
+    app.clientside_callback(
+        ClientsideFunction("hirs", "mergeSnapshot"),
+        Output("hazards-snapshot", "data"),
+        Output("hazards-snapshot-version", "data"),
+        Input("hazards-snapshot-delta", "data"),
+        State("hazards-snapshot", "data"),
+    )
+
+
 @app.callback(
     Output("capa-list-container", "children"),
+    Output({"type": "list-page-view", "list": "capa"}, "data"),
     Input("url", "pathname"),
     Input("capa-filter-type", "value"),
     Input("capa-filter-priority", "value"),
-    Input("capa-search", "value"),
+    Input("capa-search-request", "data"),
+    Input("capa-as-of", "date"),
+    Input({"type": "list-page", "list": "capa"}, "data"),
 )
-def update_capa_list(pathname, filter_type, filter_priority, search_text):
-    """Build the CAPA table and footer from SAMPLE_CAPA, applying filters and search."""
+def update_capa_list(pathname, filter_type, filter_priority, search_request, as_of_date=None, page=None):
+    """Build one page of the CAPA table and its footer from SAMPLE_CAPA + stored actions, applying filters and search."""
     if pathname != "/capa":
         raise PreventUpdate
-    capas = list(SAMPLE_CAPA)
-    if filter_type:
-        capas = [c for c in capas if c.get("type") == filter_type]
-    if filter_priority:
-        capas = [c for c in capas if c.get("priority") == filter_priority]
-    if search_text and search_text.strip():
-        q = search_text.strip().lower()
-        capas = [
-            c for c in capas
-            if q in (c.get("action") or "").lower()
-            or q in (c.get("id") or "").lower()
-            or q in (c.get("hazard_id") or "").lower()
-        ]
-    n = len(capas)
-    if n == 0:
-        return html.Div(
-            [
-                html.Table(
-                    [
-                        html.Thead(html.Tr([html.Th(x) for x in ["ACTION", "TYPE", "PRIORITY", "HAZARD", "DUE DATE", "STATUS", "ACTIONS"]])),
-                        html.Tbody([]),
-                    ],
-                    className="hazards-table",
-                ),
-                html.Div(
-                    [
-                        html.Span("No actions match your filters.", className="hazards-footer-left"),
-                        html.Span("No data", className="hazards-footer-right"),
-                    ],
-                    className="hazards-footer",
-                ),
-            ],
-            className="hazards-table-block",
-        )
-    thead = html.Thead(
-        html.Tr(
-            [
-                html.Th("ACTION", className="hazards-th-name"),
-                html.Th("TYPE"),
-                html.Th("PRIORITY"),
-                html.Th("HAZARD"),
-                html.Th("DUE DATE"),
-                html.Th("STATUS"),
-                html.Th("ACTIONS"),
-            ]
-        )
-    )
-    rows = []
-    for i, c in enumerate(capas):
-        row_class = "hazards-tr-even" if i % 2 == 0 else "hazards-tr-odd"
-        priority = c.get("priority") or "—"
-        p_class = "hazards-risk-low" if priority in ("Low", "Medium") else "hazards-risk-high" if priority in ("High", "Critical") else ""
-        actions_cell = html.Td(
-            html.Div(
-                [
-                    html.Button(
-                        "👁",
-                        id={"type": "capa-action-view", "index": c["id"]},
-                        className="hazards-action hazards-action-view",
-                        title="View",
-                        n_clicks=0,
-                    ),
-                    html.Button(
-                        "✏️",
-                        id={"type": "capa-action-edit", "index": c["id"]},
-                        className="hazards-action hazards-action-edit",
-                        title="Edit",
-                        n_clicks=0,
-                    ),
-                    html.Button(
-                        "🗑",
-                        id={"type": "capa-action-delete", "index": c["id"]},
-                        className="hazards-action hazards-action-delete",
-                        title="Delete",
-                        n_clicks=0,
-                    ),
-                ],
-                className="hazards-actions-cell",
-            ),
-            className="hazards-td-actions",
-        )
-        rows.append(
-            html.Tr(
-                [
-                    html.Td(c.get("action") or "—", className="hazards-td-name"),
-                    html.Td(c.get("type") or "—"),
-                    html.Td(html.Span(priority, className=f"hazards-risk-pill {p_class}".strip())),
-                    html.Td(c.get("hazard_id") or "—"),
-                    html.Td(c.get("due_date") or "—"),
-                    html.Td(c.get("status", "—")),
-                    actions_cell,
-                ],
-                className=row_class,
-            )
-        )
-    tbody = html.Tbody(rows)
-    table = html.Table([thead, tbody], className="hazards-table")
-    footer = html.Div(
-        [
-            html.Span(f"Showing 1 to {n} of {n} results.", className="hazards-footer-left"),
-            html.Span("All data displayed.", className="hazards-footer-right"),
-        ],
-        className="hazards-footer",
-    )
-    return html.Div([table, footer], className="hazards-table-block")
+    ticket = _search_ticket("capa-search-request", "capa", search_request)
+    try:
+        query = QUERIES.compile("capa", (search_request or {}).get("text"), type=filter_type, priority=filter_priority)
+    except QuerySyntaxError as exc:
+        return _latest(ticket, (_list_table("capa", (), error=str(exc), sort=_page_sort(page)), None))
+    return _latest(ticket, _paged_list("capa", page, query, as_of=_as_of(as_of_date)))
 
 
 @app.callback(
@@ -3193,9 +3443,8 @@ def inv_action_click(*_):
     Input("export-capa-excel", "n_clicks"),
     Input("export-inv-pdf", "n_clicks"),
     Input("export-inv-csv", "n_clicks"),
-    Input("export-audit-csv", "n_clicks"),
 )
-def export_button_click(h_csv, h_excel, h_pdf, c_csv, c_excel, i_pdf, i_csv, audit_csv):
+def export_button_click(h_csv, h_excel, h_pdf, c_csv, c_excel, i_pdf, i_csv):
     """Show feedback when an export button is clicked (demo – no file generated)."""
     if not callback_context.triggered:
         raise PreventUpdate
@@ -3208,122 +3457,77 @@ def export_button_click(h_csv, h_excel, h_pdf, c_csv, c_excel, i_pdf, i_csv, aud
         "export-capa-excel": "CAPA actions → Excel",
         "export-inv-pdf": "Investigations → PDF",
         "export-inv-csv": "Investigations → CSV",
-        "export-audit-csv": "Audit trail → CSV",
     }
     label = labels.get(trigger_id, "Export")
     return html.Span(f"Export requested: {label} (demo – file not generated)", className="export-toast-msg")
 
 
+@app.callback(
+    Output("export-audit-download", "data"),
+    Output("export-toast", "children", allow_duplicate=True),
+    Input("export-audit-csv", "n_clicks"),
+    prevent_initial_call=True,
+)
+def export_audit_csv(n_clicks):
+    """Audit trail → CSV: every entry with its chain hashes and Merkle inclusion proof, so the file can be re-verified offline."""
+    if not n_clicks:
+        raise PreventUpdate
+    entries = list(AUDIT.entries())
+    filename = f"hirs-audit-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.csv"
+    toast = html.Span(f"Audit trail exported: {len(entries):,} entries.", className="export-toast-msg")
+    return dcc.send_string(audit_to_csv(entries, AUDIT.proofs(entries)), filename), toast
+
+
 @app.callback(
     Output("investigation-list-container", "children"),
+    Output({"type": "list-page-view", "list": "investigations"}, "data"),
     Input("url", "pathname"),
     Input("investigation-filter-status", "value"),
-    Input("investigation-search", "value"),
+    Input("investigation-search-request", "data"),
+    Input("investigation-as-of", "date"),
+    Input({"type": "list-page", "list": "investigations"}, "data"),
 )
-def update_investigation_list(pathname, filter_status, search_text):
-    """Build the investigation table and footer from SAMPLE_INVESTIGATIONS."""
+def update_investigation_list(pathname, filter_status, search_request, as_of_date=None, page=None):
+    """Build one page of the investigation table and its footer from SAMPLE_INVESTIGATIONS + stored investigations."""
     if pathname != "/investigation":
         raise PreventUpdate
-    invs = list(SAMPLE_INVESTIGATIONS)
-    if filter_status:
-        invs = [i for i in invs if i.get("status") == filter_status]
-    if search_text and search_text.strip():
-        q = search_text.strip().lower()
-        invs = [
-            i for i in invs
-            if q in (i.get("title") or "").lower()
-            or q in (i.get("id") or "").lower()
-            or q in (i.get("hazard_id") or "").lower()
-            or q in (i.get("lead") or "").lower()
-        ]
-    n = len(invs)
-    if n == 0:
-        return html.Div(
-            [
-                html.Table(
-                    [
-                        html.Thead(html.Tr([html.Th(x) for x in ["INVESTIGATION", "HAZARD", "STATUS", "LEAD", "STARTED", "ACTIONS"]])),
-                        html.Tbody([]),
-                    ],
-                    className="hazards-table",
-                ),
-                html.Div(
-                    [
-                        html.Span("No investigations match your filters.", className="hazards-footer-left"),
-                        html.Span("No data", className="hazards-footer-right"),
-                    ],
-                    className="hazards-footer",
-                ),
-            ],
-            className="hazards-table-block",
-        )
-    thead = html.Thead(
-        html.Tr(
-            [
-                html.Th("INVESTIGATION", className="hazards-th-name"),
-                html.Th("HAZARD"),
-                html.Th("STATUS"),
-                html.Th("LEAD"),
-                html.Th("STARTED"),
-                html.Th("ACTIONS"),
-            ]
-        )
-    )
-    rows = []
-    for i, inv in enumerate(invs):
-        row_class = "hazards-tr-even" if i % 2 == 0 else "hazards-tr-odd"
-        actions_cell = html.Td(
-            html.Div(
-                [
-                    html.Button(
-                        "👁",
-                        id={"type": "inv-action-view", "index": inv["id"]},
-                        className="hazards-action hazards-action-view",
-                        title="View",
-                        n_clicks=0,
-                    ),
-                    html.Button(
-                        "✏️",
-                        id={"type": "inv-action-edit", "index": inv["id"]},
-                        className="hazards-action hazards-action-edit",
-                        title="Edit",
-                        n_clicks=0,
-                    ),
-                    html.Button(
-                        "🗑",
-                        id={"type": "inv-action-delete", "index": inv["id"]},
-                        className="hazards-action hazards-action-delete",
-                        title="Delete",
-                        n_clicks=0,
-                    ),
-                ],
-                className="hazards-actions-cell",
-            ),
-            className="hazards-td-actions",
-        )
-        rows.append(
-            html.Tr(
-                [
-                    html.Td(inv.get("title") or "—", className="hazards-td-name"),
-                    html.Td(inv.get("hazard_id") or "—"),
-                    html.Td(inv.get("status", "—")),
-                    html.Td(inv.get("lead") or "—"),
-                    html.Td(inv.get("started") or "—"),
-                    actions_cell,
-                ],
-                className=row_class,
-            )
-        )
-    tbody = html.Tbody(rows)
-    table = html.Table([thead, tbody], className="hazards-table")
-    footer = html.Div(
-        [
-            html.Span(f"Showing 1 to {n} of {n} results.", className="hazards-footer-left"),
-            html.Span("All data displayed.", className="hazards-footer-right"),
-        ],
-        className="hazards-footer",
+    ticket = _search_ticket("investigation-search-request", "investigations", search_request)
+    try:
+        query = QUERIES.compile("investigations", (search_request or {}).get("text"), status=filter_status)
+    except QuerySyntaxError as exc:
+        return _latest(ticket, (_list_table("investigations", (), error=str(exc), sort=_page_sort(page)), None))
+    return _latest(ticket, _paged_list("investigations", page, query, as_of=_as_of(as_of_date)))
+
+
+# Each search box numbers the requests it sends (per tab): the list callbacks drop superseded ones
+for _search_id in ("hazards-search", "capa-search", "investigation-search"):
+    app.clientside_callback(
+        """
+        function(value, previous) {
+            previous = previous || {};
+            var session = previous.session || (Date.now().toString(36) + Math.random().toString(36).slice(2));
+            return {session: session, seq: (previous.seq || 0) + 1, text: value || ""};
+        }
+        """,
+        Output(f"{_search_id}-request", "data"),
+        Input(_search_id, "value"),
+        State(f"{_search_id}-request", "data"),
     )
-    return html.Div([table, footer], className="hazards-table-block")
+
+
+app.clientside_callback(
+    """
+    function(name) {
+        if (!name) return window.dash_clientside.no_update;
+        var config = JSON.parse(document.getElementById("_dash-config").textContent);
+        // no-cache: the browser revalidates its copy with the ETag, an unchanged page comes back as a 304
+        return fetch(config.requests_pathname_prefix + "_hirs/pages/" + name + ".json", {cache: "no-cache", credentials: "same-origin"})
+            .then(function (response) { return response.json(); });
+    }
+    """,
+    Output("static-page-body", "children"),
+    Input("static-page-name", "data"),
+)
 
 
 app.clientside_callback(
@@ -3358,6 +3562,7 @@ app.clientside_callback(
     State("reporter-name", "value"),
     State("reporter-dept", "value"),
     State("reporter-role", "value"),
+    State("auth-store", "data"),
 )
 def handle_report_submit(
     n_clicks,
@@ -3375,6 +3580,7 @@ def handle_report_submit(
     reporter_name,
     reporter_dept,
     reporter_role,
+    auth=None,
 ):
     if not n_clicks:
         raise PreventUpdate
@@ -3413,8 +3619,13 @@ def handle_report_submit(
         "reporter_dept": reporter_dept or "",
         "reporter_role": reporter_role or "",
         "status": "Submitted",
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
     }
-    HAZARDS.append(hazard)
+    JOURNAL.append(hazard)
+    STORE.add(hazard)
+    JOURNAL.maybe_checkpoint(STORE)
+    actor = "anonymous" if mode == "Anonymous" else (auth or {}).get("user") or reporter_name or ""
+    AUDIT.append(hazard["id"], "submitted", actor, {"status": "Submitted", "category": hazard["category"]})
 
     return html.Div(
         f"Report {hazard['id']} submitted. You can see it under Hazards (sidebar).",
@@ -0,0 +1,108 @@
+"""
+HIRS chart figures as plain dicts. go.Figure validates every property of every trace and of the
+layout when it is built – a few milliseconds a chart, with three to six charts per page view – and
+the charts only change when the data behind them does. Here a chart is a template filling in the
+raw figure dict go.Figure would have produced (its default template included, so it renders the
+same), and built figures are cached per (chart, filter) together with the store version they were
+built at: a write moves the version, so the next page view builds them again.
+"""
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+CLEAR = "rgba(0,0,0,0)"
+GRID = {"gridcolor": "rgba(0,0,0,0.06)"}
+_template = None
+
+
+def template() -> dict:
+    """The default plotly template as the JSON go.Figure embeds in every layout (built once)."""
+    global _template
+    if _template is None:
+        _template = pio.templates[pio.templates.default].to_plotly_json()
+    return _template
+
+
+def chart(traces, title: str, height: int, margin, **layout) -> dict:
+    """A figure: `traces` (trace dicts with their "type"), the shared card layout – transparent
+    paper, 11 px font – and any further layout properties. `margin` is (left, right, top, bottom)."""
+    left, right, top, bottom = margin
+    return {
+        "data": traces,
+        "layout": {
+            "title": {"text": title},
+            "margin": {"l": left, "r": right, "t": top, "b": bottom},
+            "paper_bgcolor": CLEAR,
+            "font": {"size": 11},
+            "height": height,
+            **layout,
+            "template": template(),
+        },
+    }
+
+
+def donut(title: str, labels, values, colors, hole: float = 0.55, height: int = 220) -> dict:
+    """Donut with outside labels and percentages, no legend."""
+    trace = {"type": "pie", "labels": list(labels), "values": list(values), "hole": hole,
+             "marker": {"colors": list(colors)}, "textinfo": "label+percent", "textposition": "outside"}
+    return chart([trace], title, height, (10, 10, 36, 10), showlegend=False)
+
+
+def bars(title: str, x, y, colors, height: int = 220, bottom: int = 50, tickangle: int = None, values: bool = True, grid: bool = True) -> dict:
+    """Single bar series (one colour, or one per bar), its values printed above the bars."""
+    trace = {"type": "bar", "x": list(x), "y": list(y), "marker": {"color": colors if isinstance(colors, str) else list(colors)}}
+    if values:
+        trace.update(text=[str(v) for v in y], textposition="outside")  # as go.Bar coerces it
+    layout = {"plot_bgcolor": CLEAR}
+    if tickangle is not None:
+        layout["xaxis"] = {"tickangle": tickangle}
+    if grid:
+        layout["yaxis"] = dict(GRID)
+    return chart([trace], title, height, (20, 20, 36, bottom), **layout)
+
+
+class FigureCache:
+    """(chart, filter) -> (data version, figure), least recently used dropped past `size`.
+
+    Figures are shared by every page view that asks for them: treat them as read-only. `validate`
+    sends each built figure through go.Figure as before (the reference path, for comparison).
+    """
+
+    def __init__(self, size: int = 256):
+        self.size = size
+        self.enabled = True
+        self.validate = False
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, chart_name: str, build, version=None, filter=None) -> dict:
+        """The figure build() makes for `chart_name` under `filter`, from the cache while `version`
+        (the store's change number, or None for a chart of fixed data) has not moved. Read `version`
+        before the data build() draws: a write in between then only makes the entry stale."""
+        key = (chart_name, filter)
+        if self.enabled:
+            with self._lock:
+                cached = self._figures.get(key)
+                if cached is not None and cached[0] == version:
+                    self._figures.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return cached[1]
+                self.stats["misses"] += 1
+        figure = build()
+        if self.validate:  # go.Figure adds the default template itself, as the charts did before
+            layout = {k: v for k, v in figure["layout"].items() if k != "template"}
+            figure = go.Figure(data=figure["data"], layout=layout).to_plotly_json()
+        if self.enabled:
+            with self._lock:
+                self._figures[key] = (version, figure)
+                self._figures.move_to_end(key)
+                while len(self._figures) > self.size:
+                    self._figures.popitem(last=False)
+        return figure
+
+    def clear(self) -> None:
+        with self._lock:
+            self._figures.clear()
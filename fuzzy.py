@@ -0,0 +1,169 @@
+"""
+HIRS typo-tolerant search: a spelling vocabulary for the list search boxes, so "pusback" finds
+"pushback", "refuelling" finds "refueling" and "wingtip" finds "wing tip" (and the other way round).
+
+The vocabulary holds every word of the hazard titles, descriptions and subcategories (CAPA actions,
+investigation titles) plus the SUBCATEGORIES taxonomy. Close spellings are found with a
+symmetric-delete index: each word is stored under every string it turns into with up to one or two
+letters deleted, and a typed word is looked up under its own deletions – a handful of dictionary
+lookups instead of an edit distance against every word, let alone every record.
+
+Only words of five letters or more are matched word by word, in any order: numbers, IDs and short
+words stay next to their neighbours as typed, so "stand 7" never turns into "stand" and a "7"
+anywhere in the report. Searches list the records holding the typed text first, then the rest.
+"""
+import re
+
+from config import SUBCATEGORIES
+
+FUZZY_FIELDS = {
+    "hazards": ("title", "description", "subcategory"),
+    "capa": ("action",),
+    "investigations": ("title",),
+}
+_WORD = re.compile(r"[^\W\d_]+")  # vocabulary words: runs of letters (numbers and IDs are only matched as typed)
+_TOKEN = re.compile(r"[^\W_]+")  # words of a query
+MAX_ALTERNATIVES = 8  # close spellings tried per typed word, nearest first
+MAX_PHRASES = 64  # spellings tried per chunk of a query
+
+
+def max_distance(word: str) -> int:
+    """Typos tolerated in a word: none up to 4 letters ("cone" is not "code"), one up to 8, two from 9."""
+    return 0 if len(word) < 5 else 1 if len(word) < 9 else 2
+
+
+def deletes(word: str, distance: int) -> set:
+    """`word` with up to `distance` letters deleted (including `word` itself)."""
+    found, edge = {word}, {word}
+    for _ in range(distance):
+        edge = {w[:i] + w[i + 1:] for w in edge if len(w) > 1 for i in range(len(w))}
+        found |= edge
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (insert, delete, substitute, swap two neighbours), or
+    limit + 1 once it is known to exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if cost and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return current[-1]
+
+
+class SpellingIndex:
+    """Words seen so far, and the symmetric-delete index over those long enough to allow typos.
+
+    Words are only ever added: a word whose last report was edited away stays a (harmless) spelling
+    that finds nothing.
+    """
+
+    def __init__(self, kind: str = "hazards"):
+        self.words = set()
+        self._deletes = {}  # deletion -> word, or list of words when several share it
+        if kind == "hazards":
+            for category, subcategories in SUBCATEGORIES.items():
+                for text in (category, *subcategories):
+                    self.add_text(text.lower())
+
+    def __len__(self):
+        return len(self.words)
+
+    def add_text(self, text: str) -> None:
+        """Add the words of normalised text."""
+        for word in _WORD.findall(text):
+            if word not in self.words:
+                self.add(word)
+
+    def add(self, word: str) -> None:
+        self.words.add(word)
+        index = self._deletes
+        for variant in deletes(word, max_distance(word)):
+            held = index.get(variant)
+            if held is None:
+                index[variant] = word
+            elif isinstance(held, list):
+                held.append(word)
+            else:
+                index[variant] = [held, word]
+
+    def lookup(self, word: str) -> list:
+        """Known words within max_distance(word) of `word`, nearest first (at most MAX_ALTERNATIVES)."""
+        limit = max_distance(word)
+        if not limit:
+            return []
+        index, found = self._deletes, {}
+        for variant in deletes(word, limit):
+            held = index.get(variant)
+            for candidate in (held,) if isinstance(held, str) else held or ():
+                if candidate not in found:
+                    found[candidate] = edit_distance(word, candidate, limit)
+        close = sorted((d, w) for w, d in found.items() if d <= limit and w != word)
+        return [w for _, w in close[:MAX_ALTERNATIVES]]
+
+    def splits(self, word: str) -> list:
+        """Two known words `word` runs together, spaced and hyphenated ("deicing" -> "de icing", "de-icing")."""
+        words, out = self.words, []
+        for i in range(2, len(word) - 1):
+            if word[:i] in words and word[i:] in words:
+                out += (f"{word[:i]} {word[i:]}", f"{word[:i]}-{word[i:]}")
+        return out
+
+    def variants(self, q: str):
+        """What a normalised query may also match, as chunks of alternative phrases, or None if it
+        has nothing but itself to try. A record matches when it holds one phrase of every chunk.
+
+        Only words that tolerate typos (letters only, see max_distance) are matched word by word, in
+        any order: a query is cut into chunks between two such words, and everything else – numbers,
+        IDs, short words – stays next to its neighbours as typed ("stand 7" is one chunk). Within a
+        chunk each word may be a close spelling, and two neighbouring words may be run together or
+        one split in two ("wing tip" also tries "wingtip", "wingtip" "wing tip").
+        """
+        spans = [(m.start(), m.end()) for m in _TOKEN.finditer(q)]
+        if not spans:
+            return None
+        tokens = [q[a:b] for a, b in spans]
+        free = [t.isalpha() and max_distance(t) > 0 for t in tokens]
+        chunks, start = [], 0
+        for i in range(1, len(tokens) + 1):
+            if i == len(tokens) or (free[i - 1] and free[i]):
+                chunks.append(self._phrases(tokens[start:i], [q[spans[j][1]:spans[j + 1][0]] for j in range(start, i - 1)]))
+                start = i
+        if len(chunks) == 1 and len(chunks[0]) == 1:
+            return None  # just the typed phrase: a plain search
+        return tuple(chunks)
+
+    def _phrases(self, tokens, separators) -> tuple:
+        """Spellings of one chunk (the words as typed first), at most MAX_PHRASES."""
+        def spellings(word):
+            return (word, *self.lookup(word), *self.splits(word)) if word.isalpha() else (word,)
+
+        # ends[i]: spellings of tokens i.., each word replaced or two neighbours joined
+        n = len(tokens)
+        ends = [()] * n + [("",)]
+        for i in range(n - 1, -1, -1):
+            options = [(spelling, i + 1) for spelling in spellings(tokens[i])]
+            if i + 1 < n and (tokens[i] + tokens[i + 1]).isalpha():
+                joined = tokens[i] + tokens[i + 1]
+                options += [(spelling, i + 2) for spelling in (joined, *self.lookup(joined))]
+            phrases = {}
+            for spelling, j in options:
+                for rest in ends[j]:
+                    phrases[spelling + (separators[j - 1] if j < n else "") + rest] = None
+                if len(phrases) >= MAX_PHRASES:
+                    break
+            ends[i] = tuple(phrases)[:MAX_PHRASES]
+        return ends[0]
+
+
+def covers(key: str, variants) -> bool:
+    """Whether a search key holds a phrase of every chunk of SpellingIndex.variants(), in any order."""
+    return all(any(phrase in key for phrase in chunk) for chunk in variants)
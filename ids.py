@@ -0,0 +1,74 @@
+"""
+HIRS ID allocator: HZ-/CA-/INV- sequence numbers that stay unique across threads and gunicorn workers.
+Each worker leases a block of numbers from the shared sequence table and hands them out locally,
+so the database is touched once per block rather than once per submission.
+"""
+import os
+import sqlite3
+import threading
+
+from config import HAZARD_DB_PATH, ID_BLOCK_SIZE
+
+
+class SequenceAllocator:
+    """Block-leasing allocator. IDs are monotonic per worker; unused numbers in a lease are simply skipped."""
+
+    def __init__(self, path: str = HAZARD_DB_PATH, block_size: int = ID_BLOCK_SIZE, floors: dict = None):
+        self.path = path
+        self.block_size = block_size
+        self.floors = dict(floors or {})  # first number for a prefix that has never been leased
+        self._lock = threading.Lock()  # process-local; only guards this worker's leases
+        self._leases = {}  # prefix -> [next, end)
+        self._local_next = {}  # prefix -> next unleased number when there is no database (memory store)
+        self._pid = os.getpid()
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS sequences (prefix TEXT PRIMARY KEY, next_value INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _lease(self, prefix: str, size: int = None) -> list:
+        """Reserve the next block for this worker (one short write transaction)."""
+        size = size or self.block_size
+        floor = self.floors.get(prefix, 1)
+        if self.path is None:
+            start = max(floor, self._local_next.get(prefix, floor))
+            self._local_next[prefix] = start + size
+            return [start, start + size]
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT next_value FROM sequences WHERE prefix = ?", (prefix,)).fetchone()
+            start = max(floor, row[0]) if row else floor
+            conn.execute(
+                "INSERT OR REPLACE INTO sequences (prefix, next_value) VALUES (?, ?)",
+                (prefix, start + size),
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        return [start, start + size]
+
+    def next_number(self, prefix: str) -> int:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's leases belong to the parent
+                self._leases, self._pid = {}, os.getpid()
+            lease = self._leases.get(prefix)
+            if lease is None or lease[0] >= lease[1]:
+                lease = self._leases[prefix] = self._lease(prefix)
+            n = lease[0]
+            lease[0] += 1
+            return n
+
+    def next_ids(self, prefix: str, count: int) -> list:
+        """`count` consecutive IDs from a dedicated lease (bulk import)."""
+        with self._lock:
+            start, end = self._lease(prefix, count)
+        return [f"{prefix}-{n:04d}" for n in range(start, end)]
+
+    def next_id(self, prefix: str) -> str:
+        """e.g. next_id("HZ") -> "HZ-0006"."""
+        return f"{prefix}-{self.next_number(prefix):04d}"
@@ -0,0 +1,233 @@
+"""
+HIRS bulk import: stream historical hazard reports from CSV or JSONL into the hazard store.
+Rows are validated against the config taxonomy and risk matrix, given fresh HZ- IDs
+(the source ID is kept as legacy_id) and inserted in batched transactions, so memory
+use stays flat whatever the file size.
+"""
+import csv
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from config import (
+    WORKFLOW_STATUSES,
+    CLASSIFICATION_TYPES,
+    TAGS_OPTIONS,
+    REPORTING_MODES,
+    HAZARD_AREAS,
+    SUBCATEGORIES,
+    risk_matrix_level,
+    IMPORT_BATCH_SIZE,
+    IMPORT_DIR,
+    IMPORT_STATUS_PATH,
+)
+
+PERCEIVED_RISKS = ("Low", "Moderate", "High", "Critical")
+MAX_REPORTED_ERRORS = 100
+
+
+def read_rows(path: str, fmt: str = None):
+    """Yield (line number, row dict or None, parse error or None) from a CSV or JSONL file, one row at a time."""
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row, None
+        elif fmt == "jsonl":
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    yield line_no, None, f"invalid JSON ({exc})"
+                    continue
+                if isinstance(row, dict):
+                    yield line_no, row, None
+                else:
+                    yield line_no, None, "expected a JSON object"
+        else:
+            raise ValueError(f"Unknown import format {fmt!r} (expected csv or jsonl)")
+
+
+def import_path(name: str, folder: str = IMPORT_DIR) -> str:
+    """The file `name` refers to inside the import folder. Raises ValueError for anything else
+    (absolute paths, "..", symlinks out of the folder) or a file that does not exist."""
+    root = os.path.realpath(folder)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or path == root:
+        raise ValueError(f"{name!r} is not a file in the import folder")
+    if not os.path.isfile(path):
+        raise ValueError(f"{name!r} was not found in the import folder")
+    return path
+
+
+def _text(row: dict, key: str) -> str:
+    value = row.get(key)
+    return "" if value is None else str(value).strip()
+
+
+def validate_row(row: dict) -> dict:
+    """Normalise one source row into a hazard dict (without ID). Raises ValueError on bad data."""
+    title = _text(row, "title")
+    if not title:
+        raise ValueError("title is required")
+    category = _text(row, "category")
+    if category not in HAZARD_AREAS:
+        raise ValueError(f"unknown category {category!r}")
+    subcategory = _text(row, "subcategory")
+    if subcategory and subcategory not in SUBCATEGORIES.get(category, []):
+        raise ValueError(f"subcategory {subcategory!r} is not under {category!r}")
+    status = _text(row, "status") or "Submitted"
+    if status not in WORKFLOW_STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+    classification = _text(row, "classification")
+    if classification and classification not in CLASSIFICATION_TYPES:
+        raise ValueError(f"unknown classification {classification!r}")
+    perceived_risk = _text(row, "perceived_risk")
+    if perceived_risk and perceived_risk not in PERCEIVED_RISKS:
+        raise ValueError(f"unknown perceived risk {perceived_risk!r}")
+    tags = row.get("tags") or []
+    if not isinstance(tags, (list, str)):
+        raise ValueError(f"tags must be a list or a ;-separated string, not {type(tags).__name__}")
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(";") if t.strip()]
+    unknown_tags = [t for t in tags if t not in TAGS_OPTIONS]
+    if unknown_tags:
+        raise ValueError(f"unknown tags {unknown_tags}")
+    reporting_mode = _text(row, "reporting_mode") or "Named"
+    if reporting_mode not in REPORTING_MODES:
+        raise ValueError(f"unknown reporting mode {reporting_mode!r}")
+    created_at = _text(row, "created_at") or _text(row, "date")
+    if not created_at:
+        raise ValueError("created_at is required")
+    try:
+        created = datetime.fromisoformat(created_at)
+    except ValueError:
+        raise ValueError(f"created_at {created_at!r} is not an ISO date") from None
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    # Stored in UTC like new submissions: created_at is compared as text (archiving, created: filters)
+    created = created.astimezone(timezone.utc)
+
+    hazard = {
+        "title": title,
+        "station": _text(row, "station"),
+        "area": _text(row, "area"),
+        "category": category,
+        "subcategory": subcategory,
+        "description": _text(row, "description"),
+        "people_exposed": _text(row, "people_exposed"),
+        "perceived_risk": perceived_risk,
+        "classification": classification,
+        "tags": tags,
+        "reporting_mode": reporting_mode,
+        "reporter_name": _text(row, "reporter_name"),
+        "reporter_dept": _text(row, "reporter_dept"),
+        "reporter_role": _text(row, "reporter_role"),
+        "status": status,
+        "created_at": created.isoformat(timespec="seconds"),
+    }
+    if _text(row, "id"):
+        hazard["legacy_id"] = _text(row, "id")
+    likelihood, severity = _text(row, "likelihood"), _text(row, "severity")
+    if likelihood or severity:
+        try:
+            likelihood, severity = int(likelihood), int(severity)
+        except ValueError:
+            raise ValueError("likelihood and severity must both be integers 1–5") from None
+        score, level = risk_matrix_level(likelihood, severity)
+        if not score:
+            raise ValueError("likelihood and severity must both be integers 1–5")
+        hazard.update(likelihood=likelihood, severity=severity, risk_score=score, risk_level=level)
+    return hazard
+
+
+class ImportResult:
+    """Running totals for one import; also written to IMPORT_STATUS_PATH for the Admin page."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.imported = 0
+        self.rejected = 0
+        self.errors = []  # first MAX_REPORTED_ERRORS "line N: reason" messages
+        self.started = time.time()
+        self.finished = None
+        self.state = "running"
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = (self.finished or time.time()) - self.started
+        return (self.imported + self.rejected) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return f"{self.imported:,} imported, {self.rejected:,} rejected ({self.rows_per_second:,.0f} rows/s)"
+
+    def save(self, status_path: str = IMPORT_STATUS_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(status_path)), exist_ok=True)
+        tmp = status_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "path": self.path,
+                "state": self.state,
+                "imported": self.imported,
+                "rejected": self.rejected,
+                "summary": self.summary(),
+                "errors": self.errors[:10],
+            }, f)
+        os.replace(tmp, status_path)
+
+
+def load_status(status_path: str = IMPORT_STATUS_PATH):
+    try:
+        with open(status_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def import_file(path, store, allocator, fmt=None, batch_size=None, progress=None, dry_run=False) -> ImportResult:
+    """Validate and insert every row of `path`. `progress(result)` is called after each batch."""
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    result = ImportResult(path)
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            # One ID lease per batch rather than per row
+            for hazard, hazard_id in zip(batch, allocator.next_ids("HZ", len(batch))):
+                hazard["id"] = hazard_id
+            store.add_many(batch)
+        result.imported += len(batch)
+        batch.clear()
+        if progress:
+            progress(result)
+
+    try:
+        for line_no, row, error in read_rows(path, fmt):
+            try:
+                if error:
+                    raise ValueError(error)
+                hazard = validate_row(row)
+            except ValueError as exc:
+                result.rejected += 1
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append(f"line {line_no}: {exc}")
+                continue
+            batch.append(hazard)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        result.state = "done"
+    except Exception as exc:
+        result.state = "failed"
+        result.errors.append(str(exc))
+        raise
+    finally:
+        result.finished = time.time()
+        if progress:
+            progress(result)
+    return result
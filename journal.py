@@ -0,0 +1,155 @@
+"""
+HIRS submission journal: append-only write-ahead log with group commit.
+A report is durable once its journal record is fsynced; concurrent submissions
+that arrive while an fsync is in flight are written and synced together.
+
+Submissions are concurrent within a worker when gunicorn runs it with --threads (the Procfile
+does); across workers the journal file is shared and guarded by flock.
+"""
+import json
+import os
+import threading
+import zlib
+
+try:
+    import fcntl  # POSIX only – cross-process locking is skipped on Windows dev machines
+except ImportError:
+    fcntl = None
+
+from config import JOURNAL_CHECKPOINT_BYTES, JOURNAL_PATH
+
+
+def _encode(record: dict) -> bytes:
+    body = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return b"%08x %s\n" % (zlib.crc32(body), body)
+
+
+def _decode(line: bytes):
+    """Return the record on a journal line, or None if the line is torn or corrupt."""
+    if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+        return None
+    body = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(body):
+            return None
+        return json.loads(body)
+    except ValueError:
+        return None
+
+
+class Journal:
+    """Group-commit journal. append() returns only after the record is on disk."""
+
+    def __init__(self, path: str = JOURNAL_PATH, checkpoint_bytes: int = JOURNAL_CHECKPOINT_BYTES):
+        self.path = path
+        self.checkpoint_bytes = checkpoint_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._cond = threading.Condition()
+        self._pending = []  # encoded records waiting for the next group commit
+        self._enqueued = 0  # ticket of the last record handed to append()
+        self._durable = 0  # every ticket <= this is fsynced
+        self._flushing = False
+        self._fd = None
+        self._fd_pid = None
+        # flock belongs to the open file, which every thread of a worker shares: it keeps other
+        # workers out, this keeps a checkpoint from truncating a batch another thread just wrote
+        self._io = threading.Lock()
+        self.commits = 0  # fsyncs issued – the group-commit ratio is records / commits
+
+    def _file(self) -> int:
+        if self._fd is None or self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def _lock(self, fd: int) -> None:
+        """Exclusive use of the journal file: against other threads of this worker, then other workers."""
+        self._io.acquire()
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._io.release()
+                raise
+
+    def _unlock(self, fd: int) -> None:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            self._io.release()
+
+    def _write_batch(self, batch: list) -> None:
+        fd = self._file()
+        self._lock(fd)
+        try:
+            os.write(fd, b"".join(batch))
+            os.fsync(fd)
+        finally:
+            self._unlock(fd)
+        self.commits += 1
+
+    def append(self, record: dict) -> None:
+        """Durably append one record. The first waiting thread writes and fsyncs for everyone queued behind it."""
+        data = _encode(record)
+        with self._cond:
+            self._enqueued += 1
+            ticket = self._enqueued
+            self._pending.append(data)
+            while self._durable < ticket:
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                # Become the leader for everything queued so far
+                self._flushing = True
+                batch, self._pending = self._pending, []
+                upto = self._enqueued
+                self._cond.release()
+                try:
+                    self._write_batch(batch)
+                except BaseException:
+                    self._cond.acquire()
+                    self._pending[:0] = batch  # followers retry with their records still queued
+                    self._flushing = False
+                    self._cond.notify_all()
+                    raise
+                self._cond.acquire()
+                self._flushing = False
+                self._durable = upto
+                self._cond.notify_all()
+
+    def records(self) -> list:
+        """Every intact record, stopping at the first torn or corrupt line (a crash mid-write)."""
+        out = []
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    record = _decode(line)
+                    if record is None:
+                        break
+                    out.append(record)
+        except FileNotFoundError:
+            pass
+        return out
+
+    def recover(self, store) -> int:
+        """Replay the journal into the store, then truncate it. Returns the number of records replayed."""
+        fd = self._file()
+        self._lock(fd)
+        try:
+            records = self.records()
+            store.apply_journal(records)
+            os.ftruncate(fd, 0)
+            os.fsync(fd)
+        finally:
+            self._unlock(fd)
+        return len(records)
+
+    def maybe_checkpoint(self, store) -> None:
+        """Fold the journal into the store once it grows past checkpoint_bytes."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size >= self.checkpoint_bytes:
+            self.recover(store)
@@ -0,0 +1,1276 @@
+"""
+HIRS management commands (run from the project folder):
+
+    python manage.py stress-ids [--processes 4 --threads 8 --per-thread 500]
+    python manage.py bench-records [--count 1000000]
+    python manage.py import-hazards FILE [--format csv|jsonl --batch-size 5000 --dry-run]
+    python manage.py archive
+    python manage.py search-archive [TEXT --status Closed --from 2020-01 --to 2021-12]
+    python manage.py audit-history ENTITY_ID | --from 2026-01-01 --to 2026-01-31
+    python manage.py bench-audit [--count 20000]
+    python manage.py verify-audit [--workers N]
+    python manage.py verify-audit-csv EXPORT.csv
+    python manage.py backup
+    python manage.py verify-backup [NAME]
+    python manage.py restore [NAME] [--target DIR]
+    python manage.py bench-search [--count 500000 --query "gate b12"]
+    python manage.py bench-search-keys [--count 100000]
+    python manage.py bench-fuzzy [--count 1000000 --words 50000 --queries 300]
+    python manage.py bench-filters [--count 500000]
+    python manage.py query hazards|capa|investigations [TEXT] [--filter status=Triage ...] [--as-of ISO]
+    python manage.py bench-sort [--count 200000 --page 50]
+    python manage.py bench-typing [--count 100000 --sessions 12 --workers 4 --debounce 0.3]
+    python manage.py bench-rows [--count 20000 --page 200 --requests 300]
+    python manage.py bench-grid [--count 50000 --fetches 200]
+    python manage.py bench-snapshot [--count 5000 --changes 50 --queries 300]
+    python manage.py bench-pages [--navigations 400]
+    python manage.py bench-figures [--count 2000 --views 200 --write-every 10]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+# ---------------------------------------------------------------------------
+# stress-ids – concurrent allocation from many threads in many processes
+# ---------------------------------------------------------------------------
+def _allocate_in_process(path, threads, per_thread, block_size):
+    from ids import SequenceAllocator
+
+    allocator = SequenceAllocator(path, block_size=block_size, floors={"HZ": 6, "CA": 4, "INV": 4})
+    results = [[] for _ in range(threads)]
+
+    def worker(out):
+        for i in range(per_thread):
+            out.append(allocator.next_id(("HZ", "CA", "INV")[i % 3]))
+
+    pool = [threading.Thread(target=worker, args=(results[t],)) for t in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return results
+
+
+def cmd_stress_ids(args):
+    path = os.path.join(tempfile.mkdtemp(prefix="hirs-ids-"), "ids.db")
+    with ProcessPoolExecutor(max_workers=args.processes) as ex:
+        futures = [ex.submit(_allocate_in_process, path, args.threads, args.per_thread, args.block_size) for _ in range(args.processes)]
+        per_thread = [ids for f in futures for ids in f.result()]
+    all_ids = [i for ids in per_thread for i in ids]
+    duplicates = len(all_ids) - len(set(all_ids))
+    non_monotonic = 0
+    for ids in per_thread:
+        last = {}
+        for hid in ids:
+            prefix, n = hid.split("-")
+            if int(n) <= last.get(prefix, 0):
+                non_monotonic += 1
+            last[prefix] = int(n)
+    print(f"{len(all_ids)} IDs from {args.processes} processes x {args.threads} threads: {duplicates} duplicates, {non_monotonic} out of order")
+    return 1 if duplicates or non_monotonic else 0
+
+
+# ---------------------------------------------------------------------------
+# bench-records – memory held by N hazards as dicts vs slotted records
+# ---------------------------------------------------------------------------
+def _sample_rows(count):
+    """Serialized hazards as they come out of the store (fresh strings per row, like json.loads)."""
+    from config import HAZARD_AREAS, WORKFLOW_STATUSES, CLASSIFICATION_TYPES
+
+    stations = ["Main Ramp", "North Ramp", "Terminal B", "Freight Terminal"]
+    for i in range(count):
+        yield json.dumps({
+            "id": f"HZ-{i:07d}",
+            "title": f"Hazard report {i}",
+            "station": stations[i % len(stations)],
+            "area": f"Stand {i % 40}",
+            "category": HAZARD_AREAS[i % len(HAZARD_AREAS)],
+            "subcategory": "",
+            "description": "",
+            "people_exposed": "",
+            "perceived_risk": ("Low", "Moderate", "High", "Critical")[i % 4],
+            "classification": CLASSIFICATION_TYPES[i % len(CLASSIFICATION_TYPES)],
+            "tags": [],
+            "reporting_mode": "Named",
+            "reporter_name": "",
+            "reporter_dept": "Ramp",
+            "reporter_role": "Ground handler",
+            "status": WORKFLOW_STATUSES[i % len(WORKFLOW_STATUSES)],
+            "created_at": "2026-01-01T00:00:00+00:00",
+        })
+
+
+def _build_and_measure(kind, count):
+    """Runs in a fresh process: peak RSS growth while holding `count` hazards of the given kind."""
+    import resource
+    from records import HazardRecord
+
+    build = (lambda d: d) if kind == "dict" else (lambda d: HazardRecord(**d))
+    gc.collect()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    held = [build(json.loads(row)) for row in _sample_rows(count)]
+    elapsed = time.perf_counter() - started
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    unit = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return (after - before) * unit, elapsed, len(held)
+
+
+def cmd_bench_records(args):
+    results = {}
+    for kind in ("dict", "record"):
+        with ProcessPoolExecutor(max_workers=1) as ex:
+            results[kind] = ex.submit(_build_and_measure, kind, args.count).result()
+    mb = 1024 * 1024
+    print(f"{args.count:,} hazards (peak RSS growth while held)")
+    for kind, label in (("dict", "dicts"), ("record", "HazardRecord")):
+        size, elapsed, _ = results[kind]
+        print(f"  {label:<14}{size / mb:8.1f} MiB ({size / args.count:6.0f} B/record, built in {elapsed:.1f}s)")
+    print(f"  ratio         {results['record'][0] / results['dict'][0]:8.2f}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# import-hazards – stream historical reports from CSV / JSONL into the store
+# ---------------------------------------------------------------------------
+def cmd_import_hazards(args):
+    from dash_app import IDS, STORE
+    from importer import import_file
+
+    def progress(result):
+        print(f"\r{result.summary()}", end="", flush=True)
+        result.save()
+
+    result = import_file(args.path, STORE, IDS, fmt=args.format, batch_size=args.batch_size, progress=progress, dry_run=args.dry_run)
+    print()
+    for error in result.errors[:20]:
+        print(f"  {error}")
+    if len(result.errors) > 20:
+        print(f"  ... {result.rejected - 20:,} more rejected rows")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# archive / search-archive – retention tiering
+# ---------------------------------------------------------------------------
+def cmd_archive(args):
+    from archive import archive_stats, run_once
+    from store import open_store
+
+    from audit import AuditLog
+
+    outcome = run_once(open_store(), audit=AuditLog())
+    if outcome is None:
+        print("Another worker is archiving right now; try again later.")
+        return 1
+    moved, purged = outcome
+    stats = archive_stats()
+    print(f"{moved:,} reports archived; {len(purged)} expired partitions purged {purged or ''}".rstrip())
+    print(f"archive: {stats['partitions']} partitions, {stats['bytes'] / 1024:,.0f} KiB ({stats['oldest']} … {stats['newest']})")
+    return 0
+
+
+def cmd_search_archive(args):
+    from archive import search_archive
+
+    results = search_archive(args.text, status=args.status, date_from=args.date_from, date_to=args.date_to, limit=args.limit + 1)
+    for h in results[:args.limit]:
+        print(f"{h['id']:<12}{h.get('created_at', '')[:10]:<12}{h.get('status', ''):<10}{h.get('title', '')}")
+    if len(results) > args.limit:
+        print(f"first {args.limit} archived reports shown; more match (raise --limit)")
+    else:
+        print(f"{len(results)} archived reports")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# audit-history / bench-audit – audit trail lookups and append latency
+# ---------------------------------------------------------------------------
+def cmd_audit_history(args):
+    from audit import AuditLog
+
+    log = AuditLog()
+    entries = log.history(args.entity_id) if args.entity_id else log.between(args.date_from or "", args.date_to)
+    for e in entries:
+        print(f"{e['seq']:>8}  {e['ts'][:19]}  {e['entity_id']:<12}{e['action']:<11}{e['actor']:<18}{json.dumps(e['details'])}")
+    print(f"{len(entries)} entries")
+    return 0
+
+
+def cmd_bench_audit(args):
+    from audit import AuditLog
+
+    log = AuditLog(tempfile.mkdtemp(prefix="hirs-audit-"), segment_bytes=args.segment_bytes)
+    timings = []
+    for i in range(args.count):
+        started = time.perf_counter()
+        log.append(f"HZ-{i % 5000:04d}", "status", "bench", {"from": "Submitted", "to": "Triage"})
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    pct = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))] * 1e6
+    print(f"{args.count:,} appends across {len(log.manifest()) + 1} segments: p50 {pct(0.5):.0f} µs, p99 {pct(0.99):.0f} µs, max {timings[-1] * 1e6:.0f} µs")
+    started = time.perf_counter()
+    history = log.history("HZ-0042")
+    print(f"history of one hazard: {len(history)} entries in {(time.perf_counter() - started) * 1e3:.1f} ms")
+    return 0 if pct(0.99) < 1000 else 1
+
+
+# ---------------------------------------------------------------------------
+# verify-audit / verify-audit-csv – tamper evidence for auditors
+# ---------------------------------------------------------------------------
+def cmd_verify_audit(args):
+    from audit import AuditLog
+
+    log = AuditLog()
+    manifest = log.manifest()
+    started = time.perf_counter()
+    failure = log.verify(workers=args.workers)
+    elapsed = time.perf_counter() - started
+    entries = manifest[-1]["last_seq"] if manifest else 0
+    print(f"{len(manifest)} sealed segments (~{entries:,} entries) checked in {elapsed:.2f}s")
+    if failure:
+        print(f"TAMPERED: segment {failure['segment']}, entry {failure['seq']}: {failure['reason']}")
+        return 1
+    if manifest:
+        # Publish this outside HIRS (e-mail, ticket) so a rewrite of the whole log is detectable too
+        print(f"OK. Latest sealed head {manifest[-1]['head']} (Merkle root {manifest[-1].get('merkle_root', '-')})")
+    else:
+        print("OK.")
+    return 0
+
+
+def cmd_verify_audit_csv(args):
+    import csv
+    from audit import verify_proof
+
+    checked = bad = 0
+    with open(args.path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if not row.get("proof") and not row.get("merkle_root"):
+                continue  # entry was still in the active segment at export time
+            checked += 1
+            if not verify_proof(row["hash"], row["proof"], row["merkle_root"]):
+                bad += 1
+                print(f"  entry {row['seq']}: proof does not match segment {row['segment']} root")
+    print(f"{checked} inclusion proofs checked, {bad} failed")
+    return 1 if bad else 0
+
+
+# ---------------------------------------------------------------------------
+# backup / verify-backup / restore – incremental backups and a timed restore drill
+# ---------------------------------------------------------------------------
+def cmd_backup(args):
+    from backup import run_backup
+
+    manifest = run_backup()
+    st = manifest["stats"]
+    mb = 1024 * 1024
+    print(
+        f"backup {manifest['name']}: {st['files']} files, {st['bytes_read'] / mb:,.1f} MiB read, "
+        f"{st['bytes_written'] / mb:,.1f} MiB new ({st['chunks_written']} chunks written, {st['chunks_reused']} unchanged) "
+        f"in {st['seconds']:.2f}s"
+    )
+    return 0
+
+
+def cmd_verify_backup(args):
+    from backup import load_manifest, verify_backup
+
+    name = load_manifest(args.name)["name"]
+    problems = verify_backup(name)
+    for problem in problems:
+        print(f"  {problem}")
+    print(f"backup {name}: {'OK' if not problems else f'{len(problems)} problems'}")
+    return 1 if problems else 0
+
+
+def cmd_restore(args):
+    from audit import AuditLog
+    from backup import DB_NAME, restore
+    from store import SqliteHazardStore
+
+    target = args.target or tempfile.mkdtemp(prefix="hirs-restore-")
+    try:
+        result = restore(target, args.name)
+    except ValueError as exc:
+        print(f"restore failed: {exc}")
+        return 1
+    print(f"restored backup {result['name']} into {target}: {result['files']} files, {result['bytes'] / (1024 * 1024):,.1f} MiB")
+    print(f"restore time: {result['seconds']:.2f}s (database integrity: {result['integrity']})")
+    # Drill check: the restored register opens and the audit chain is intact
+    if os.path.exists(os.path.join(target, DB_NAME)):
+        print(f"hazards in restored store: {SqliteHazardStore(os.path.join(target, DB_NAME)).count():,}")
+    if os.path.isdir(os.path.join(target, "audit")):
+        failure = AuditLog(os.path.join(target, "audit")).verify()
+        print("audit chain: " + ("OK" if not failure else f"TAMPERED at segment {failure['segment']}: {failure['reason']}"))
+    return 0 if result["integrity"] in ("ok", "no database in backup") else 1
+
+
+# ---------------------------------------------------------------------------
+# bench-search – trigram index latency against the linear filter
+# ---------------------------------------------------------------------------
+def _search_corpus(count):
+    from corpus import hazards  # config reads the environment at import: not before a command sets it
+
+    return hazards(count)
+
+
+def cmd_bench_search(args):
+    from search import SEARCH_FIELDS, SearchIndex, matches, normalize
+
+    records = list(_search_corpus(args.count))
+    started = time.perf_counter()
+    index = SearchIndex(samples=records)
+    print(f"{args.count:,} hazards indexed in {time.perf_counter() - started:.1f}s ({len(index._vocabulary):,} distinct trigrams)")
+    fields = SEARCH_FIELDS["hazards"]
+    print(f"{'typed':<14}{'scan ms':>10}{'index ms':>10}{'matches':>10}")
+    for n in range(1, len(args.query) + 1):
+        typed = args.query[:n]
+        if not typed.strip():
+            continue
+        q = normalize(typed.strip())
+        started = time.perf_counter()
+        scanned = [h for h in records if matches(h, q, fields)]
+        scan_ms = (time.perf_counter() - started) * 1e3
+        started = time.perf_counter()
+        found = index.search(typed)
+        index_ms = (time.perf_counter() - started) * 1e3
+        print(f"{typed!r:<14}{scan_ms:>10.1f}{index_ms:>10.1f}{len(found):>10,}  (scan {len(scanned):,})")
+    return 0
+
+
+def cmd_bench_search_keys(args):
+    """Per search over the whole register: lowercasing every field of every record (the filter before
+    search keys) vs matching cached search keys. Counts the string-building calls each search makes
+    (lower / casefold / normalize / join, seen by the profiler): each one allocates a new string."""
+    from search import SEARCH_FIELDS, matches, normalize, search_key
+
+    records = list(_search_corpus(args.count))
+    fields = SEARCH_FIELDS["hazards"]
+
+    def lowered(q):
+        return [h for h in records if any(q in (h.get(field) or "").lower() for field in fields)]
+
+    def keyed(q):
+        return [h for h in records if matches(h, q, fields)]
+
+    def measure(search, q):
+        calls = 0
+
+        def count(frame, event, arg):
+            nonlocal calls
+            if event == "c_call" and arg.__name__ in ("lower", "casefold", "normalize", "join"):
+                calls += 1
+
+        sys.setprofile(count)
+        try:
+            found = search(q)
+        finally:
+            sys.setprofile(None)
+        started = time.perf_counter()
+        search(q)
+        return calls, (time.perf_counter() - started) * 1e3, len(found)
+
+    started = time.perf_counter()
+    for h in records:
+        search_key(h, fields)  # once per record revision, as the index does when it first sees it
+    print(f"{args.count:,} hazards; search keys built in {time.perf_counter() - started:.2f}s")
+    print(f"{'query':<16}{'':<10}{'strings':>10}{'per row':>9}{'ms':>9}{'matches':>9}")
+    for typed in ("b1", "gate b12", "fuel", "ölfleck", "no such text"):
+        q = normalize(typed)
+        for label, search in (("lowered", lowered), ("keys", keyed)):
+            calls, ms, n = measure(search, q)
+            print(f"{typed!r:<16}{label:<10}{calls:>10,}{calls / len(records):>9.2f}{ms:>9.1f}{n:>9,}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# bench-fuzzy – typo-tolerant lookups: symmetric-delete vocabulary vs edit distance to every word
+# ---------------------------------------------------------------------------
+def _lexicon(count, rng):
+    """`count` made-up words (4–12 letters), standing in for the vocabulary of years of free-text reports."""
+    consonants, vowels = "bcdfghklmnprstvwz", "aeiou"
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 6)))[:rng.randint(4, 12)])
+    return sorted(words)
+
+
+def _misspell(word, rng):
+    """`word` with one typo: a letter dropped, doubled, swapped with the next or replaced."""
+    i = rng.randrange(len(word) - 1)
+    edit = rng.choice(("drop", "double", "swap", "replace"))
+    if edit == "drop":
+        return word[:i] + word[i + 1:]
+    if edit == "double":
+        return word[:i] + word[i] + word[i:]
+    if edit == "swap":
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    return word[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz".replace(word[i], "")) + word[i + 1:]
+
+
+def cmd_bench_fuzzy(args):
+    import random
+
+    from fuzzy import covers, edit_distance, max_distance
+    from records import HazardRecord
+    from search import SEARCH_FIELDS, SearchIndex, matches, normalize, search_key
+
+    rng = random.Random(args.seed)
+    lexicon = _lexicon(args.words, rng)
+
+    def corpus(count):
+        for i, h in enumerate(_search_corpus(count)):
+            row = h.to_dict()
+            row["description"] += f" {lexicon[(i * 7919) % len(lexicon)]} {lexicon[(i * 104729) % len(lexicon)]}"
+            row["title"] = row["title"].replace("Pushback", "Push back" if i % 5 == 0 else "Pushback").replace("Fuel", "Refuelling" if i // 18 % 2 else "Refueling")
+            yield HazardRecord(**row)
+
+    started = time.perf_counter()
+    index = SearchIndex(samples=corpus(args.count))
+    spelling = index.spelling
+    print(f"{args.count:,} hazards indexed in {time.perf_counter() - started:.1f}s; "
+          f"{len(spelling):,} words, {len(spelling._deletes):,} deletion keys")
+    known = sorted(w for w in spelling.words if len(w) >= 4)
+    queries = ["pusback", "push back", "pushback", "refueling", "refuelling", "wingtip", "wing tip", "marshaler", "deicing"]
+    queries += [_misspell(rng.choice(known), rng) for _ in range(args.queries)]
+
+    def brute(word):
+        limit = max_distance(word)
+        return sorted((d, w) for w in spelling.words if (d := edit_distance(word, w, limit)) <= limit and w != word)
+
+    lookups, scans, searches, failures = [], [], [], 0
+    for n, q in enumerate(queries):
+        started = time.perf_counter()
+        variants = index.variants(q)
+        lookups.append((time.perf_counter() - started) * 1e3)
+        for word in q.split():
+            close = spelling.lookup(word)
+            if n < args.scan:  # edit distance against every word: what the index saves
+                started = time.perf_counter()
+                expected = [w for _, w in brute(word)][:len(close)]
+                scans.append((time.perf_counter() - started) * 1e3)
+                if close != expected:
+                    failures += 1
+                    print(f"  MISMATCH lookup {word!r}: index {close}, every word {expected}")
+        started = time.perf_counter()
+        found = index.search(q, fuzzy=True)
+        searches.append((time.perf_counter() - started) * 1e3)
+        if n < len(queries) - args.queries:
+            exact = len(index.search(q))
+            alternatives = sorted({phrase for chunk in variants or () for phrase in chunk} - {q} - set(q.split()))
+            print(f"  {q!r:<14} {exact:>9,} exact {len(found):>9,} fuzzy   also tries: {', '.join(alternatives[:6])}")
+
+    def quantiles(ms):
+        ms = sorted(ms)
+        return f"p50 {ms[len(ms) // 2]:.2f}  p95 {ms[int(len(ms) * 0.95)]:.2f}  max {ms[-1]:.2f} ms"
+
+    print(f"spelling lookup per query        {quantiles(lookups)}")
+    print(f"edit distance to every word      {quantiles(scans)}  (first {args.scan} queries)")
+    print(f"fuzzy search incl. record fetch  {quantiles(searches)}")
+    # The index agrees with checking every record against the same spellings, and a fuzzy search
+    # lists the exact results unchanged, first
+    fields = SEARCH_FIELDS["hazards"]
+    rows = list(corpus(args.check))
+    small = SearchIndex(samples=rows)
+    for q in queries[:60] + ["stand 7", "gate b12", "fod pushback"]:
+        variants = small.variants(q)
+        wanted = normalize(q)
+        exact = [r["id"] for r in rows if matches(r, wanted, fields)]
+        expected = exact + [r["id"] for r in rows if variants is not None and not matches(r, wanted, fields)
+                            and covers(search_key(r, fields), variants)]
+        found = [r["id"] for r in small.search(q, fuzzy=True)]
+        if found != expected or found[:len(exact)] != [r["id"] for r in small.search(q)]:
+            failures += 1
+            print(f"  MISMATCH search {q!r}")
+    print("OK: lookups match a full edit-distance scan and searches match the linear filter" if not failures else f"FAILED: {failures} mismatches")
+    return 0 if not failures else 1
+
+
+# ---------------------------------------------------------------------------
+# bench-filters – dropdown filters and KPI counts: list comprehensions vs filter bitmaps
+# ---------------------------------------------------------------------------
+def cmd_bench_filters(args):
+    from bitmaps import BitmapIndex
+    from config import HAZARD_AREAS
+    from store import MemoryHazardStore
+
+    store = MemoryHazardStore()
+    store.add_many(list(_search_corpus(args.count)))
+    rows = store.all()
+    started = time.perf_counter()
+    index = BitmapIndex(store)
+    print(f"{len(index):,} hazards, bitmaps built in {time.perf_counter() - started:.1f}s")
+    cases = [
+        {"status": "Triage"},
+        {"status": "Triage", "category": HAZARD_AREAS[0]},
+        {"status": ["Submitted", "Triage"], "perceived_risk": ["High", "Critical"]},
+        {"station": "North Ramp", "perceived_risk": "High", "status": ["Triage", "In progress"]},
+    ]
+
+    def scan(filters):
+        return [
+            h for h in rows
+            if all(h.get(f) in v if isinstance(v, list) else h.get(f) == v for f, v in filters.items())
+        ]
+
+    failures = 0
+    print(f"{'filters':<90}{'scan ms':>9}{'count ms':>10}{'rows ms':>9}{'matches':>10}")
+    for filters in cases:
+        started = time.perf_counter()
+        expected = scan(filters)
+        scan_ms = (time.perf_counter() - started) * 1e3
+        started = time.perf_counter()
+        n = index.count(**filters)
+        count_ms = (time.perf_counter() - started) * 1e3
+        started = time.perf_counter()
+        found = index.rows(index.select(**filters))
+        rows_ms = (time.perf_counter() - started) * 1e3
+        if [h["id"] for h in found] != [h["id"] for h in expected] or n != len(expected):
+            failures += 1
+            print(f"  MISMATCH: bitmaps {n:,} / {len(found):,} rows, scan {len(expected):,}")
+        print(f"{json.dumps(filters):<90}{scan_ms:>9.1f}{count_ms:>10.3f}{rows_ms:>9.1f}{len(expected):>10,}")
+    started = time.perf_counter()
+    grouped = {}
+    for h in rows:
+        grouped[h.get("status") or ""] = grouped.get(h.get("status") or "", 0) + 1
+    scan_ms = (time.perf_counter() - started) * 1e3
+    started = time.perf_counter()
+    counted = index.counts("status")
+    print(f"KPI counts by status: scan {scan_ms:.1f} ms, bitmaps {(time.perf_counter() - started) * 1e3:.3f} ms")
+    failures += counted != grouped
+    # Writes arrive through the change feed
+    for h in rows[:1000]:
+        store.set_status(h["id"], "Closed")
+    store.remove([h["id"] for h in rows[1000:1500]])
+    rows = store.all()
+    for filters in cases + [{"status": "Closed"}]:
+        if [h["id"] for h in index.rows(index.select(**filters))] != [h["id"] for h in scan(filters)]:
+            failures += 1
+            print(f"  MISMATCH after writes: {filters}")
+    print("OK: bitmaps and scans agree" if not failures else f"FAILED: {failures} mismatches")
+    return 0 if not failures else 1
+
+
+# ---------------------------------------------------------------------------
+# query – run a list query against the store and show how it was planned
+# ---------------------------------------------------------------------------
+def cmd_query(args):
+    from bitmaps import FACET_FIELDS
+    from query import Entity, QueryEngine
+    from store import open_store
+
+    engine = QueryEngine(open_store())
+    entity = engine.register(Entity(args.kind, args.kind, filter_fields=FACET_FIELDS[args.kind], newest_first=args.kind == "hazards"))
+    filters = {}
+    for item in args.filter:
+        field, _, value = item.partition("=")
+        filters.setdefault(field, []).append(value)
+    try:
+        steps = engine.plan(entity.name, args.text, as_of=args.as_of, **filters)
+        started = time.perf_counter()
+        rows = engine.run(entity.name, args.text, as_of=args.as_of, **filters)
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        engine.run(entity.name, args.text, as_of=args.as_of, **filters)
+        warm = time.perf_counter() - started
+    except ValueError as exc:
+        print(exc)
+        return 1
+    print("plan: " + " -> ".join(steps))
+    for row in rows[:args.limit]:
+        print(f"{row['id']:<14}{row.get('status') or '':<18}{row.get('title') or row.get('action') or ''}")
+    print(f"{len(rows):,} rows in {cold * 1e3:.1f} ms (includes building indexes); repeated: {warm * 1e6:.0f} µs from the result cache")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# bench-sort – sorted table pages: sorting the result per request vs walking the sort indexes
+# ---------------------------------------------------------------------------
+def _sorted_pages(engine, name, field, descending, size, **query) -> list:
+    """Every page of a sorted query, by following Next cursors (ids, in order)."""
+    from bitmaps import sort_key
+
+    ids, cursor = [], None
+    while True:
+        start, rows, total = engine.sorted_page(name, field, descending, cursor, size, **query)
+        if start != len(ids) or not rows:
+            break
+        ids += [r["id"] for r in rows]
+        last = rows[-1]
+        cursor = {"after": last["id"], "key": sort_key(field, last.get(field)), "at": start + len(rows) - 1}
+        if len(ids) >= total:
+            break
+    return ids
+
+
+def cmd_bench_sort(args):
+    from bitmaps import sort_key
+    from query import Entity, QueryEngine, sort_rows
+    from store import MemoryHazardStore
+
+    store = MemoryHazardStore()
+    store.add_many(list(_search_corpus(args.count)))
+    samples = ({"id": "HZ-0001", "title": "Vehicle-pedestrian conflict at gate B12", "category": "Airside / Ramp", "perceived_risk": "High", "status": "Triage"},)
+    engine = QueryEngine(store)
+    engine.register(Entity("hazards", "hazards", samples, newest_first=True))
+    started = time.perf_counter()
+    engine.bitmaps("hazards")
+    print(f"{args.count:,} hazards, bitmaps and sort indexes built in {time.perf_counter() - started:.1f}s")
+    cases = [
+        ("title", False, {}),
+        ("perceived_risk", True, {}),
+        ("status", False, {"category": "Airside / Ramp"}),
+        ("category", True, {"text": "gate b1"}),
+        ("title", False, {"status": "Triage", "perceived_risk": ["High", "Critical"]}),
+    ]
+    failures = 0
+    print(f"{'sort':<22}{'query':<60}{'sort ms':>12}{'page ms':>9}{'page 10 ms':>11}{'rows':>9}")
+    for field, descending, query in cases:
+        text = query.pop("text", "")
+        engine.run("hazards", text, **query)  # a cached result: time only the per-request sort
+        started = time.perf_counter()
+        expected = sort_rows(engine.run("hazards", text, **query), field, descending)[:args.page]
+        sort_ms = (time.perf_counter() - started) * 1e3
+        engine.select("hazards", text, **query)  # the selection is cached like a result; time the page walk
+        started = time.perf_counter()
+        _, rows, total = engine.sorted_page("hazards", field, descending, None, args.page, text, **query)
+        page_ms = (time.perf_counter() - started) * 1e3
+        cursor = None
+        for _ in range(9):
+            last = rows[-1]
+            cursor = {"after": last["id"], "key": sort_key(field, last.get(field)), "at": 0}
+            _, rows, _ = engine.sorted_page("hazards", field, descending, cursor, args.page, text, **query)
+        started = time.perf_counter()
+        engine.sorted_page("hazards", field, descending, cursor, args.page, text, **query)
+        deep = (time.perf_counter() - started) * 1e3
+        _, first, _ = engine.sorted_page("hazards", field, descending, None, args.page, text, **query)
+        if [r["id"] for r in first] != [r["id"] for r in expected]:
+            failures += 1
+            print(f"  MISMATCH first page sorted by {field}")
+        shown = f"{field}{' desc' if descending else ''}"
+        print(f"{shown:<22}{json.dumps(dict(query, text=text) if text else query):<60}{sort_ms:>12.1f}{page_ms:>9.2f}{deep:>11.2f}{total:>9,}")
+    # Paging all the way through (and after writes) gives exactly the sorted result
+    narrow = {"status": "Triage", "category": "Airside / Ramp"}
+    for field in ("title", "perceived_risk", "status"):
+        for descending in (False, True):
+            if _sorted_pages(engine, "hazards", field, descending, args.page, **narrow) != [r["id"] for r in sort_rows(engine.run("hazards", **narrow), field, descending)]:
+                failures += 1
+                print(f"  MISMATCH paging through {field}{' desc' if descending else ''}")
+    with store._lock:  # no edit API for text fields yet; simulate one
+        store._stamp("hazards", [(h["id"], dict(h.to_dict(), title="Revised " + h["title"])) for h in store.all()[:2000]])
+    for h in store.all()[2000:3000]:
+        store.set_status(h["id"], "Triage")
+    store.remove([h["id"] for h in store.all()[3000:3500]])
+    for field in ("title", "status"):
+        got = _sorted_pages(engine, "hazards", field, False, args.page, **narrow)
+        if got != [r["id"] for r in sort_rows(engine.run("hazards", **narrow), field, False)]:
+            failures += 1
+            print(f"  MISMATCH after writes, sorted by {field}")
+    print("OK: sorted pages match sorting the whole result" if not failures else f"FAILED: {failures} mismatches")
+    return 0 if not failures else 1
+
+
+# ---------------------------------------------------------------------------
+# bench-typing – search requests per typing session: every keystroke vs debounced, with and without sequencing
+# ---------------------------------------------------------------------------
+_TYPED = ["gate b12", "fuel spill", "belt loader near stand 7", "de-icing", "jet blast", "wing tip cone",
+          "baggage cart", "marshaller", "pushback tug", "catering truck", "GPU cable", "cargo bay"]
+
+
+def _keystrokes(rng, phrase):
+    """(pause before the keystroke, text after it) for one typed phrase: 60–220 ms between keys, with
+    the odd longer pause to think, and backspacing over a typo now and then."""
+    text = ""
+    yield rng.uniform(0.8, 1.5), ""  # reading the last results, then clearing the box
+    for ch in phrase:
+        if ch.isalpha() and rng.random() < 0.08:
+            yield rng.uniform(0.06, 0.22), text + rng.choice("qxz")
+            yield rng.uniform(0.15, 0.35), text
+        text += ch
+        yield (rng.uniform(0.35, 0.9) if rng.random() < 0.12 else rng.uniform(0.06, 0.22)), text
+
+
+def _typing_run(engine, sessions, debounce, sequencer, workers, seed, page):
+    """Replay `sessions` people typing searches in real time against `engine`, through a pool of
+    `workers` with 20–600 ms of network delay each way. Returns the counters for one scenario."""
+    import heapq
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    lock = threading.Lock()
+    counts = {"keystrokes": 0, "sent": 0, "ran": 0, "dropped": 0, "discarded": 0, "wasted": 0, "stale": 0}
+    latest_sent = {}  # session -> highest seq sent
+    shown = {}  # session -> seq of the result the browser shows
+    pool = ThreadPoolExecutor(max_workers=workers)
+    timers = []
+
+    def later(delay, fn, *a):
+        timer = threading.Timer(delay, fn, a)
+        timer.daemon = True
+        with lock:
+            timers.append(timer)
+        timer.start()
+
+    def respond(session, seq):
+        with lock:
+            shown[session] = seq  # the browser shows responses in the order they arrive
+
+    def handle(rng, session, seq, text):
+        if sequencer is not None and not sequencer.begin(session, "hazards", seq):
+            with lock:
+                counts["dropped"] += 1
+            return
+        engine.page(engine.run("hazards", text), None, page)
+        with lock:
+            counts["ran"] += 1
+            if latest_sent[session] > seq:
+                counts["wasted"] += 1  # superseded before its result could be used
+        if sequencer is not None and not sequencer.finish(session, "hazards", seq):
+            with lock:
+                counts["discarded"] += 1
+            return
+        later(rng.uniform(0.02, 0.6), respond, session, seq)
+
+    def send(rng, session, seq, text):
+        with lock:
+            counts["sent"] += 1
+            latest_sent[session] = seq
+        later(rng.uniform(0.02, 0.6), lambda: pool.submit(handle, random.Random(rng.random()), session, seq, text))
+
+    def typist(n):
+        rng = random.Random(seed * 1000 + n)
+        session, seq = f"session-{n}", 0
+        keys = [k for _ in range(3) for k in _keystrokes(rng, rng.choice(_TYPED))]
+        for i, (pause, text) in enumerate(keys):
+            time.sleep(pause)
+            with lock:
+                counts["keystrokes"] += 1
+            quiet = keys[i + 1][0] if i + 1 < len(keys) else float("inf")
+            if debounce and quiet < debounce:
+                continue  # the next key comes before the debounce timer fires
+            seq += 1
+            if debounce:
+                time.sleep(debounce)  # sent once the timer fires; the next key only after it
+                keys[i + 1:i + 2] = [(max(0.0, quiet - debounce), keys[i + 1][1])] if i + 1 < len(keys) else []
+            send(rng, session, seq, text)
+        return session, seq
+
+    threads = [threading.Thread(target=typist, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    while True:  # let the requests in flight land
+        time.sleep(0.7)
+        with lock:
+            pending = [t for t in timers if t.is_alive()]
+        if not pending:
+            break
+    pool.shutdown(wait=True)
+    time.sleep(0.7)
+    counts["stale"] = sum(1 for session, seq in latest_sent.items() if shown.get(session) != seq)
+    return counts
+
+
+def cmd_bench_typing(args):
+    from query import Entity, QueryEngine
+    from sequencing import RequestSequencer
+    from store import MemoryHazardStore
+
+    from config import SEARCH_DEBOUNCE_SECONDS
+
+    store = MemoryHazardStore()
+    store.add_many(list(_search_corpus(args.count)))
+    engine = QueryEngine(store)
+    engine.register(Entity("hazards", "hazards", (), newest_first=True))
+    engine.run("hazards", "warm up")
+    debounce = SEARCH_DEBOUNCE_SECONDS if args.debounce is None else args.debounce
+    print(f"{args.count:,} hazards, {args.sessions} people typing 3 searches each, {args.workers} workers, "
+          f"20–600 ms network delay each way, debounce {debounce}s")
+    print(f"{'scenario':<34}{'keys':>7}{'sent':>7}{'ran':>7}{'dropped':>9}{'discarded':>11}{'wasted':>8}{'stale':>7}")
+    for label, delay, sequenced in (
+        ("every keystroke", 0, False),
+        ("every keystroke + sequencing", 0, True),
+        ("debounced", debounce, False),
+        ("debounced + sequencing", debounce, True),
+    ):
+        with tempfile.TemporaryDirectory(prefix="hirs-typing-") as tmp:
+            sequencer = RequestSequencer(os.path.join(tmp, "requests.db")) if sequenced else None
+            c = _typing_run(engine, args.sessions, delay, sequencer, args.workers, args.seed, args.page)
+        print(f"{label:<34}{c['keystrokes']:>7}{c['sent']:>7}{c['ran']:>7}{c['dropped']:>9}{c['discarded']:>11}{c['wasted']:>8}{c['stale']:>7}")
+    print("ran: searches executed; wasted: of those, already superseded by a newer keystroke when they finished;\n"
+          "stale: sessions left showing an older search than the last one typed")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# bench-rows – list callback rendering: building every row vs the rendered-row cache
+# ---------------------------------------------------------------------------
+def cmd_bench_rows(args):
+    import random
+
+    os.environ["HIRS_HAZARD_STORE"] = "memory"  # the app's own store is not used; keep it off disk
+    os.environ["HIRS_DATA_DIR"] = tempfile.mkdtemp(prefix="hirs-rows-")
+    from dash import html
+    from plotly.io.json import to_json_plotly
+
+    import dash_app
+    from config import CAPA_ACTION_TYPES, CAPA_PRIORITIES
+    from records import CapaRecord
+
+    rng = random.Random(args.seed)
+    actions = [
+        CapaRecord(id=f"CA-{i:06d}", action=f"Replace worn chocks at stand {i % 40}", type=CAPA_ACTION_TYPES[i % len(CAPA_ACTION_TYPES)],
+                   priority=CAPA_PRIORITIES[(i // 3) % len(CAPA_PRIORITIES)], hazard_id=f"HZ-{i // 2:07d}",
+                   due_date=f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}", status=("Open", "In Progress", "Closed")[i % 3], version=i + 1)
+        for i in range(args.count)
+    ]
+    # What people flip between: the list, a few dropdown filters and their pages, over and over
+    views = [actions]
+    views += [[a for a in actions if a["priority"] == p] for p in CAPA_PRIORITIES]
+    views += [[a for a in actions if a["type"] == t] for t in CAPA_ACTION_TYPES]
+    requests = [(view, rng.randrange(3) * args.page) for view in (rng.choice(views) for _ in range(args.requests))]
+
+    def components(rows):
+        """The table body as list callbacks built it before: a fresh component tree per row."""
+        (_, name_cell, _), *columns = dash_app.LIST_VIEWS["capa"]["columns"]
+        icons = (("👁", "view", "View"), ("✏️", "edit", "Edit"), ("🗑", "delete", "Delete"))
+        body = []
+        for i, row in enumerate(rows):
+            cells = [html.Td(name_cell(row), className="hazards-td-name")]
+            cells += [html.Td(cell(row)) for _, cell, _ in columns]
+            buttons = [html.Button(icon, id={"type": f"capa-action-{name}", "index": row["id"]}, className=f"hazards-action hazards-action-{name}", title=title, n_clicks=0)
+                       for icon, name, title in icons]
+            cells.append(html.Td(html.Div(buttons, className="hazards-actions-cell"), className="hazards-td-actions"))
+            body.append(html.Tr(cells, className="hazards-tr-even" if i % 2 == 0 else "hazards-tr-odd"))
+        return html.Tbody(body)
+
+    def cached(rows):
+        return html.Tbody([dash_app._list_row("capa", row, i % 2 == 1) for i, row in enumerate(rows)])
+
+    print(f"{args.count:,} CAPA actions, {len(views)} filter views, {args.requests} callbacks of {args.page} rows")
+    print(f"{'rows':<22}{'build ms':>10}{'encode ms':>11}{'total ms':>10}{'bytes':>10}")
+    encoded = {}
+    for label, render in (("built every time", components), ("rendered-row cache", cached)):
+        dash_app._ROW_CACHE.clear()
+        build = encode = 0.0
+        for view, start in requests:
+            started = time.perf_counter()
+            body = render(view[start:start + args.page])
+            built = time.perf_counter()
+            data = to_json_plotly(body)
+            build, encode = build + built - started, encode + time.perf_counter() - built
+        encoded[label] = data
+        n = len(requests)
+        print(f"{label:<22}{build / n * 1e3:>10.2f}{encode / n * 1e3:>11.2f}{(build + encode) / n * 1e3:>10.2f}{len(data):>10,}")
+    stats = dash_app.ROW_CACHE_STATS
+    print(f"row cache: {stats['hits']:,} hits, {stats['misses']:,} misses")
+    same = len({json.dumps(json.loads(data), sort_keys=True) for data in encoded.values()}) == 1
+    print("OK: both send the same JSON" if same else "FAILED: the cached rows encode differently")
+    return 0 if same else 1
+
+
+# ---------------------------------------------------------------------------
+# bench-grid – scrolling a whole register: one table of every row vs the scroll view's row blocks
+# ---------------------------------------------------------------------------
+def cmd_bench_grid(args):
+    import random
+
+    os.environ["HIRS_HAZARD_STORE"] = "memory"
+    os.environ["HIRS_DATA_DIR"] = tempfile.mkdtemp(prefix="hirs-grid-")
+    from plotly.io.json import to_json_plotly
+
+    import dash_app
+    from config import LIST_GRID_BLOCK
+
+    dash_app.STORE.add_many(list(_search_corpus(args.count)))
+    query = dash_app.QUERIES.compile("hazards", "")
+    rows = dash_app.QUERIES.run("hazards")
+    print(f"{len(rows):,} hazards")
+    print(f"{'':<38}{'ms':>9}{'rows sent':>11}{'bytes':>13}")
+    started = time.perf_counter()
+    data = to_json_plotly(dash_app._list_table("hazards", rows, total=len(rows)))
+    print(f"{'one table of every row':<38}{(time.perf_counter() - started) * 1e3:>9.0f}{len(rows):>11,}{len(data):>13,}")
+    for field in (None, "title"):
+        table, view = dash_app._paged_list("hazards", {"grid": True, "sort": field}, query)
+        started = time.perf_counter()
+        table, view = dash_app._paged_list("hazards", {"grid": True, "sort": field}, query)
+        data = to_json_plotly(table)
+        label = "scroll view, first render" + (f" by {field}" if field else "")
+        print(f"{label:<38}{(time.perf_counter() - started) * 1e3:>9.1f}{data.count('hazards-tr-'):>11,}{len(data):>13,}")
+        rng = random.Random(args.seed)
+        times, sizes = [], []
+        blocks = len(rows) // LIST_GRID_BLOCK
+        for _ in range(args.fetches):
+            first = rng.randrange(blocks)
+            started = time.perf_counter()
+            data = to_json_plotly(dash_app._grid_window("hazards", dash_app._grid_rows("hazards", view), first, first + 1))
+            times.append((time.perf_counter() - started) * 1e3)
+            sizes.append(len(data))
+        times.sort()
+        label = "  block fetch while scrolling, p50/p95"
+        print(f"{label:<38}{times[len(times) // 2]:>5.1f}/{times[int(len(times) * 0.95)]:<4.1f}{3 * LIST_GRID_BLOCK:>10,}{sum(sizes) // len(sizes):>13,}")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# bench-snapshot – client-side filtering: what the browser downloads vs a server round trip per filter change
+# ---------------------------------------------------------------------------
+def cmd_bench_snapshot(args):
+    import gzip
+    import random
+
+    os.environ["HIRS_HAZARD_STORE"] = "memory"
+    os.environ["HIRS_DATA_DIR"] = tempfile.mkdtemp(prefix="hirs-snapshot-")
+    from plotly.io.json import to_json_plotly
+
+    import dash_app
+    from config import HAZARD_AREAS, WORKFLOW_STATUSES
+    from snapshots import snapshot_delta
+
+    dash_app.STORE.add_many(list(_search_corpus(args.count)))
+    rng = random.Random(args.seed)
+
+    def sent(label, build):
+        started = time.perf_counter()
+        data = build()
+        elapsed = (time.perf_counter() - started) * 1e3
+        body = json.dumps(data, separators=(",", ":")).encode()
+        print(f"{label:<40}{elapsed:>9.1f}{len(body):>12,}{len(gzip.compress(body)):>12,}")
+        return data
+
+    print(f"{args.count:,} hazards")
+    print(f"{'':<40}{'ms':>9}{'bytes':>12}{'gzipped':>12}")
+    full = sent("full snapshot (first visit)", lambda: snapshot_delta(dash_app.STORE, None, dash_app.SAMPLE_HAZARDS))
+    for h in rng.sample(dash_app.STORE.all(), args.changes):
+        dash_app.change_hazard_status(h["id"], rng.choice(WORKFLOW_STATUSES), "bench")
+    sent(f"delta after {args.changes} status changes", lambda: snapshot_delta(dash_app.STORE, full["version"], dash_app.SAMPLE_HAZARDS))
+    words = ["stand", "gate", "spill", "fuel", "cone", "b12", "lighting", "pusback"]
+    queries = [(rng.choice([""] + WORKFLOW_STATUSES), rng.choice([""] + HAZARD_AREAS), " ".join(rng.sample(words, rng.randrange(3))))
+               for _ in range(args.queries)]
+    elapsed = size = 0
+    for status, category, text in queries:
+        started = time.perf_counter()
+        table, view = dash_app._hazards_list(status, category, text, [], None, {}, paging=False)
+        size += len(to_json_plotly([table, view]))
+        elapsed += time.perf_counter() - started
+    n = len(queries)
+    print(f"{'server, per filter change':<40}{elapsed / n * 1e3:>9.1f}{size // n:>12,}")
+    print(f"{n} filter changes: {elapsed * 1e3:,.0f} ms of server time and {size:,} response bytes as round trips;\n"
+          f"none with client-side filtering (assets/snapshot.js filters in the browser; not timed here)")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# bench-pages – worker CPU per navigation to a static page, built each time vs stored JSON + ETag
+# ---------------------------------------------------------------------------
+def _worker_cpu(pid: int) -> float:
+    """CPU seconds (user + system) a process has used so far (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _gunicorn_navigations(port: int, cached: bool, navigations: int, pages) -> dict:
+    """Start one gunicorn worker with the static page cache on or off and navigate between the static
+    pages the way the browser does: the page-content callback, plus (cached) the page JSON revalidated
+    with its ETag. Returns the worker's CPU, bytes received and wall time."""
+    import socket
+    import subprocess
+    import urllib.error
+    import urllib.request
+
+    env = dict(os.environ, HIRS_HAZARD_STORE="memory", HIRS_DATA_DIR=tempfile.mkdtemp(prefix="hirs-pages-"),
+               HIRS_STATIC_PAGE_CACHE="1" if cached else "0")
+    master = subprocess.Popen(["gunicorn", "dash_app:server", "--workers", "1", "--bind", f"127.0.0.1:{port}"],
+                              cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(base + "/_dash-dependencies") as r:
+                    dependencies = json.load(r)
+                break
+            except (urllib.error.URLError, ConnectionError, socket.error):
+                if time.time() > deadline or master.poll() is not None:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+        with open(f"/proc/{master.pid}/task/{master.pid}/children") as f:
+            worker = int(f.read().split()[0])
+        output = next(d["output"] for d in dependencies if d["output"].startswith("..page-content.children"))
+        etags, received = {}, 0
+
+        def navigate(name):
+            nonlocal received
+            payload = {"output": output, "outputs": [{"id": "page-content", "property": "children"}, {"id": "url", "property": "pathname"}],
+                       "inputs": [{"id": "url", "property": "pathname", "value": f"/{name}"},
+                                  {"id": "auth-store", "property": "data", "value": {"logged_in": True}}],
+                       "changedPropIds": ["url.pathname"], "state": []}
+            request = urllib.request.Request(base + "/_dash-update-component", data=json.dumps(payload).encode(),
+                                             headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request) as r:
+                received += len(r.read())
+            if cached:
+                request = urllib.request.Request(f"{base}/_hirs/pages/{name}.json", headers={"If-None-Match": etags.get(name, "")})
+                try:
+                    with urllib.request.urlopen(request) as r:
+                        received += len(r.read())
+                        etags[name] = r.headers["ETag"]
+                except urllib.error.HTTPError as exc:
+                    if exc.code != 304:
+                        raise
+
+        for name in pages:  # warm up: first visits
+            navigate(name)
+        cpu, started = _worker_cpu(worker), time.perf_counter()
+        for i in range(navigations):
+            navigate(pages[i % len(pages)])
+        return {"cpu": _worker_cpu(worker) - cpu, "wall": time.perf_counter() - started, "bytes": received}
+    finally:
+        master.terminate()
+        master.wait()
+
+
+def cmd_bench_pages(args):
+    import socket
+
+    if not os.path.exists("/proc/self/stat"):
+        print("bench-pages reads worker CPU time from /proc (Linux only)")
+        return 1
+    pages = ["requirements", "reference", "exports", "admin"]
+    print(f"{args.navigations} navigations between {', '.join(pages)} on one gunicorn worker")
+    print(f"{'':<30}{'CPU ms/nav':>12}{'wall ms/nav':>13}{'bytes/nav':>11}")
+    results = {}
+    for label, cached in (("built on every navigation", False), ("stored JSON + ETag (304)", True)):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        r = results[label] = _gunicorn_navigations(port, cached, args.navigations, pages)
+        n = args.navigations
+        print(f"{label:<30}{r['cpu'] / n * 1e3:>12.2f}{r['wall'] / n * 1e3:>13.2f}{r['bytes'] // n:>11,}")
+    built, stored = results.values()
+    print(f"worker CPU saved per navigation: {(built['cpu'] - stored['cpu']) / args.navigations * 1e3:.2f} ms "
+          "(CPU time is counted in clock ticks: use a few hundred navigations)")
+    return 0
+
+
+# ---------------------------------------------------------------------------
+# bench-figures – chart pages: go.Figure per chart per view vs figure dicts and the figure cache
+# ---------------------------------------------------------------------------
+def _page_figures(node, out):
+    """Every dcc.Graph figure in a page's JSON, in layout order."""
+    if isinstance(node, dict):
+        if node.get("type") == "Graph":
+            out.append(node["props"].get("figure"))
+        for value in node.values():
+            _page_figures(value, out)
+    elif isinstance(node, list):
+        for value in node:
+            _page_figures(value, out)
+    return out
+
+
+def cmd_bench_figures(args):
+    import random
+
+    os.environ["HIRS_HAZARD_STORE"] = "memory"
+    os.environ["HIRS_DATA_DIR"] = tempfile.mkdtemp(prefix="hirs-figures-")
+    from plotly.io.json import to_json_plotly
+
+    import dash_app
+    from config import WORKFLOW_STATUSES
+
+    dash_app.STORE.add_many(list(_search_corpus(args.count)))
+    pages = ("dashboard_page", "report_page", "hazards_page", "capa_page", "investigation_page", "risk_triage_page")
+    rng = random.Random(args.seed)
+    views = [rng.choice(pages) for _ in range(args.views)]
+    hazard_ids = [h["id"] for h in dash_app.STORE.all()]
+    modes = (
+        ("go.Figure, built every view", False, True, 0),
+        ("figure dicts, built every view", False, False, 0),
+        ("figure cache", True, False, 0),
+        (f"figure cache, a write every {args.write_every}", True, False, args.write_every),
+    )
+    figures = {}
+    print(f"{args.count:,} hazards, {args.views} page views over {len(pages)} chart pages")
+    print(f"{'':<36}{'dashboard ms':>13}{'per view ms':>13}{'hit rate':>10}")
+    for label, enabled, validate, write_every in modes:
+        cache = dash_app.FIGURES
+        cache.enabled, cache.validate = enabled, validate
+        cache.clear()
+        cache.stats.update(hits=0, misses=0)
+        figures[label] = [_page_figures(json.loads(to_json_plotly(getattr(dash_app, page)())), []) for page in pages]
+        dashboard = total = 0.0
+        for i, page in enumerate(views):
+            if write_every and i % write_every == 0:
+                dash_app.change_hazard_status(rng.choice(hazard_ids), rng.choice(WORKFLOW_STATUSES), "bench")
+            started = time.perf_counter()
+            to_json_plotly(getattr(dash_app, page)())
+            elapsed = time.perf_counter() - started
+            total += elapsed
+            if page == "dashboard_page":
+                dashboard = min(dashboard or elapsed, elapsed)
+        looked_up = cache.stats["hits"] + cache.stats["misses"]
+        hit_rate = f"{cache.stats['hits'] / looked_up:.0%}" if looked_up else "-"
+        print(f"{label:<36}{dashboard * 1e3:>13.2f}{total / len(views) * 1e3:>13.2f}{hit_rate:>10}")
+    reference = figures[modes[0][0]]
+    same = all(figures[label] == reference for label, *_ in modes)
+    print(f"dashboard ms is the fastest render (build + JSON); figures identical across paths: {'yes' if same else 'NO'}")
+    return 0 if same else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HIRS management commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("stress-ids", help="Allocate IDs from many threads and processes and check they are unique")
+    p.add_argument("--processes", type=int, default=4)
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--per-thread", type=int, default=500)
+    p.add_argument("--block-size", type=int, default=20)
+    p.set_defaults(func=cmd_stress_ids)
+
+    p = sub.add_parser("bench-records", help="Compare memory held by hazards as dicts vs slotted records")
+    p.add_argument("--count", type=int, default=1_000_000)
+    p.set_defaults(func=cmd_bench_records)
+
+    p = sub.add_parser("import-hazards", help="Bulk-import historical hazard reports from CSV or JSONL")
+    p.add_argument("path")
+    p.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension")
+    p.add_argument("--batch-size", type=int, default=None)
+    p.add_argument("--dry-run", action="store_true", help="Validate only; nothing is written")
+    p.set_defaults(func=cmd_import_hazards)
+
+    p = sub.add_parser("archive", help="Archive old Closed/Rejected reports and purge partitions past retention")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("search-archive", help="Search archived reports")
+    p.add_argument("text", nargs="?", default="")
+    p.add_argument("--status")
+    p.add_argument("--from", dest="date_from", help="YYYY-MM or ISO date")
+    p.add_argument("--to", dest="date_to", help="YYYY-MM or ISO date")
+    p.add_argument("--limit", type=int, default=50)
+    p.set_defaults(func=cmd_search_archive)
+
+    p = sub.add_parser("audit-history", help="Show the audit trail for one entity or a date range")
+    p.add_argument("entity_id", nargs="?")
+    p.add_argument("--from", dest="date_from", help="ISO date or timestamp")
+    p.add_argument("--to", dest="date_to", help="ISO date or timestamp")
+    p.set_defaults(func=cmd_audit_history)
+
+    p = sub.add_parser("bench-audit", help="Measure audit append latency (target: p99 under 1 ms)")
+    p.add_argument("--count", type=int, default=20_000)
+    p.add_argument("--segment-bytes", type=int, default=1024 * 1024)
+    p.set_defaults(func=cmd_bench_audit)
+
+    p = sub.add_parser("verify-audit", help="Verify the audit chain and segment Merkle roots in parallel")
+    p.add_argument("--workers", type=int, default=None, help="Processes to use (default: one per CPU)")
+    p.set_defaults(func=cmd_verify_audit)
+
+    p = sub.add_parser("verify-audit-csv", help="Check the inclusion proofs in an Audit trail CSV export")
+    p.add_argument("path")
+    p.set_defaults(func=cmd_verify_audit_csv)
+
+    p = sub.add_parser("backup", help="Incremental online backup of the store, audit trail and attachments")
+    p.set_defaults(func=cmd_backup)
+
+    p = sub.add_parser("verify-backup", help="Re-check every chunk checksum of a backup")
+    p.add_argument("name", nargs="?", help="Default: the latest backup")
+    p.set_defaults(func=cmd_verify_backup)
+
+    p = sub.add_parser("restore", help="Restore a backup into an empty directory and report how long it took")
+    p.add_argument("name", nargs="?", help="Default: the latest backup")
+    p.add_argument("--target", help="Empty directory to restore into (default: a new temporary directory – a drill)")
+    p.set_defaults(func=cmd_restore)
+
+    p = sub.add_parser("bench-search", help="Compare hazard search latency per keystroke: linear scan vs trigram index")
+    p.add_argument("--count", type=int, default=500_000)
+    p.add_argument("--query", default="gate b12")
+    p.set_defaults(func=cmd_bench_search)
+
+    p = sub.add_parser("bench-search-keys", help="Compare allocations per search: lowercasing every field vs cached search keys")
+    p.add_argument("--count", type=int, default=100_000)
+    p.set_defaults(func=cmd_bench_search_keys)
+
+    p = sub.add_parser("bench-fuzzy", help="Time typo-tolerant lookups against an edit-distance scan of the vocabulary")
+    p.add_argument("--count", type=int, default=1_000_000)
+    p.add_argument("--words", type=int, default=50_000, help="Made-up words mixed into the descriptions")
+    p.add_argument("--queries", type=int, default=300)
+    p.add_argument("--scan", type=int, default=30, help="Queries also timed against every word")
+    p.add_argument("--check", type=int, default=5000, help="Rows in the index checked against the linear filter")
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_bench_fuzzy)
+
+    p = sub.add_parser("bench-filters", help="Compare dropdown filters and KPI counts: list scans vs filter bitmaps")
+    p.add_argument("--count", type=int, default=500_000)
+    p.set_defaults(func=cmd_bench_filters)
+
+    p = sub.add_parser("query", help="Run a list query against the store and show its plan")
+    p.add_argument("kind", choices=["hazards", "capa", "investigations"])
+    p.add_argument("text", nargs="?", default="")
+    p.add_argument("--filter", action="append", default=[], metavar="FIELD=VALUE", help="Repeat a field to OR values")
+    p.add_argument("--as-of", help="ISO timestamp: query the register as it stood then")
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_query)
+
+    p = sub.add_parser("bench-sort", help="Compare sorted table pages: sorting each result vs walking the sort indexes")
+    p.add_argument("--count", type=int, default=200_000)
+    p.add_argument("--page", type=int, default=50)
+    p.set_defaults(func=cmd_bench_sort)
+
+    p = sub.add_parser("bench-typing", help="Replay people typing searches: callbacks run per session with and without debounce and sequencing")
+    p.add_argument("--count", type=int, default=100_000)
+    p.add_argument("--sessions", type=int, default=12)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--debounce", type=float, help="Seconds (default: SEARCH_DEBOUNCE_SECONDS)")
+    p.add_argument("--page", type=int, default=50)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_bench_typing)
+
+    p = sub.add_parser("bench-rows", help="Compare list callback rendering: building every table row vs the rendered-row cache")
+    p.add_argument("--count", type=int, default=20_000)
+    p.add_argument("--page", type=int, default=200)
+    p.add_argument("--requests", type=int, default=300)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_bench_rows)
+
+    p = sub.add_parser("bench-grid", help="Compare sending a whole register as one table vs the scroll view's row blocks")
+    p.add_argument("--count", type=int, default=50_000)
+    p.add_argument("--fetches", type=int, default=200)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_bench_grid)
+
+    p = sub.add_parser("bench-snapshot", help="Compare the client-side filtering snapshot and its deltas with a server round trip per filter change")
+    p.add_argument("--count", type=int, default=5_000)
+    p.add_argument("--changes", type=int, default=50)
+    p.add_argument("--queries", type=int, default=300)
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_bench_snapshot)
+
+    p = sub.add_parser("bench-pages", help="Measure gunicorn worker CPU per navigation to a static page: built each time vs stored JSON with an ETag")
+    p.add_argument("--navigations", type=int, default=400)
+    p.set_defaults(func=cmd_bench_pages)
+
+    p = sub.add_parser("bench-figures", help="Compare chart page renders: go.Figure per chart vs figure dicts and the figure cache")
+    p.add_argument("--count", type=int, default=2_000)
+    p.add_argument("--views", type=int, default=200)
+    p.add_argument("--write-every", type=int, default=10, help="Page views between hazard writes in the last run")
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(func=cmd_bench_figures)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,484 @@
+"""
+HIRS list queries: one declarative query layer behind the Hazards, CAPA and Investigation lists.
+
+An Entity describes a list: which store rows it shows, the fixed sample rows listed before them,
+the fields its search box matches, the fields it can be filtered on and its order. The engine
+plans each query against the indexes kept for that kind of row – filter bitmaps (bitmaps.py) and
+the trigram search index (search.py), both over one shared table of its records (tables.py) –
+starting from whichever narrows the rows most, checks the
+remaining conditions on the rows it got, and caches the result against the store's change
+number, so a repeated query on an unchanged register is answered from memory.
+
+The search boxes also take a small query syntax, compiled straight to those index operations:
+
+    status:Triage station:"Main Ramp" risk>=High created:>2026-01-01 fod
+
+field:value (or field=value; commas OR values), <, <=, >, >= on risk / priority levels and on
+dates (YYYY, YYYY-MM or YYYY-MM-DD, also written created:>2026-01-01), and everything else is
+free text matched as one phrase. Only the entity's field names start a term ("Note: FOD at stand"
+and "ETA=10" are free text); text without any field term is searched exactly as typed.
+With fuzzy matching on (SEARCH_FUZZY), free text also matches rows holding it in a close spelling,
+its longer words in any order (fuzzy.py): "pusback" finds "pushback". Those rows follow the rows
+holding the text as typed.
+A term that cannot be compiled raises QuerySyntaxError instead of falling back to a scan.
+"""
+import heapq
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from itertools import islice
+
+from bitmaps import FACET_FIELDS, LEVELS, RANGE_FIELDS, SORT_FIELDS, BitmapIndex, sort_key
+from records import Vocabulary
+from config import SEARCH_FUZZY
+from fuzzy import covers
+from search import SEARCH_FIELDS, SearchIndex, matches, normalize, search_key
+from store import KIND_CLASSES
+from tables import RecordTable
+
+# Field names the search box accepts per kind -> record field
+QUERY_FIELDS = {
+    "hazards": {"status": "status", "category": "category", "station": "station", "risk": "perceived_risk", "created": "created_at"},
+    "capa": {"status": "status", "type": "type", "priority": "priority", "due": "due_date"},
+    "investigations": {"status": "status", "lead": "lead", "started": "started"},
+}
+_TERM = re.compile(
+    r"""(?P<field>[A-Za-z_]\w*)(?P<op>:?(?:>=|<=|>|<)|[:=])(?:"(?P<quoted>[^"]*)"|(?P<value>[^\s"]*))"""
+    r"""|"(?P<phrase>[^"]*)"|(?P<word>\S+)"""
+)
+_DATE = re.compile(r"(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?")
+
+
+class QuerySyntaxError(ValueError):
+    """A search-box query that cannot be compiled to index operations; the message is shown to the user."""
+
+
+class Entity:
+    """One list. `kind` is the store kind ("hazards", "capa", "investigations"), or None for a list
+    of fixed rows only (no indexes: it is scanned)."""
+
+    def __init__(self, name: str, kind: str = None, samples=(), search_fields=None, filter_fields=(), newest_first=False):
+        self.name = name
+        self.kind = kind
+        self.samples = tuple(samples)
+        self.search_fields = tuple(search_fields or SEARCH_FIELDS.get(kind, ()))
+        self.filter_fields = tuple(filter_fields or FACET_FIELDS.get(kind, ()))
+        self.newest_first = newest_first  # list the latest rows first (store order reversed)
+
+
+def _date_range(name: str, op: str, raw: str) -> tuple:
+    """[low, high) ISO string bounds for a date term; None = open."""
+    m = _DATE.fullmatch(raw)
+    if not m:
+        raise QuerySyntaxError(f"{name}: '{raw}' is not a date (YYYY, YYYY-MM or YYYY-MM-DD)")
+    year, month, day = m.groups()
+    try:
+        if day:
+            first = date(int(year), int(month), int(day))
+            start, following = first.isoformat(), (first + timedelta(days=1)).isoformat()
+        elif month:
+            y, mo = int(year), int(month)
+            date(y, mo, 1)
+            start, following = f"{y:04d}-{mo:02d}", f"{y + mo // 12:04d}-{mo % 12 + 1:02d}"
+        else:
+            start, following = year, f"{int(year) + 1:04d}"
+    except ValueError:
+        raise QuerySyntaxError(f"{name}: '{raw}' is not a valid date") from None
+    return {"=": (start, following), ">": (following, None), ">=": (start, None), "<": (None, start), "<=": (None, following)}[op]
+
+
+def row_matches(row, q: str, filters: dict, fields, ranges: dict = None, variants=None) -> bool:
+    """The reference predicate every plan must agree with. `variants` (SearchIndex.variants()) also
+    lets `q` match by its words' spellings."""
+    for field, (low, high) in (ranges or {}).items():
+        value = row.get(field)
+        if not value or (low is not None and value < low) or (high is not None and value >= high):
+            return False
+    for field, wanted in filters.items():
+        value = row.get(field)
+        if isinstance(wanted, tuple):
+            if value not in wanted:
+                return False
+        elif value != wanted:
+            return False
+    return not q or matches(row, q, fields) or (variants is not None and covers(search_key(row, fields), variants))
+
+
+def sort_rows(rows, field: str, descending: bool = False) -> tuple:
+    """Rows in `field` order, then id – the order of the sort indexes, for rows that have none
+    (a past snapshot, archived reports)."""
+    return tuple(sorted(rows, key=lambda r: (sort_key(field, r.get(field)), r["id"]), reverse=descending))
+
+
+class QueryEngine:
+    """Runs list queries for registered entities; results are tuples shared by every caller."""
+
+    def __init__(self, store, cache_size: int = 128, cache_rows: int = 2_000_000, fuzzy: bool = SEARCH_FUZZY):
+        self.store = store
+        self.fuzzy = fuzzy  # free text also matches close spellings of its words
+        self.entities = {}
+        self.cache_size = cache_size
+        self.cache_rows = cache_rows  # cached results hold row references; cap the total held
+        self._cache = OrderedDict()  # query key -> (store version, rows)
+        self._cached_rows = 0
+        self._tables = {}  # kind -> RecordTable the kind's indexes share
+        self._indexes = {}  # ("search" | "bitmaps", kind) -> index
+        self._positions = OrderedDict()  # id(result) -> (result, {row id: position}) for page cursors
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def register(self, entity: Entity) -> Entity:
+        self.entities[entity.name] = entity
+        return entity
+
+    # -- indexes -----------------------------------------------------------
+    def table(self, kind: str) -> RecordTable:
+        """The stored rows of one kind, loaded once and shared by its search index and filter bitmaps."""
+        table = self._tables.get(kind)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(kind)
+                if table is None:
+                    table = self._tables[kind] = RecordTable(self.store, kind)
+        return table
+
+    def _index(self, family: str, kind: str):
+        """Search index / filter bitmaps of one kind, built on first use over the kind's table (then
+        kept current from the store's change feed)."""
+        index = self._indexes.get((family, kind))
+        if index is None:
+            table = self.table(kind)
+            with self._lock:
+                index = self._indexes.get((family, kind))
+                if index is None:
+                    cls = SearchIndex if family == "search" else BitmapIndex
+                    index = self._indexes[(family, kind)] = cls(self.store, kind=kind, table=table)
+        return index
+
+    def bitmaps(self, kind: str) -> BitmapIndex:
+        return self._index("bitmaps", kind)
+
+    def search_index(self, kind: str) -> SearchIndex:
+        return self._index("search", kind)
+
+    def _variants(self, entity: Entity, q: str):
+        """Spellings the free text also matches (from the kind's search index), or None."""
+        if not (self.fuzzy and q and entity.kind and entity.search_fields == SEARCH_FIELDS.get(entity.kind)):
+            return None
+        return self.search_index(entity.kind).variants(q)
+
+    # -- planning ----------------------------------------------------------
+    def _normalise(self, entity: Entity, text: str, filters: dict, ranges: dict = None):
+        wanted = {}
+        for field, value in filters.items():
+            if field not in entity.filter_fields:
+                raise ValueError(f"{entity.name} cannot be filtered on {field!r}")
+            if value is None or value == "" or value == []:
+                continue  # an empty *tuple* is kept: a compiled term nothing can match
+            wanted[field] = tuple(value) if isinstance(value, (list, tuple, set)) else value
+        bounds = {}
+        for field, bound in (ranges or {}).items():
+            if field not in RANGE_FIELDS.get(entity.kind, ()):
+                raise ValueError(f"{entity.name} has no date range on {field!r}")
+            bounds[field] = tuple(bound)
+        return normalize((text or "").strip()), tuple(sorted(wanted.items())), tuple(sorted(bounds.items()))
+
+    def plan(self, name: str, text: str = "", as_of: str = None, ranges: dict = None, **filters) -> list:
+        """Steps a query would run, most selective first, e.g. ["bitmaps status='Triage' (~412 rows)", "check search"]."""
+        entity = self.entities[name]
+        q, wanted, bounds = self._normalise(entity, text, filters, ranges)
+        return self._plan(entity, q, dict(wanted), dict(bounds), as_of)[0]
+
+    def _plan(self, entity: Entity, q: str, filters: dict, ranges: dict, as_of):
+        """(steps, source, bits): where the stored rows come from – "none", "scan" (a past snapshot),
+        "bitmaps" or "search" – and which conditions are then checked row by row."""
+        kind = entity.kind
+        if kind is None:
+            return ["samples only"], "none", None
+        if as_of is not None:
+            return [f"scan snapshot as of {as_of}", "check filters and search"], "scan", None
+        facets = {f: v for f, v in filters.items() if f in FACET_FIELDS[kind]}
+        options = []  # (estimated rows, source, step)
+        bits = None
+        if facets or ranges or not q:
+            bitmaps = self.bitmaps(kind)
+            bits = bitmaps.select(**facets)
+            for field, (low, high) in ranges.items():
+                bits &= bitmaps.range(field, low, high)
+            shown = [f"{f}={v!r}" for f, v in facets.items()] + [f"{f} in [{lo or '…'}, {hi or '…'})" for f, (lo, hi) in ranges.items()]
+            options.append((bits.bit_count(), "bitmaps", "bitmaps " + (" ".join(shown) or "all")))
+        if q and entity.search_fields == SEARCH_FIELDS.get(kind):
+            shown = f"trigram search {q!r}" + (" + spellings" if self.fuzzy else "")
+            options.append((self.search_index(kind).estimate(q, self.fuzzy), "search", shown))
+        if not options:  # custom search fields the index does not cover
+            bits = self.bitmaps(kind).select()
+            options.append((bits.bit_count(), "bitmaps", "bitmaps all"))
+        rows, source, step = min(options, key=lambda option: option[0])
+        steps = [f"{step} (~{rows:,} rows)"]
+        left = [f for f in filters if source != "bitmaps" or f not in facets]
+        left += [f for f in ranges if source != "bitmaps"]
+        if q and source != "search":
+            left.append("search")
+        if left:
+            steps.append("check " + ", ".join(left))
+        return steps, source, bits
+
+    # -- execution ---------------------------------------------------------
+    def run(self, name: str, text: str = "", as_of: str = None, ranges: dict = None, **filters) -> tuple:
+        """Rows of list `name` matching the search text, filters (a value or a list of values each)
+        and date ranges ({field: (low, high)}, half-open), in list order. `as_of` reads the register
+        as it stood at that moment."""
+        entity = self.entities[name]
+        q, wanted, bounds = self._normalise(entity, text, filters, ranges)
+        return self._cached(("rows", name, q, wanted, bounds, as_of), lambda: self._execute(entity, q, dict(wanted), dict(bounds), as_of))
+
+    def _cached(self, key, compute):
+        """compute() for `key`, or its result from the cache while the store has not changed since.
+        Results are tuples; their length counts against cache_rows."""
+        version = self.store.current_version()  # read first: a write during the run only makes the entry stale
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == version:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return cached[1]
+            self.stats["misses"] += 1
+        result = compute()
+        with self._lock:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cached_rows -= len(old[1])
+            self._cache[key] = (version, result)
+            self._cached_rows += len(result)
+            while len(self._cache) > self.cache_size or (self._cached_rows > self.cache_rows and len(self._cache) > 1):
+                _, (_, evicted) = self._cache.popitem(last=False)
+                self._cached_rows -= len(evicted)
+        return result
+
+    def select(self, name: str, text: str = "", ranges: dict = None, **filters) -> tuple:
+        """(matching sample rows, bitset of matching stored rows over the kind's filter bitmaps): what
+        run() returns for the live register, without materialising the stored rows."""
+        entity = self.entities[name]
+        q, wanted, bounds = self._normalise(entity, text, filters, ranges)
+        return self._cached(("bits", name, q, wanted, bounds), lambda: self._select(entity, q, dict(wanted), dict(bounds)))
+
+    def _select(self, entity: Entity, q: str, filters: dict, ranges: dict) -> tuple:
+        fields, variants = entity.search_fields, self._variants(entity, q)
+        samples = tuple(r for r in entity.samples if row_matches(r, q, filters, fields, ranges, variants))
+        _, source, bits = self._plan(entity, q, filters, ranges, None)
+        if source == "none":
+            return samples, 0
+        bitmaps = self.bitmaps(entity.kind)
+        if source == "bitmaps":
+            facets = FACET_FIELDS[entity.kind]
+            left = {f: v for f, v in filters.items() if f not in facets}
+            if q or left:
+                bits = bitmaps.bits_of(r["id"] for r in bitmaps.rows(bits) if row_matches(r, q, left, fields, None, variants))
+        else:
+            found = self.search_index(entity.kind).search(q, fuzzy=self.fuzzy)
+            bits = bitmaps.bits_of(r["id"] for r in found if row_matches(r, "", filters, fields, ranges))
+        return samples, bits
+
+    def _execute(self, entity: Entity, q: str, filters: dict, ranges: dict, as_of) -> tuple:
+        fields, variants = entity.search_fields, self._variants(entity, q)
+        rows = [r for r in entity.samples if row_matches(r, q, filters, fields, ranges, variants)]
+        _, source, bits = self._plan(entity, q, filters, ranges, as_of)
+        if source == "scan":
+            kind = entity.kind
+            stored = self.store.all(as_of=as_of) if kind == "hazards" else self.store.linked(kind, as_of=as_of)
+            rows += [r for r in stored if row_matches(r, q, filters, fields, ranges, variants)]
+        elif source == "bitmaps":
+            facets = FACET_FIELDS[entity.kind]
+            left = {f: v for f, v in filters.items() if f not in facets}
+            stored = self.bitmaps(entity.kind).rows(bits)
+            rows += [r for r in stored if row_matches(r, q, left, fields, None, variants)] if q or left else stored
+        elif source == "search":
+            stored = self.search_index(entity.kind).search(q, fuzzy=self.fuzzy)
+            rows += [r for r in stored if row_matches(r, "", filters, fields, ranges)] if filters or ranges else stored
+        if entity.newest_first:
+            rows.reverse()
+        if variants is not None:  # rows holding the text as typed first, then those matching a spelling
+            exact = [r for r in rows if matches(r, q, fields)]
+            if len(exact) < len(rows):
+                held = set(map(id, exact))
+                rows = exact + [r for r in rows if id(r) not in held]
+        return tuple(rows)
+
+    # -- pages -------------------------------------------------------------
+    def _position_index(self, rows: tuple) -> dict:
+        """{row id: position} over a result, built once per result (cached results are shared)."""
+        with self._lock:
+            entry = self._positions.get(id(rows))
+            if entry is not None and entry[0] is rows:
+                self._positions.move_to_end(id(rows))
+                return entry[1]
+        positions = {}
+        for i, row in enumerate(rows):
+            positions.setdefault(row["id"], i)
+        with self._lock:
+            self._positions[id(rows)] = (rows, positions)  # holding `rows` keeps its id from being reused
+            while len(self._positions) > 16:
+                self._positions.popitem(last=False)
+        return positions
+
+    def page(self, rows: tuple, cursor: dict = None, size: int = 50) -> tuple:
+        """(start, rows[start:start + size]) for one page of a result.
+
+        The cursor is a key, not an offset: {"after": row id} is the page following that row and
+        {"before": row id} the page ending just above it, so reports added at the top of a list while
+        someone pages through it do not shift what "Next" shows. "at" is the row's position when the
+        cursor was made, used if that row has since left the result.
+        """
+        size = max(1, int(size))
+        if not cursor:
+            start = 0
+        else:
+            anchor = cursor.get("after", cursor.get("before"))
+            at = self._position_index(rows).get(anchor)
+            if at is not None:
+                start = at + 1 if "after" in cursor else at - size
+            else:  # the row after the one that left now holds its position
+                at = int(cursor.get("at") or 0)
+                start = at if "after" in cursor else at - size
+        if start >= len(rows):  # past the end (rows removed meanwhile): the last page
+            start = len(rows) - size
+        start = max(0, start)
+        return start, rows[start:start + size]
+
+    def ordered(self, name: str, field: str = None, descending: bool = False, text: str = "", as_of: str = None,
+                ranges: dict = None, **filters) -> tuple:
+        """The whole result of run() in list order, or ordered by `field` (sorted once, then cached
+        like the result itself): for reading arbitrary slices of it, e.g. a scrolled grid."""
+        if not field:
+            return self.run(name, text, as_of, ranges, **filters)
+        q, wanted, bounds = self._normalise(self.entities[name], text, filters, ranges)
+        return self._cached(("sorted", name, field, descending, q, wanted, bounds, as_of),
+                            lambda: sort_rows(self.run(name, text, as_of, ranges, **filters), field, descending))
+
+    def sorted_page(self, name: str, field: str, descending: bool = False, cursor: dict = None, size: int = 50,
+                    text: str = "", as_of: str = None, ranges: dict = None, **filters) -> tuple:
+        """(start, page rows, total) of a query ordered by `field`, then id.
+
+        Pages come from the kind's sort index: a bisect to the cursor and a walk until the page is
+        full, whatever the size of the result. The cursor is {"after" | "before": row id, "key": its
+        sort key, "at": its position} for the page following / preceding that row. A past snapshot
+        has no index and is sorted in memory.
+        """
+        size = max(1, int(size))
+        if as_of is not None:
+            rows = sort_rows(self.run(name, text, as_of, ranges, **filters), field, descending)
+            return self.page(rows, cursor, size) + (len(rows),)
+        entity = self.entities[name]
+        if field not in SORT_FIELDS.get(entity.kind, ()):
+            raise ValueError(f"{name} cannot be sorted by {field!r}")
+        samples, bits = self.select(name, text, ranges, **filters)
+        bitmaps = self.bitmaps(entity.kind)
+        total = len(samples) + bits.bit_count()
+
+        def walk(after, reverse, limit):
+            stored = bitmaps.ordered(field, bits, after, reverse, limit)
+            fixed = [(sort_key(field, r.get(field)), r["id"], r) for r in samples]
+            fixed = sorted((e for e in fixed if after is None or (e[:2] < after if reverse else e[:2] > after)), reverse=reverse, key=lambda e: e[:2])
+            return [row for _, _, row in islice(heapq.merge(stored, fixed, key=lambda e: e[:2], reverse=reverse), limit)]
+
+        if not cursor:
+            return 0, walk(None, descending, size), total
+        anchor = (cursor["key"], cursor.get("after", cursor.get("before")))
+        at = int(cursor.get("at") or 0)
+        if "after" in cursor:
+            rows = walk(anchor, descending, size + 1)
+            if not rows:  # nothing after the cursor row any more: the last page
+                rows = walk(None, not descending, size)[::-1]
+                return total - len(rows), rows, total
+            if len(rows) <= size:
+                return total - len(rows), rows, total
+            return min(at + 1, total - size - 1), rows[:size], total
+        rows = walk(anchor, not descending, size + 1)
+        if len(rows) <= size:  # reached the top: the first page
+            return 0, walk(None, descending, size), total
+        return max(1, at - size), rows[:size][::-1], total
+
+    # -- search-box syntax ---------------------------------------------------
+    def _known_values(self, entity: Entity, field: str) -> list:
+        vocabulary = KIND_CLASSES[entity.kind].FIELDS.get(field)
+        known = list(LEVELS.get(field) or (vocabulary.values if isinstance(vocabulary, Vocabulary) else ()))
+        known += self.bitmaps(entity.kind).values(field)
+        known += [r.get(field) for r in entity.samples]
+        return list(dict.fromkeys(v for v in known if v))
+
+    def _compile_values(self, entity: Entity, field: str, name: str, op: str, raw: str) -> tuple:
+        """Values of `field` a term selects (an OR)."""
+        known = self._known_values(entity, field)
+        lookup = {v.lower(): v for v in known}
+        if op != "=":
+            levels = LEVELS.get(field)
+            if levels is None:
+                raise QuerySyntaxError(f"{name} has no order: use {name}:value")
+            level = lookup.get(raw.lower())
+            if level not in levels:
+                raise QuerySyntaxError(f"No {name} '{raw}'. Levels: {', '.join(levels)}")
+            i = levels.index(level)
+            return {"<": levels[:i], "<=": levels[:i + 1], ">": levels[i + 1:], ">=": levels[i:]}[op]
+        values = []
+        for part in raw.split(","):
+            value = lookup.get(part.strip().lower())
+            if value is None:
+                hint = ", ".join(known[:8]) + (", …" if len(known) > 8 else "")
+                raise QuerySyntaxError(f"No {name} '{part.strip()}'" + (f". Try: {hint}" if hint else ""))
+            values.append(value)
+        return tuple(values)
+
+    def parse(self, name: str, text: str) -> dict:
+        """Compile search-box text to {"text", "filters", "ranges"} for run(). Raises QuerySyntaxError."""
+        entity = self.entities[name]
+        names = QUERY_FIELDS.get(entity.kind, {})
+        words, filters, ranges = [], {}, {}
+        structured = False
+        for m in _TERM.finditer(text or ""):
+            if m["field"] is None:
+                words.append(m["word"] if m["word"] is not None else m["phrase"])
+                continue
+            typed = m["field"]
+            field = names.get(typed.lower())
+            raw = m["quoted"] if m["quoted"] is not None else m["value"]
+            if field is None:  # "Note: FOD", "ETA=10": text that happens to look like a term
+                words.append(f"{typed}{m['op']}{raw}")
+                continue
+            structured = True
+            op = m["op"].lstrip(":") or "="
+            if not raw:
+                raise QuerySyntaxError(f"'{typed}{m['op']}' needs a value")
+            if field in RANGE_FIELDS[entity.kind]:
+                low, high = _date_range(typed, op, raw)
+                if field in ranges:  # created>=2026-01 created<2026-04: the overlap
+                    old_low, old_high = ranges[field]
+                    low = old_low if low is None or (old_low is not None and old_low > low) else low
+                    high = old_high if high is None or (old_high is not None and old_high < high) else high
+                ranges[field] = (low, high)
+            else:
+                values = self._compile_values(entity, field, typed, op, raw)
+                if field in filters:  # two terms on one field: both must hold
+                    values = tuple(v for v in filters[field] if v in values)
+                filters[field] = values
+        if not structured:
+            return {"text": text or "", "filters": {}, "ranges": {}}
+        return {"text": " ".join(words), "filters": filters, "ranges": ranges}
+
+    def compile(self, name: str, text: str = "", **filters) -> dict:
+        """parse() search-box text and AND it with the dropdown filters: {"text", "ranges", "filters"}."""
+        parsed = self.parse(name, text)
+        combined = dict(parsed["filters"])
+        for field, value in filters.items():
+            if value is None or value == "" or value == []:
+                continue
+            if field in combined:
+                allowed = value if isinstance(value, (list, tuple)) else (value,)
+                value = tuple(v for v in combined[field] if v in allowed)
+            combined[field] = value
+        return {"text": parsed["text"], "ranges": parsed["ranges"], "filters": combined}
+
+    def search(self, name: str, text: str = "", as_of: str = None, **filters) -> tuple:
+        """run() for search-box text (query syntax allowed), ANDed with the dropdown filters."""
+        query = self.compile(name, text, **filters)
+        return self.run(name, query["text"], as_of=as_of, ranges=query["ranges"], **query["filters"])
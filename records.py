@@ -0,0 +1,166 @@
+"""
+HIRS record types: compact, slotted hazard / CAPA / investigation records.
+Repeated taxonomy strings (status, category, classification, priority...) are stored
+as small interned codes drawn from config; records still read like the old dicts
+(record.get("status"), record["id"]) so page builders do not change. Records are
+never mutated once built: a change produces a new record with a new version. The one
+exception is search_cache, the record's normalised search text, filled in the first
+time the record is searched (see search.search_key).
+"""
+import sys
+import threading
+
+from config import (
+    WORKFLOW_STATUSES,
+    CLASSIFICATION_TYPES,
+    HAZARD_AREAS,
+    CAPA_ACTION_TYPES,
+    CAPA_PRIORITIES,
+)
+
+
+class Vocabulary:
+    """Two-way value <-> code table. Seeded from config; values outside the taxonomy get new codes."""
+
+    __slots__ = ("name", "values", "codes", "_lock")
+
+    def __init__(self, name: str, values):
+        self.name = name
+        self.values = []
+        self.codes = {}
+        self._lock = threading.Lock()  # request threads may meet the same new value at once
+        for v in values:
+            self.code(v)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self.codes.get(value)
+                if code is None:
+                    # The value is appended before its code is published: a code seen is always readable
+                    self.values.append(sys.intern(value))
+                    code = self.codes[value] = len(self.values) - 1
+        return code
+
+    def value(self, code: int) -> str:
+        return self.values[code]
+
+
+# Statuses are shared by hazards, CAPA and investigations ("Open" is CAPA/investigation-only)
+STATUSES = Vocabulary("status", [""] + WORKFLOW_STATUSES + ["Open"])
+CATEGORIES = Vocabulary("category", [""] + HAZARD_AREAS)
+CLASSIFICATIONS = Vocabulary("classification", [""] + CLASSIFICATION_TYPES)
+PERCEIVED_RISKS = Vocabulary("perceived_risk", ["", "Low", "Moderate", "High", "Critical"])
+CAPA_TYPES = Vocabulary("type", [""] + CAPA_ACTION_TYPES)
+PRIORITIES = Vocabulary("priority", [""] + CAPA_PRIORITIES)
+REPORTING_MODES = Vocabulary("reporting_mode", ["", "Named", "Confidential", "Anonymous"])
+
+_INTERN = object()  # marker: free text that repeats a lot (stations, areas) – interned, not coded
+_MISSING = object()
+
+
+class Record:
+    """Base for slotted records. FIELDS maps field name -> Vocabulary, _INTERN or None (plain value)."""
+
+    __slots__ = ("extra", "search_cache")
+    FIELDS = {}
+
+    def __init__(self, **values):
+        for name, kind in self.FIELDS.items():
+            value = values.pop(name, None)
+            if value is None:
+                pass
+            elif isinstance(kind, Vocabulary):
+                value = kind.code(value)
+            elif kind is _INTERN and isinstance(value, str):
+                value = sys.intern(value)
+            elif isinstance(value, list):
+                value = tuple(value)
+            setattr(self, name, value)
+        # Anything outside the schema is kept so round-trips stay lossless
+        self.extra = values or None
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, cls):
+            return data
+        return cls(**dict(data))
+
+    def get(self, key, default=None):
+        kind = self.FIELDS.get(key, False)
+        if kind is False:
+            return self.extra.get(key, default) if self.extra else default
+        value = getattr(self, key)
+        if value is None:
+            return default
+        return kind.value(value) if isinstance(kind, Vocabulary) else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def to_dict(self) -> dict:
+        out = {name: self.get(name) for name in self.FIELDS if getattr(self, name) is not None}
+        if self.extra:
+            out.update(self.extra)
+        return out
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class HazardRecord(Record):
+    FIELDS = {
+        "id": None,
+        "title": None,
+        "station": _INTERN,
+        "area": _INTERN,
+        "category": CATEGORIES,
+        "subcategory": _INTERN,
+        "description": None,
+        "people_exposed": None,
+        "perceived_risk": PERCEIVED_RISKS,
+        "classification": CLASSIFICATIONS,
+        "tags": None,
+        "reporting_mode": REPORTING_MODES,
+        "reporter_name": None,
+        "reporter_dept": _INTERN,
+        "reporter_role": _INTERN,
+        "status": STATUSES,
+        "created_at": None,
+        "version": None,  # store change number of this revision (see store.py)
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class CapaRecord(Record):
+    FIELDS = {
+        "id": None,
+        "action": None,
+        "type": CAPA_TYPES,
+        "priority": PRIORITIES,
+        "hazard_id": None,
+        "due_date": _INTERN,
+        "status": STATUSES,
+        "version": None,
+    }
+    __slots__ = tuple(FIELDS)
+
+
+class InvestigationRecord(Record):
+    FIELDS = {
+        "id": None,
+        "title": None,
+        "hazard_id": None,
+        "status": STATUSES,
+        "lead": _INTERN,
+        "started": _INTERN,
+        "version": None,
+    }
+    __slots__ = tuple(FIELDS)
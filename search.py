@@ -0,0 +1,292 @@
+"""
+HIRS list search: in-process trigram index over the searchable fields of hazards, CAPA actions and
+investigations. A query matches what the list filters have always matched – the typed text as a
+case-insensitive substring of any searchable field ("b1" finds "Gate B12"), accents ignored ("olfleck"
+finds "Ölfleck") – but only the records that contain every trigram of the query are looked at,
+instead of the whole register. The index follows the store's change feed (through the kind's record
+table, tables.py), so submissions and edits from any worker show up on the next search without
+rebuilding.
+
+With `fuzzy=True` a search also returns the records holding the query in a close spelling from the
+index's spelling vocabulary, its longer words in any order (fuzzy.py), after the records holding it
+as typed.
+
+Matching runs on each record's search key: its searchable fields normalised once and cached on the
+record. Records never change (an edit is a new record), so a key is built once per revision rather
+than lowercasing every field of every record on every keystroke.
+"""
+import bisect
+import gc
+import threading
+import unicodedata
+from array import array
+
+from fuzzy import FUZZY_FIELDS, SpellingIndex
+from tables import RecordTable
+
+# Fields each list searches. matches() is the contract; the index only narrows what it is run on.
+SEARCH_FIELDS = {
+    "hazards": ("id", "title", "description", "area", "station", "category", "subcategory"),
+    "capa": ("action", "id", "hazard_id"),
+    "investigations": ("title", "id", "hazard_id", "lead"),
+}
+_PAD = "\x03\x03"  # field separator / end marker: no trigram spans two fields, and short queries can be looked up by prefix
+
+
+def normalize(text: str) -> str:
+    """Form of text that searches compare: casefolded, accents dropped ("Straße" -> "strasse", "Öl" -> "ol")."""
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def search_key(record, fields) -> str:
+    """The normalised searchable fields of a record, each followed by _PAD. Cached on records (plain
+    dict rows are rebuilt each time), so it is computed once per revision."""
+    cached = getattr(record, "search_cache", None)
+    if cached is not None and cached[0] == fields:
+        return cached[1]
+    get = record.get
+    key = _PAD.join([normalize(get(field) or "") for field in fields]) + _PAD
+    try:
+        record.search_cache = (fields, key)
+    except AttributeError:  # a dict
+        pass
+    return key
+
+
+def matches(record, q: str, fields) -> bool:
+    """The linear filter: `q` (stripped, normalised) is a substring of one of `fields`."""
+    if _PAD[0] in q:  # could span two fields in the joined key: compare field by field
+        get = record.get
+        return any(q in normalize(get(field) or "") for field in fields)
+    return q in search_key(record, fields)
+
+
+def trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram -> doc numbers (append-only arrays), plus a sorted trigram list for short queries.
+
+    Records live in the kind's RecordTable (tables.py), shared with the filter bitmaps; the index
+    keeps its own doc numbers, each pointing at a row of the table. An edit that changes a record's
+    search key re-indexes it under a new doc number and drops the old one. Results come back in
+    table order – fixed sample rows first (numbered below zero), then the store in insertion order –
+    the order the lists always used.
+    """
+
+    def __init__(self, store=None, samples=(), kind: str = "hazards", table: RecordTable = None):
+        self.store = store
+        self.kind = kind
+        self.fields = SEARCH_FIELDS[kind]
+        self._spelled = [self.fields.index(f) for f in FUZZY_FIELDS.get(kind, ())]  # key segments feeding the vocabulary
+        self.spelling = SpellingIndex(kind)
+        if table is None and store is not None:
+            table = RecordTable(store, kind)
+        self.table = table
+        self._lock = table.lock if table is not None else threading.Lock()
+        samples = tuple(samples)
+        self._samples = {i - len(samples): record for i, record in enumerate(samples)}  # table number -> fixed row
+        self._reset()
+        # The bulk load allocates millions of small objects the cyclic GC would otherwise keep re-scanning
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for row, record in self._samples.items():
+                self._put(("sample", record["id"]), row, record)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        if table is not None:
+            table.attach(self._load, self._changed)
+        else:
+            self._merge_vocabulary(force=True)
+
+    def _reset(self) -> None:
+        self._postings = {}  # trigram -> array of doc numbers, ascending
+        self._vocabulary = []  # sorted trigrams
+        self._pending = set()  # trigrams added since the vocabulary was last merged
+        self._rows = {}  # live doc number -> table number of its row (negative: a sample row)
+        self._texts = {}  # live doc number -> search_key() of the record (the record's cached string, not a copy)
+        self._numbers = {}  # row key -> live doc number
+        self._next = 0
+        self._dead = 0  # superseded doc numbers still in the postings
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _record(self, number: int):
+        row = self._rows[number]
+        return self._samples[row] if row < 0 else self.table.records[row]
+
+    # -- maintenance -------------------------------------------------------
+    def _load(self, table) -> None:
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for row, record in table.records.items():
+                self._put(record["id"], row, record)
+            self._merge_vocabulary(force=True)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _changed(self, row_id, row: int, old, new) -> None:
+        if new is None:
+            self._delete(row_id)
+        else:
+            self._put(row_id, row, new)
+
+    def _put(self, key, row: int, record) -> None:
+        text = search_key(record, self.fields)
+        old = self._numbers.get(key)
+        if old is not None:
+            if self._texts[old] == text:
+                return  # e.g. a status change: nothing searchable moved (the table holds the new record)
+            del self._rows[old], self._texts[old]
+            self._dead += 1
+        number = self._next
+        self._next += 1
+        self._numbers[key] = number
+        self._rows[number] = row
+        self._texts[number] = text
+        if self._spelled:
+            segments = text.split(_PAD)
+            for i in self._spelled:
+                self.spelling.add_text(segments[i])
+        postings = self._postings
+        for gram in trigrams(text):
+            try:
+                postings[gram].append(number)
+            except KeyError:
+                postings[gram] = array("i", (number,))
+                self._pending.add(gram)
+
+    def _delete(self, key) -> None:
+        number = self._numbers.pop(key, None)
+        if number is not None:
+            del self._rows[number], self._texts[number]
+            self._dead += 1
+
+    def _compact(self) -> None:
+        """Rebuild the postings without superseded doc numbers."""
+        live = sorted((self._rows[n], key) for key, n in self._numbers.items())
+        records = self.table.records if self.table is not None else {}
+        self._reset()
+        for row, key in live:
+            self._put(key, row, self._samples[row] if row < 0 else records[row])
+        self._merge_vocabulary(force=True)
+
+    def refresh(self) -> int:
+        """Apply store changes made since the last call (by any worker). Returns how many were applied."""
+        if self.table is None:
+            return 0
+        applied = self.table.refresh()
+        if self._dead > max(10000, len(self._rows)):
+            with self._lock:
+                if self._dead > max(10000, len(self._rows)):
+                    self._compact()
+        return applied
+
+    # -- queries -----------------------------------------------------------
+    def _merge_vocabulary(self, force: bool = False) -> None:
+        """Fold pending trigrams into the sorted vocabulary – one merge per batch, not an insert per trigram."""
+        if self._pending and (force or len(self._pending) > 1024):
+            merged = self._vocabulary + sorted(self._pending)
+            merged.sort()  # two sorted runs: a linear merge
+            self._vocabulary, self._pending = merged, set()
+
+    def _candidates(self, q: str) -> set:
+        """Doc numbers that may contain `q`: every record holding all its trigrams (a superset of the answer)."""
+        postings = self._postings
+        if len(q) >= 3:
+            lists = [postings.get(gram) for gram in {q[i:i + 3] for i in range(len(q) - 2)}]
+            if not all(lists):
+                return set()
+            lists.sort(key=len)  # intersect from the rarest trigram up
+            candidates = set(lists[0])
+            for posting in lists[1:]:
+                if len(candidates) <= 32:
+                    break  # verifying a handful of records is cheaper than another intersection
+                candidates.intersection_update(posting)
+            return candidates
+        # One or two characters: union of every trigram starting with them (field ends are padded)
+        self._merge_vocabulary()
+        vocabulary = self._vocabulary
+        candidates = set()
+        for i in range(bisect.bisect_left(vocabulary, q), len(vocabulary)):
+            if not vocabulary[i].startswith(q):
+                break
+            candidates.update(postings[vocabulary[i]])
+        for gram in self._pending:
+            if gram.startswith(q):
+                candidates.update(postings[gram])
+        return candidates
+
+    def _estimate(self, q: str) -> int:
+        if len(q) < 3:
+            return len(self._rows)
+        return min(len(self._postings.get(q[i:i + 3], ())) for i in range(len(q) - 2))
+
+    def estimate(self, text: str, fuzzy: bool = False) -> int:
+        """Upper bound on how many records search(text) returns, without running it: the shortest
+        posting list among the query's trigrams (every record for one- and two-character queries).
+        With `fuzzy`, plus the least any one chunk of the query can match across its spellings."""
+        self.refresh()
+        q = normalize((text or "").strip())
+        with self._lock:
+            bound = self._estimate(q)
+            variants = self.spelling.variants(q) if fuzzy else None
+            if variants is not None:
+                bound += min(sum(self._estimate(phrase) for phrase in chunk) for chunk in variants)
+            return min(bound, len(self._rows))
+
+    def variants(self, text: str):
+        """The spellings a fuzzy search for `text` tries (see SpellingIndex.variants), or None."""
+        self.refresh()
+        with self._lock:
+            return self.spelling.variants(normalize((text or "").strip()))
+
+    def _find(self, q: str) -> list:
+        """Live doc numbers holding `q` (normalised, non-empty), in no particular order."""
+        rows, texts = self._rows, self._texts
+        found = [n for n in self._candidates(q) if n in rows]  # drop superseded doc numbers
+        if len(q) > 3:
+            # Verification pass: holding every trigram of q does not mean holding q itself.
+            # `q in text` is matches() on the cached search key, as long as q cannot span the separator.
+            if _PAD[0] in q:
+                found = [n for n in found if matches(self._record(n), q, self.fields)]
+            else:
+                found = [n for n in found if q in texts[n]]
+        # Up to three characters a trigram hit is a substring hit: nothing to verify
+        return found
+
+    def _covered(self, variants) -> set:
+        """Doc numbers holding a phrase of every chunk of a query's spellings (covers() over the index)."""
+        covered = None
+        for chunk in sorted(variants, key=lambda chunk: sum(self._estimate(phrase) for phrase in chunk)):
+            found = set()
+            for phrase in chunk:
+                found.update(self._find(phrase))
+            covered = found if covered is None else covered & found
+            if not covered:
+                break
+        return covered
+
+    def search(self, text: str, limit: int = None, fuzzy: bool = False) -> list:
+        """Records with `text` as a case- and accent-insensitive substring of a searchable field, in
+        list order. `fuzzy` adds, after those, the records holding it in a close spelling."""
+        self.refresh()
+        q = normalize((text or "").strip())
+        if not q:
+            return []
+        with self._lock:
+            rank = self._rows.__getitem__
+            found = sorted(self._find(q), key=rank)
+            variants = self.spelling.variants(q) if fuzzy else None
+            if variants is not None:
+                found += sorted(self._covered(variants).difference(found), key=rank)
+            return [self._record(n) for n in found[:limit]]
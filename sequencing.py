@@ -0,0 +1,102 @@
+"""
+HIRS request sequencing: latest-wins search requests. The browser numbers each search it sends
+(per tab and list). Before running one, a worker records its number in a table every worker shares
+and drops it unrun if a newer number from the same tab is already there; after running it, the
+result is discarded if a newer request arrived meanwhile. On a slow network, requests that arrive
+out of order then neither occupy workers nor overwrite a newer result in the browser.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from config import SEARCH_SEQUENCE_DB
+
+
+class RequestSequencer:
+    """Highest request number seen per (browser session, list). Kept in a small SQLite table shared
+    by the gunicorn workers, or in memory when `path` is None. Counters are per worker."""
+
+    def __init__(self, path: str = SEARCH_SEQUENCE_DB, ttl: float = 3600):
+        self.path = path
+        self.ttl = ttl  # sessions idle this long are forgotten
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._latest = {}  # (session, list) -> [seq, last seen] when there is no database
+        self._begun = 0
+        self.stats = {"received": 0, "dropped": 0, "discarded": 0, "completed": 0}
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn().execute(
+                "CREATE TABLE IF NOT EXISTS latest_requests ("
+                " session TEXT NOT NULL, list TEXT NOT NULL, seq INTEGER NOT NULL, seen REAL NOT NULL,"
+                " PRIMARY KEY (session, list))"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (and per process – gunicorn forks after import)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")  # losing the table only forgets who is typing
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _record(self, session: str, name: str, seq: int) -> int:
+        """Store `seq` if it is the highest seen for the session's list; returns the highest."""
+        now = time.time()
+        if self.path is None:
+            with self._lock:
+                entry = self._latest.setdefault((session, name), [seq, now])
+                entry[0], entry[1] = max(entry[0], seq), now
+                return entry[0]
+        return self._conn().execute(
+            "INSERT INTO latest_requests (session, list, seq, seen) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (session, list) DO UPDATE SET seq = max(seq, excluded.seq), seen = excluded.seen"
+            " RETURNING seq",
+            (session, name, seq, now),
+        ).fetchone()[0]
+
+    def _highest(self, session: str, name: str) -> int:
+        if self.path is None:
+            with self._lock:
+                return self._latest.get((session, name), [0])[0]
+        row = self._conn().execute("SELECT seq FROM latest_requests WHERE session = ? AND list = ?", (session, name)).fetchone()
+        return row[0] if row else 0
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl
+        if self.path is None:
+            with self._lock:
+                for key in [k for k, (_, seen) in self._latest.items() if seen < cutoff]:
+                    del self._latest[key]
+        else:
+            self._conn().execute("DELETE FROM latest_requests WHERE seen < ?", (cutoff,))
+
+    def begin(self, session: str, name: str, seq: int) -> bool:
+        """Register a request before running it. False: a newer request from the session is already
+        known, so this one should be dropped unrun."""
+        self._count("received")
+        if self._record(session, name, seq) > seq:
+            self._count("dropped")
+            return False
+        with self._lock:
+            self._begun += 1
+            prune = self._begun % 1000 == 0
+        if prune:
+            self._prune()
+        return True
+
+    def finish(self, session: str, name: str, seq: int) -> bool:
+        """After running a request: True to send its result, False if a newer request arrived meanwhile."""
+        if self._highest(session, name) > seq:
+            self._count("discarded")
+            return False
+        self._count("completed")
+        return True
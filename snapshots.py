@@ -0,0 +1,72 @@
+"""
+HIRS client-side filtering: a compact copy of the hazard register for the browser. In this mode
+(LIST_CLIENT_FILTER) the hazards page keeps a columnar snapshot in a local dcc.Store and
+assets/snapshot.js runs the status, category and search filters on it, so changing a filter costs
+no round trip. The snapshot is versioned by the store's change number: a page that already holds
+one asks for the changes since its version and gets only the rows added, edited or removed.
+
+Columns are lists of strings in list order (sample rows first, then the store in insertion order);
+low-cardinality ones are sent as {"values": [...], "codes": [...]} so a status or category is a
+small number per row rather than its text.
+"""
+SNAPSHOT_FORMAT = 1  # bumped when the layout changes: browsers holding an older one get a full snapshot
+# Every searchable field (SEARCH_FIELDS["hazards"]) is sent: the browser builds its search keys from them
+SNAPSHOT_FIELDS = ("id", "title", "description", "category", "subcategory", "area", "station", "perceived_risk", "status")
+CODED_FIELDS = ("category", "subcategory", "area", "station", "perceived_risk", "status")
+
+
+def encode(records) -> dict:
+    """{field: column} for `records`, coded columns as value lists and codes."""
+    columns = {}
+    for field in SNAPSHOT_FIELDS:
+        values = [r.get(field) or "" for r in records]
+        if field in CODED_FIELDS:
+            codes = {}
+            columns[field] = {"codes": [codes.setdefault(v, len(codes)) for v in values], "values": list(codes)}
+        else:
+            columns[field] = values
+    return columns
+
+
+def full_snapshot(store, samples=()) -> dict:
+    """Every sample and stored hazard. The version is read first: changes racing with the read are
+    sent again by the next delta, which applies them idempotently."""
+    version = store.current_version()
+    records = list(samples) + list(store.all())
+    return {"format": SNAPSHOT_FORMAT, "full": True, "version": version, "samples": len(samples),
+            "count": len(records), "columns": encode(records)}
+
+
+def snapshot_delta(store, since, samples=(), max_rows: int = None, limit: int = 5000):
+    """What a browser holding the snapshot at version `since` needs: None if nothing changed, the
+    rows added or edited plus the ids removed since then, or a full snapshot when it holds none,
+    holds one from another store (a version ahead of this one) or has fallen so far behind that
+    the changes outweigh the register. {"off": True} when the register is over `max_rows`: the list
+    is then filtered on the server as usual."""
+    total = len(samples) + store.count()
+    if max_rows is not None and total > max_rows:
+        return {"off": True}
+    version = store.current_version()
+    if since is None or since > version:
+        return full_snapshot(store, samples)
+    if since == version:
+        return None
+    latest, base = {}, since
+    while True:
+        changes = store.changes_since(since, limit=limit)
+        for since, kind, row_id, record in changes:
+            if kind == "hazards":
+                latest[row_id] = record  # only the newest revision of each row matters
+        if len(latest) > total // 2:
+            return full_snapshot(store, samples)
+        if len(changes) < limit:
+            break
+    upserts = [r for r in latest.values() if r is not None]
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "base": base,
+        "version": since,
+        "count": len(samples) + store.count(),
+        "columns": encode(upserts),
+        "deleted": [row_id for row_id, r in latest.items() if r is None],
+    }
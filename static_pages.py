@@ -0,0 +1,44 @@
+"""
+HIRS static pages: pages whose content depends on config alone (Requirements, Reference, Exports,
+the Admin shell) are built once per worker and kept as the JSON Dash would send for them, with a
+hash of that JSON as ETag. The browser loads them from /_hirs/pages/<name>.json and revalidates on
+each visit, so navigating to an unchanged page costs a 304 – no component construction, no
+serialisation. Config only changes with a restart (which rebuilds them); rebuild() is there for
+anything that changes it at runtime.
+"""
+import hashlib
+import threading
+
+from plotly.io.json import to_json_plotly
+
+
+class StaticPages:
+    """name -> page builder, and the (etag, JSON bytes) each one built."""
+
+    def __init__(self):
+        self._builders = {}
+        self._built = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._builders
+
+    def register(self, name: str, build) -> None:
+        self._builders[name] = build
+
+    def get(self, name: str) -> tuple:
+        """(etag, body) for a registered page, built on first use."""
+        built = self._built.get(name)
+        if built is None:
+            body = to_json_plotly(self._builders[name]()).encode()
+            built = (hashlib.sha256(body).hexdigest()[:32], body)
+            with self._lock:
+                built = self._built.setdefault(name, built)
+        return built
+
+    def rebuild(self, names=None) -> None:
+        """Build pages again (all by default), e.g. after their config changed."""
+        for name in self._builders if names is None else names:
+            with self._lock:
+                self._built.pop(name, None)
+            self.get(name)
@@ -0,0 +1,615 @@
+"""
+HIRS hazard store: persistence for submitted hazard reports and their CAPA / investigations.
+SQLite (WAL mode) by default so every gunicorn worker reads the same register;
+an in-memory store is kept for quick local demos.
+
+Every write is versioned: it gets the next store-wide change number (stamped on the record as
+"version") and the previous revision is kept with its validity interval, so readers can ask
+for the register as it stood at any past moment (as_of) without blocking writers.
+"""
+import bisect
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import islice
+
+from config import HAZARD_DB_PATH, HAZARD_STORE
+from records import CapaRecord, HazardRecord, InvestigationRecord, Record
+
+
+# Columns copied out of the record so filters and counts never parse the JSON body
+INDEXED_FIELDS = ("status", "category", "station", "area", "perceived_risk", "created_at")
+
+# Rows that belong to a hazard and move with it (e.g. into the archive)
+LINKED_KINDS = {"capa": CapaRecord, "investigations": InvestigationRecord}
+
+# Every versioned kind -> record class (kind names double as SQLite table names)
+KIND_CLASSES = {"hazards": HazardRecord, **LINKED_KINDS}
+
+_MONTH = re.compile(r"\d{4}-\d{2}")  # created_at prefix naming an archive partition
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _as_dict(row) -> dict:
+    """A private copy of the row as a dict (the store stamps "version" on it)."""
+    return row.to_dict() if isinstance(row, Record) else dict(row)
+
+
+class HazardStore:
+    """Interface used by the page builders and callbacks. Accepts dicts; returns records.
+
+    Read methods take an optional `as_of` ISO timestamp and then answer from the version
+    history instead of the live tables.
+    """
+
+    def add(self, hazard: dict) -> None:
+        """Insert a hazard. Idempotent by ID so a journal replay never duplicates a report."""
+        raise NotImplementedError
+
+    def add_many(self, hazards: list) -> None:
+        """Durably insert a batch in one transaction (already-present IDs are skipped)."""
+        for hazard in hazards:
+            self.add(hazard)
+
+    def apply_journal(self, records: list) -> None:
+        """Durably apply replayed journal records (already-present IDs are skipped)."""
+        self.add_many(records)
+
+    def get(self, hazard_id: str, as_of: str = None):
+        raise NotImplementedError
+
+    def set_status(self, hazard_id: str, status: str):
+        """Move a hazard to a new workflow status. Returns the previous status, or None if there is no such hazard."""
+        raise NotImplementedError
+
+    def all(self, as_of: str = None) -> list:
+        """Every hazard, oldest first (insertion order; version order for as_of reads)."""
+        return self.query(as_of=as_of)
+
+    def query(self, status=None, category=None, station=None, area=None, limit=None, as_of=None) -> list:
+        """Hazards matching the given equality filters, oldest first. Filters accept a value or a tuple of values."""
+        raise NotImplementedError
+
+    def count(self, as_of: str = None, **filters) -> int:
+        raise NotImplementedError
+
+    def count_by(self, field: str, as_of: str = None) -> dict:
+        """{value: count} for one of INDEXED_FIELDS."""
+        raise NotImplementedError
+
+    def add_linked(self, kind: str, record: dict) -> None:
+        """Insert a CAPA action (kind "capa") or investigation ("investigations") linked to a hazard."""
+        raise NotImplementedError
+
+    def linked(self, kind: str, hazard_ids=None, as_of: str = None) -> list:
+        """CAPA actions or investigations, oldest first; optionally only those for the given hazards."""
+        raise NotImplementedError
+
+    def archive_candidates(self, statuses, before: str, limit: int) -> list:
+        """Hazards in one of `statuses` created before the ISO timestamp `before`, oldest first. Only
+        hazards whose created_at starts with a YYYY-MM month (their archive partition) qualify."""
+        raise NotImplementedError
+
+    def remove(self, hazard_ids) -> None:
+        """Delete hazards and their linked rows in one transaction (their history is kept until pruned)."""
+        raise NotImplementedError
+
+    def current_version(self) -> int:
+        """The latest change number; it moves on every write, so it also works as a cache key."""
+        raise NotImplementedError
+
+    def changes_since(self, version: int, limit: int = 1000) -> list:
+        """[(version, kind, id, record or None for a deletion)] after `version`, oldest first."""
+        raise NotImplementedError
+
+    def prune_history(self, before: str) -> int:
+        """Drop superseded revisions that stopped being current before `before`. Returns how many."""
+        raise NotImplementedError
+
+    def forget(self, kind: str, ids) -> int:
+        """Drop every stored revision of removed rows (a purged archive partition), whenever they
+        stopped being current. Rows still in the store keep theirs. Returns how many were dropped."""
+        raise NotImplementedError
+
+
+def _matches(value, wanted) -> bool:
+    if wanted is None:
+        return True
+    if isinstance(wanted, (tuple, list, set)):
+        return value in wanted
+    return value == wanted
+
+
+def _filter(rows, filters: dict, limit=None) -> list:
+    out = [r for r in rows if all(_matches(r.get(f), v) for f, v in filters.items())]
+    return out[:limit] if limit is not None else out
+
+
+class MemoryHazardStore(HazardStore):
+    """Process-local store – lost on restart and not shared between workers.
+
+    Readers get an immutable tuple of the current records per kind, rebuilt only after a
+    write, so a page render never copies or locks the register. As-of reads bisect the kind's
+    revisions by valid_from and look only at those that had started by then.
+    """
+
+    def __init__(self):
+        self._current = {kind: {} for kind in KIND_CLASSES}  # kind -> {id: record}, insertion ordered
+        self._views = {}  # kind -> tuple(self._current[kind].values()), dropped on write
+        self._history = []  # [version, kind, id, valid_from, valid_to, record or None]
+        self._by_kind = {kind: [] for kind in KIND_CLASSES}  # the same entries per kind, in valid_from order
+        self._open = {}  # (kind, id) -> its current _history entry
+        self._stamped = ""  # latest valid_from: stamps never go back, even if the clock does
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _stamp(self, kind: str, changes: list) -> None:
+        """Apply [(id, dict or None)] as new versions (caller holds the lock)."""
+        now = self._stamped = max(_now(), self._stamped)
+        cls = KIND_CLASSES[kind]
+        by_kind = self._by_kind[kind]
+        for row_id, data in changes:
+            previous = self._open.pop((kind, row_id), None)
+            if previous is not None:
+                previous[4] = now
+            self._version += 1
+            if data is None:
+                entry = [self._version, kind, row_id, now, now, None]
+                self._current[kind].pop(row_id, None)
+            else:
+                record = cls.from_dict(dict(data, version=self._version))
+                entry = [self._version, kind, row_id, now, None, record]
+                self._open[(kind, row_id)] = entry
+                self._current[kind][row_id] = record
+            self._history.append(entry)
+            by_kind.append(entry)
+        self._views.pop(kind, None)
+
+    def _view(self, kind: str, as_of: str = None) -> tuple:
+        if as_of is not None:
+            # Only revisions that started by `as_of` can be current then: bisect past the rest. Writers
+            # only append to the list (pruning swaps in a new one), so the prefix is stable to read.
+            history = self._by_kind[kind]
+            end = bisect.bisect_right(history, as_of, key=lambda e: e[3])
+            return tuple(e[5] for e in islice(history, end) if e[5] is not None and (e[4] is None or e[4] > as_of))
+        view = self._views.get(kind)
+        if view is None:
+            with self._lock:
+                view = self._views[kind] = tuple(self._current[kind].values())
+        return view
+
+    def add(self, hazard: dict) -> None:
+        self.add_many([hazard])
+
+    def add_many(self, hazards: list) -> None:
+        with self._lock:
+            current = self._current["hazards"]
+            fresh = {}
+            for h in hazards:
+                if h["id"] not in current and h["id"] not in fresh:
+                    fresh[h["id"]] = _as_dict(h)
+            self._stamp("hazards", list(fresh.items()))
+
+    def get(self, hazard_id: str, as_of: str = None):
+        if as_of is None:
+            return self._current["hazards"].get(hazard_id)
+        return next((h for h in self._view("hazards", as_of) if h["id"] == hazard_id), None)
+
+    def set_status(self, hazard_id: str, status: str):
+        with self._lock:
+            old = self._current["hazards"].get(hazard_id)
+            if old is None:
+                return None
+            self._stamp("hazards", [(hazard_id, dict(old.to_dict(), status=status))])
+            return old.get("status")
+
+    def query(self, status=None, category=None, station=None, area=None, limit=None, as_of=None) -> list:
+        wanted = {"status": status, "category": category, "station": station, "area": area}
+        return _filter(self._view("hazards", as_of), {f: v for f, v in wanted.items() if v is not None}, limit)
+
+    def count(self, as_of: str = None, **filters) -> int:
+        return len(self.query(as_of=as_of, **filters))
+
+    def count_by(self, field: str, as_of: str = None) -> dict:
+        counts = {}
+        for h in self._view("hazards", as_of):
+            key = h.get(field) or ""
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def add_linked(self, kind: str, record: dict) -> None:
+        with self._lock:
+            if record["id"] not in self._current[kind]:
+                self._stamp(kind, [(record["id"], _as_dict(record))])
+
+    def linked(self, kind: str, hazard_ids=None, as_of: str = None) -> list:
+        rows = self._view(kind, as_of)
+        if hazard_ids is None:
+            return list(rows)
+        wanted = set(hazard_ids)
+        return [r for r in rows if r.get("hazard_id") in wanted]
+
+    def archive_candidates(self, statuses, before: str, limit: int) -> list:
+        rows = [h for h in self._view("hazards")
+                if h.get("status") in statuses and (h.get("created_at") or "") < before and _MONTH.match(h.get("created_at") or "")]
+        return sorted(rows, key=lambda h: h.get("created_at") or "")[:limit]
+
+    def remove(self, hazard_ids) -> None:
+        gone = set(hazard_ids)
+        with self._lock:
+            self._stamp("hazards", [(i, None) for i in gone if i in self._current["hazards"]])
+            for kind in LINKED_KINDS:
+                self._stamp(kind, [(r["id"], None) for r in self._current[kind].values() if r.get("hazard_id") in gone])
+
+    def current_version(self) -> int:
+        return self._version
+
+    def changes_since(self, version: int, limit: int = 1000) -> list:
+        history = self._history
+        start = bisect.bisect_right(history, version, key=lambda e: e[0])
+        return [(e[0], e[1], e[2], e[5]) for e in history[start:start + limit]]
+
+    def prune_history(self, before: str) -> int:
+        with self._lock:
+            kept = [e for e in self._history if e[4] is None or e[4] >= before]
+            pruned = len(self._history) - len(kept)
+            self._keep(kept)
+        return pruned
+
+    def _keep(self, kept: list) -> None:
+        """Replace the history with `kept` (caller holds the lock); readers keep the lists they hold."""
+        self._history = kept
+        by_kind = {kind: [] for kind in KIND_CLASSES}
+        for e in kept:
+            by_kind[e[1]].append(e)
+        self._by_kind = by_kind
+
+    def forget(self, kind: str, ids) -> int:
+        with self._lock:
+            gone = set(ids) - self._current[kind].keys()
+            kept = [e for e in self._history if e[1] != kind or e[2] not in gone]
+            forgotten = len(self._history) - len(kept)
+            self._keep(kept)
+        return forgotten
+
+
+class SqliteHazardStore(HazardStore):
+    """SQLite-backed store in WAL mode with secondary indexes on the filter columns.
+
+    The `versions` table holds every revision of every hazard, CAPA action and investigation
+    with its validity interval [valid_from, valid_to); its AUTOINCREMENT key is the change number.
+    """
+
+    def __init__(self, path: str = HAZARD_DB_PATH):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread (and per process – gunicorn forks after import)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hazards (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                status TEXT NOT NULL DEFAULT '',
+                category TEXT NOT NULL DEFAULT '',
+                station TEXT NOT NULL DEFAULT '',
+                area TEXT NOT NULL DEFAULT '',
+                perceived_risk TEXT NOT NULL DEFAULT '',
+                created_at TEXT NOT NULL DEFAULT '',
+                data TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        for field in INDEXED_FIELDS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_hazards_{field} ON hazards({field}, seq)")
+        for kind in LINKED_KINDS:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {kind} (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    hazard_id TEXT NOT NULL DEFAULT '',
+                    status TEXT NOT NULL DEFAULT '',
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{kind}_hazard_id ON {kind}(hazard_id)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{kind}_status ON {kind}(status, seq)")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS versions (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                id TEXT NOT NULL,
+                valid_from TEXT NOT NULL,
+                valid_to TEXT,
+                data TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_versions_id ON versions(kind, id, valid_to)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_versions_valid_from ON versions(kind, valid_from)")
+        # Databases from before versioning: their rows become the first revision, valid since creation.
+        # Checked again under the write lock: workers starting together must backfill only once.
+        with self._write() as (conn, _):
+            if conn.execute("SELECT 1 FROM versions LIMIT 1").fetchone() is None:
+                for kind in KIND_CLASSES:
+                    changes = [(row_id, json.loads(data)) for row_id, data in conn.execute(f"SELECT id, data FROM {kind} ORDER BY seq")]
+                    self._stamp(conn, kind, changes, "")
+                    conn.executemany(f"UPDATE {kind} SET data = ? WHERE id = ?", [(json.dumps(data), row_id) for row_id, data in changes])
+
+    @contextmanager
+    def _write(self):
+        """BEGIN IMMEDIATE … COMMIT; yields the connection and the change timestamp."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn, _now()
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _stamp(conn, kind: str, changes: list, now: str) -> None:
+        """Close the current revision of each changed row and append the new one, stamping data["version"].
+
+        `changes` is [(id, dict or None for a deletion)]; runs inside the caller's write transaction.
+        """
+        if not changes:
+            return
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'versions'").fetchone()
+        version = row[0] if row else 0
+        conn.executemany(
+            "UPDATE versions SET valid_to = ? WHERE kind = ? AND id = ? AND valid_to IS NULL",
+            [(now, kind, row_id) for row_id, _ in changes],
+        )
+        rows = []
+        for row_id, data in changes:
+            version += 1
+            if data is None:
+                rows.append((version, kind, row_id, now, now, None))
+            else:
+                data["version"] = version
+                rows.append((version, kind, row_id, now, None, json.dumps(data)))
+        conn.executemany("INSERT INTO versions (version, kind, id, valid_from, valid_to, data) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    @staticmethod
+    def _fresh(conn, table: str, rows: list) -> list:
+        """Rows whose ID is neither in `table` nor earlier in the batch."""
+        seen = {}
+        for row in rows:
+            seen.setdefault(row["id"], row)
+        ids = list(seen)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            for (existing,) in conn.execute(f"SELECT id FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk):
+                del seen[existing]
+        return list(seen.values())
+
+    def _rows_as_of(self, kind: str, as_of: str) -> list:
+        cls = KIND_CLASSES[kind]
+        rows = self._conn().execute(
+            "SELECT data FROM versions WHERE kind = ? AND valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)"
+            " AND data IS NOT NULL ORDER BY version",
+            (kind, as_of, as_of),
+        )
+        return [cls(**json.loads(data)) for (data,) in rows]
+
+    @staticmethod
+    def _where(filters: dict):
+        clauses, params = [], []
+        for field, wanted in filters.items():
+            if wanted is None:
+                continue
+            if field not in INDEXED_FIELDS:
+                raise ValueError(f"Cannot filter hazards on {field!r}")
+            if isinstance(wanted, (tuple, list, set)):
+                wanted = list(wanted)
+                clauses.append(f"{field} IN ({', '.join('?' * len(wanted))})")
+                params.extend(wanted)
+            else:
+                clauses.append(f"{field} = ?")
+                params.append(wanted)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    _INSERT_SQL = "INSERT OR IGNORE INTO hazards (id, status, category, station, area, perceived_risk, created_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+    @staticmethod
+    def _params(hazard: dict) -> tuple:
+        return (hazard["id"], *[hazard.get(f) or "" for f in INDEXED_FIELDS], json.dumps(hazard))
+
+    def add(self, hazard: dict) -> None:
+        # synchronous=NORMAL: the submission journal, not this commit, is the durability point
+        hazard = _as_dict(hazard)
+        with self._write() as (conn, now):
+            if conn.execute("SELECT 1 FROM hazards WHERE id = ?", (hazard["id"],)).fetchone() is None:
+                self._stamp(conn, "hazards", [(hazard["id"], hazard)], now)
+                conn.execute(self._INSERT_SQL, self._params(hazard))
+
+    def add_many(self, hazards: list, meta: tuple = None) -> None:
+        # A FULL-synchronous commit fsyncs the WAL, making every earlier NORMAL commit durable too
+        hazards = [_as_dict(h) for h in hazards]
+        conn = self._conn()
+        conn.execute("PRAGMA synchronous=FULL")
+        try:
+            with self._write() as (conn, now):
+                fresh = self._fresh(conn, "hazards", hazards)
+                self._stamp(conn, "hazards", [(h["id"], h) for h in fresh], now)
+                conn.executemany(self._INSERT_SQL, (self._params(h) for h in fresh))
+                if meta:
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta)
+        finally:
+            conn.execute("PRAGMA synchronous=NORMAL")
+
+    def apply_journal(self, records: list) -> None:
+        # Always commits (the meta row), so the journal can be truncated afterwards
+        self.add_many(records, meta=("journal_checkpoint", datetime.now(timezone.utc).isoformat(timespec="seconds")))
+
+    def get(self, hazard_id: str, as_of: str = None):
+        if as_of is not None:
+            row = self._conn().execute(
+                "SELECT data FROM versions WHERE kind = 'hazards' AND id = ? AND valid_from <= ?"
+                " AND (valid_to IS NULL OR valid_to > ?) AND data IS NOT NULL",
+                (hazard_id, as_of, as_of),
+            ).fetchone()
+        else:
+            row = self._conn().execute("SELECT data FROM hazards WHERE id = ?", (hazard_id,)).fetchone()
+        return HazardRecord(**json.loads(row[0])) if row else None
+
+    def set_status(self, hazard_id: str, status: str):
+        with self._write() as (conn, now):
+            row = conn.execute("SELECT data FROM hazards WHERE id = ?", (hazard_id,)).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            previous = data.get("status", "")
+            data["status"] = status
+            self._stamp(conn, "hazards", [(hazard_id, data)], now)
+            conn.execute("UPDATE hazards SET status = ?, data = ? WHERE id = ?", (status, json.dumps(data), hazard_id))
+        return previous
+
+    def query(self, status=None, category=None, station=None, area=None, limit=None, as_of=None) -> list:
+        filters = {"status": status, "category": category, "station": station, "area": area}
+        if as_of is not None:
+            return _filter(self._rows_as_of("hazards", as_of), {f: v for f, v in filters.items() if v is not None}, limit)
+        where, params = self._where(filters)
+        sql = f"SELECT data FROM hazards{where} ORDER BY seq"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        return [HazardRecord(**json.loads(data)) for (data,) in self._conn().execute(sql, params)]
+
+    def count(self, as_of: str = None, **filters) -> int:
+        if as_of is not None:
+            return len(self.query(as_of=as_of, **filters))
+        where, params = self._where(filters)
+        return self._conn().execute(f"SELECT COUNT(*) FROM hazards{where}", params).fetchone()[0]
+
+    def count_by(self, field: str, as_of: str = None) -> dict:
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Cannot group hazards by {field!r}")
+        if as_of is not None:
+            counts = {}
+            for h in self._rows_as_of("hazards", as_of):
+                key = h.get(field) or ""
+                counts[key] = counts.get(key, 0) + 1
+            return counts
+        return dict(self._conn().execute(f"SELECT {field}, COUNT(*) FROM hazards GROUP BY {field}"))
+
+    def add_linked(self, kind: str, record: dict) -> None:
+        record = _as_dict(record)
+        with self._write() as (conn, now):
+            if conn.execute(f"SELECT 1 FROM {kind} WHERE id = ?", (record["id"],)).fetchone() is None:
+                self._stamp(conn, kind, [(record["id"], record)], now)
+                conn.execute(
+                    f"INSERT INTO {kind} (id, hazard_id, status, data) VALUES (?, ?, ?, ?)",
+                    (record["id"], record.get("hazard_id") or "", record.get("status") or "", json.dumps(record)),
+                )
+
+    def linked(self, kind: str, hazard_ids=None, as_of: str = None) -> list:
+        cls = LINKED_KINDS[kind]
+        if as_of is not None:
+            rows = self._rows_as_of(kind, as_of)
+            if hazard_ids is None:
+                return rows
+            wanted = set(hazard_ids)
+            return [r for r in rows if r.get("hazard_id") in wanted]
+        if hazard_ids is None:
+            rows = self._conn().execute(f"SELECT data FROM {kind} ORDER BY seq")
+        else:
+            hazard_ids = list(hazard_ids)
+            if not hazard_ids:
+                return []
+            rows = self._conn().execute(
+                f"SELECT data FROM {kind} WHERE hazard_id IN ({', '.join('?' * len(hazard_ids))}) ORDER BY seq",
+                hazard_ids,
+            )
+        return [cls(**json.loads(data)) for (data,) in rows]
+
+    def archive_candidates(self, statuses, before: str, limit: int) -> list:
+        statuses = list(statuses)
+        rows = self._conn().execute(
+            f"SELECT data FROM hazards WHERE status IN ({', '.join('?' * len(statuses))}) AND created_at < ? AND created_at GLOB ?"
+            " ORDER BY created_at LIMIT ?",
+            (*statuses, before, "[0-9][0-9][0-9][0-9]-[0-9][0-9]*", int(limit)),
+        )
+        return [HazardRecord(**json.loads(data)) for (data,) in rows]
+
+    def remove(self, hazard_ids) -> None:
+        hazard_ids = list(hazard_ids)
+        if not hazard_ids:
+            return
+        marks = ", ".join("?" * len(hazard_ids))
+        with self._write() as (conn, now):
+            for kind in LINKED_KINDS:
+                gone = [(row_id, None) for (row_id,) in conn.execute(f"SELECT id FROM {kind} WHERE hazard_id IN ({marks})", hazard_ids)]
+                self._stamp(conn, kind, gone, now)
+                conn.execute(f"DELETE FROM {kind} WHERE hazard_id IN ({marks})", hazard_ids)
+            gone = [(row_id, None) for (row_id,) in conn.execute(f"SELECT id FROM hazards WHERE id IN ({marks})", hazard_ids)]
+            self._stamp(conn, "hazards", gone, now)
+            conn.execute(f"DELETE FROM hazards WHERE id IN ({marks})", hazard_ids)
+
+    def current_version(self) -> int:
+        row = self._conn().execute("SELECT seq FROM sqlite_sequence WHERE name = 'versions'").fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, version: int, limit: int = 1000) -> list:
+        rows = self._conn().execute(
+            "SELECT version, kind, id, data FROM versions WHERE version > ? ORDER BY version LIMIT ?",
+            (version, int(limit)),
+        )
+        return [
+            (v, kind, row_id, KIND_CLASSES[kind](**json.loads(data)) if data is not None else None)
+            for v, kind, row_id, data in rows
+        ]
+
+    def prune_history(self, before: str) -> int:
+        with self._write() as (conn, now):
+            return conn.execute("DELETE FROM versions WHERE valid_to IS NOT NULL AND valid_to < ?", (before,)).rowcount
+
+    def forget(self, kind: str, ids) -> int:
+        ids = list(ids)
+        forgotten = 0
+        with self._write() as (conn, now):
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                forgotten += conn.execute(
+                    f"DELETE FROM versions WHERE kind = ? AND id IN ({', '.join('?' * len(chunk))})"
+                    f" AND id NOT IN (SELECT id FROM {kind})",
+                    (kind, *chunk),
+                ).rowcount
+        return forgotten
+
+
+def open_store(kind: str = HAZARD_STORE, path: str = HAZARD_DB_PATH) -> HazardStore:
+    """Build the configured hazard store ("sqlite" or "memory")."""
+    if kind == "memory":
+        return MemoryHazardStore()
+    if kind == "sqlite":
+        return SqliteHazardStore(path)
+    raise ValueError(f"Unknown hazard store {kind!r}")
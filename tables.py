@@ -0,0 +1,89 @@
+"""
+HIRS record tables: the stored rows of one kind (hazards, CAPA actions, investigations) as one
+worker holds them for its indexes. The search index and the filter bitmaps of a kind share one
+table: records are read from the store and follow its change feed once, and the indexes keep
+doc numbers into the table rather than records of their own. (A SQLite store parses fresh records
+on every read, so two indexes each loading the register meant two copies of every record.)
+
+A row keeps its doc number while it exists – an edit replaces the record under the same number –
+and numbers are handed out in store insertion order, so ascending doc numbers are list order.
+"""
+import gc
+import threading
+
+
+class RecordTable:
+    """doc number -> record and row id -> doc number for one kind, plus the indexes following it.
+
+    An index attaches with a loader (called once with the rows present) and a change handler, called
+    as changed(row_id, number, old record or None, new record or None) for each change the table
+    applies after that. Both run under the table's lock.
+    """
+
+    def __init__(self, store, kind: str = "hazards"):
+        self.store = store
+        self.kind = kind
+        self.records = {}  # live doc number -> record
+        self.numbers = {}  # row id -> live doc number
+        self._next = 0
+        self._handlers = []
+        # Held while changes are applied: the attached indexes take the same lock for their reads, so
+        # a reader never sees a record the indexes have not caught up with
+        self.lock = threading.Lock()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()  # the bulk load allocates millions of small objects
+        try:
+            # Read the version first: changes racing with the bulk load are replayed (idempotently) by refresh()
+            self.version = store.current_version()
+            for record in store.all() if kind == "hazards" else store.linked(kind):
+                self._put(record["id"], record)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, row_id):
+        number = self.numbers.get(row_id)
+        return None if number is None else self.records[number]
+
+    def attach(self, load, changed) -> None:
+        """Start feeding an index: load(table) now, then changed(...) for every change refresh() applies."""
+        with self.lock:
+            load(self)
+            self._handlers.append(changed)
+
+    def _put(self, row_id, record):
+        """Store a record; returns (number, the record it replaced or None)."""
+        number = self.numbers.get(row_id)
+        if number is None:
+            number = self.numbers[row_id] = self._next
+            self._next += 1
+            old = None
+        else:
+            old = self.records[number]
+        self.records[number] = record
+        return number, old
+
+    def refresh(self) -> int:
+        """Apply store changes made since the last call (by any worker) and pass them on to the
+        attached indexes. Returns how many were applied."""
+        applied = 0
+        with self.lock:
+            while True:
+                changes = self.store.changes_since(self.version, limit=5000)
+                for version, kind, row_id, record in changes:
+                    if kind == self.kind:
+                        if record is None:
+                            number = self.numbers.pop(row_id, None)
+                            old = None if number is None else self.records.pop(number)
+                        else:
+                            number, old = self._put(row_id, record)
+                        if number is not None:
+                            for changed in self._handlers:
+                                changed(row_id, number, old, record)
+                    self.version = version
+                applied += len(changes)
+                if len(changes) < 5000:
+                    return applied
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# config.py reads the environment at import: keep test runs off the real data folder
+os.environ.setdefault("HIRS_DATA_DIR", tempfile.mkdtemp(prefix="hirs-tests-"))
+os.environ.setdefault("HIRS_HAZARD_STORE", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,139 @@
+import gzip
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from archive import archive_closed, partitions, purge_expired, read_partition, run_once, search_archive
+from store import MemoryHazardStore, SqliteHazardStore, _now
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return MemoryHazardStore() if request.param == "memory" else SqliteHazardStore(str(tmp_path / "hirs.db"))
+
+
+def _hazard(i, created_at, status="Closed"):
+    return {"id": f"HZ-{i:04d}", "title": f"Cone at stand {i}", "status": status, "category": "Airside / Ramp", "created_at": created_at}
+
+
+class _Audit:
+    def __init__(self):
+        self.entries = []
+
+    def append(self, entity_id, action, actor, details=None):
+        self.entries.append((entity_id, action, details))
+
+
+def _stored_ids(store):
+    """Every row id with a revision in the as-of history."""
+    if isinstance(store, MemoryHazardStore):
+        return {e[2] for e in store._history}
+    with sqlite3.connect(store.path) as conn:
+        return {row_id for (row_id,) in conn.execute("SELECT id FROM versions")}
+
+
+def test_purged_reports_leave_nothing_in_the_history(store, tmp_path):
+    store.add_many([_hazard(1, "2015-03-04T10:00:00+00:00"), _hazard(2, "2024-03-04T10:00:00+00:00"),
+                    _hazard(3, "2015-03-09T10:00:00+00:00", status="Triage")])
+    store.add_linked("capa", {"id": "CAPA-0001", "action": "Repaint stand", "hazard_id": "HZ-0001", "status": "Open"})
+    store.add_linked("investigations", {"id": "INV-0001", "title": "Stand review", "hazard_id": "HZ-0001", "status": "Open"})
+    store.set_status("HZ-0001", "Rejected")
+    before = _now()
+
+    moved, purged = run_once(store, now=NOW, archive_dir=str(tmp_path / "archive"))
+
+    # HZ-0001 (2015) was archived and its partition is past retention; HZ-0002 (2024) stays archived;
+    # HZ-0003 is still open and never left the store
+    assert (moved, purged) == (2, ["2015-03"])
+    assert [month for month, _ in partitions(str(tmp_path / "archive"))] == ["2024-03"]
+    assert [h["id"] for h in search_archive(archive_dir=str(tmp_path / "archive"))] == ["HZ-0002"]
+    assert store.get("HZ-0001", as_of=before) is None
+    assert store.linked("capa", as_of=before) == [] and store.linked("investigations", as_of=before) == []
+    assert store.get("HZ-0002", as_of=before)["status"] == "Closed"  # archived, not purged: its history stays
+    assert store.get("HZ-0003")["status"] == "Triage"
+    assert _stored_ids(store) >= {"HZ-0002", "HZ-0003"}
+    assert not _stored_ids(store) & {"HZ-0001", "CAPA-0001", "INV-0001"}
+
+
+def test_archived_reports_round_trip_with_their_linked_rows(store, tmp_path):
+    archive_dir, audit = str(tmp_path / "archive"), _Audit()
+    store.add_many([_hazard(i, f"2024-0{1 + i % 3}-1{i % 10}T08:00:00+00:00") for i in range(1, 8)]
+                   + [_hazard(8, "2024-01-05T08:00:00+00:00", status="Triage"), _hazard(9, "2026-05-01T08:00:00+00:00")])
+    store.add_linked("capa", {"id": "CAPA-0001", "action": "Repaint stand", "hazard_id": "HZ-0002", "status": "Closed"})
+    store.add_linked("investigations", {"id": "INV-0001", "title": "Stand review", "hazard_id": "HZ-0002", "status": "Closed"})
+    before = {h["id"]: h.to_dict() for h in store.all()}
+
+    assert archive_closed(store, NOW, archive_dir, batch_size=3, audit=audit) == 7  # three batches
+
+    # Closed and old enough left the store; still open (HZ-0008) or too recent (HZ-0009) stayed
+    assert sorted(h["id"] for h in store.all()) == ["HZ-0008", "HZ-0009"]
+    assert store.linked("capa") == [] and store.linked("investigations") == []
+    assert [month for month, _ in partitions(archive_dir)] == ["2024-01", "2024-02", "2024-03"]
+    entries = {e["hazard"]["id"]: e for _, path in partitions(archive_dir) for e in read_partition(path)}
+    assert sorted(entries) == [f"HZ-000{i}" for i in range(1, 8)]
+    for hazard_id, entry in entries.items():
+        assert entry["hazard"] == before[hazard_id], hazard_id
+    assert [r["id"] for r in entries["HZ-0002"]["capa"]] == ["CAPA-0001"]
+    assert [r["id"] for r in entries["HZ-0002"]["investigations"]] == ["INV-0001"]
+    assert sorted(e[0] for e in audit.entries if e[1] == "archived") == sorted(entries)
+    assert archive_closed(store, NOW, archive_dir) == 0  # nothing left to move
+
+
+def test_archive_search_filters_and_skips_copies(tmp_path):
+    store, archive_dir = MemoryHazardStore(), str(tmp_path / "archive")
+    store.add_many([dict(_hazard(1, "2023-01-10T08:00:00+00:00"), title="Ölfleck at stand 7"),
+                    dict(_hazard(2, "2023-05-10T08:00:00+00:00", status="Rejected"), category="Cargo"),
+                    _hazard(3, "2024-02-10T08:00:00+00:00")])
+    archive_closed(store, NOW, archive_dir)
+    # A crash between writing a batch and removing it from the store: the batch is archived twice
+    store.add_many([_hazard(3, "2024-02-10T08:00:00+00:00")])
+    archive_closed(store, NOW, archive_dir)
+
+    def found(**kwargs):
+        return [h["id"] for h in search_archive(archive_dir=archive_dir, **kwargs)]
+
+    assert found() == ["HZ-0003", "HZ-0002", "HZ-0001"]  # newest month first, each report once
+    assert found(text="OLFLECK") == ["HZ-0001"]
+    assert found(status="Rejected") == ["HZ-0002"] and found(category="Cargo") == ["HZ-0002"]
+    assert found(date_from="2023-02-01", date_to="2023-12-31") == ["HZ-0002"]
+    assert found(limit=2) == ["HZ-0003", "HZ-0002"]
+
+
+def test_a_torn_partition_keeps_what_was_written_before(tmp_path):
+    store, archive_dir = MemoryHazardStore(), str(tmp_path / "archive")
+    store.add_many([_hazard(1, "2024-01-10T08:00:00+00:00")])
+    archive_closed(store, NOW, archive_dir)
+    [(_, path)] = partitions(archive_dir)
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"hazard": {"id": "HZ-0002"}}\n')[:20])  # a crash mid-write
+    assert [e["hazard"]["id"] for e in read_partition(path)] == ["HZ-0001"]
+    assert [h["id"] for h in search_archive(archive_dir=archive_dir)] == ["HZ-0001"]
+
+
+def test_partitions_are_purged_once_their_whole_month_is_past_retention(tmp_path, caplog):
+    archive_dir, audit = str(tmp_path / "archive"), _Audit()
+    os.makedirs(archive_dir)
+    for month in ("2019-04", "2019-05", "2019-06", "2019-13"):
+        with gzip.open(os.path.join(archive_dir, f"hazards-{month}.jsonl.gz"), "wb") as gz:
+            gz.write(b'{"hazard": {"id": "HZ-0001"}}\n')
+    # Seven years before 2026-06-01: May 2019 ends on the horizon, June 2019 after it
+    with caplog.at_level(logging.WARNING, logger="archive"):
+        assert purge_expired(NOW, archive_dir, audit) == ["2019-04", "2019-05"]
+    assert [month for month, _ in partitions(archive_dir)] == ["2019-06", "2019-13"]
+    assert "hazards-2019-13" in caplog.text  # not a month: left alone, with a warning
+    assert [e[0] for e in audit.entries] == ["archive:2019-04", "archive:2019-05"]
+
+
+def test_only_one_worker_runs_the_archiver_at_a_time(tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    archive_dir = str(tmp_path / "archive")
+    os.makedirs(archive_dir)
+    with open(os.path.join(archive_dir, ".archiver.lock"), "a") as held:
+        fcntl.flock(held.fileno(), fcntl.LOCK_EX)
+        assert run_once(MemoryHazardStore(), NOW, archive_dir) is None
+    assert run_once(MemoryHazardStore(), NOW, archive_dir) == (0, [])
@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+
+from audit import AuditLog, verify_proof
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = AuditLog(str(tmp_path / "audit"), segment_bytes=2000)  # a dozen entries per segment
+    for i in range(60):
+        log.append(f"HZ-{i % 7:04d}", "status", "tester", {"n": i})
+    assert len(log.manifest()) >= 3
+    return log
+
+
+def _rewrite(log, number, change):
+    path = log._segment_path(number)
+    with open(path, "rb") as f:
+        lines = f.readlines()
+    change(lines)
+    with open(path, "wb") as f:
+        f.writelines(lines)
+
+
+def test_intact_log_verifies(log):
+    assert log.verify(workers=1) is None
+    assert log.verify(workers=2) is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_edited_entry_in_sealed_segment(log, workers):
+    seg = log.manifest()[1]
+
+    def edit(lines):
+        entry = json.loads(lines[2])
+        entry["actor"] = "someone else"
+        lines[2] = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+
+    _rewrite(log, seg["segment"], edit)
+    assert log.verify(workers=workers) == {"segment": seg["segment"], "seq": seg["first_seq"] + 2, "reason": "entry modified (hash mismatch)"}
+
+
+def test_removed_entry_is_detected(log):
+    seg = log.manifest()[0]
+    _rewrite(log, seg["segment"], lambda lines: lines.pop(4))
+    assert log.verify(workers=1) == {"segment": seg["segment"], "seq": seg["first_seq"] + 4, "reason": f"sequence gap (found {seg['first_seq'] + 5})"}
+
+
+def test_edited_entry_in_active_segment(log):
+    active = log.manifest()[-1]["segment"] + 1
+
+    def edit(lines):
+        entry = json.loads(lines[0])
+        entry["details"] = {"n": -1}
+        lines[0] = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+
+    _rewrite(log, active, edit)
+    failure = log.verify(workers=1)
+    assert failure is not None and failure["segment"] == active
+
+
+def test_inclusion_proofs(log):
+    entries = list(log.entries())
+    assert [e["seq"] for e in entries] == list(range(1, 61))
+    proofs = log.proofs(entries)
+    assert proofs
+    for e in entries:
+        if e["seq"] in proofs:
+            _, root, proof = proofs[e["seq"]]
+            assert verify_proof(e["hash"], proof, root)
+            assert not verify_proof(e["hash"], proof, "0" * 64)
+
+
+def test_indexed_reads_match_a_scan(log):
+    entries = list(log.entries())
+    assert log.history("HZ-0003") == [e for e in entries if e["entity_id"] == "HZ-0003"]
+    ts_from, ts_to = entries[10]["ts"], entries[40]["ts"]
+    assert log.between(ts_from, ts_to) == [e for e in entries if ts_from <= e["ts"] <= ts_to]
+
+
+def test_chain_continues_across_instances(log):
+    other = AuditLog(log.directory, segment_bytes=log.segment_bytes)
+    entry = other.append("HZ-0001", "closed", "tester")
+    assert entry["seq"] == 61
+    assert log.append("HZ-0002", "closed", "tester")["seq"] == 62
+    assert log.verify(workers=1) is None
+
+
+def test_unreadable_line_is_set_aside_and_appends_go_on(log, tmp_path):
+    other = AuditLog(log.directory, segment_bytes=2000)  # a second worker
+    other.append("HZ-0001", "status", "tester")
+    number = len(log.manifest()) + 1
+    path = log._segment_path(number)
+    good = os.path.getsize(path)
+    # A write torn by a crash, then another worker's line run into it: complete, but not JSON
+    torn = b'{"seq":62,"ts":"2026-' + b'{"seq":62,"ts":"2026-01-01T00:00:00+00:00","entity_id":"HZ-0002"}\n'
+    with open(path, "ab") as f:
+        f.write(torn)
+
+    entry = log.append("HZ-0003", "status", "tester")
+    assert other.append("HZ-0004", "status", "tester")["seq"] == entry["seq"] + 1
+
+    assert log.verify(workers=1) is None
+    assert os.path.getsize(path) == good  # the segment was cut before the bad line and sealed
+    assert log.manifest()[-1]["segment"] == number
+    saved = tmp_path / "audit" / f"audit-{number:06d}.log.corrupt-{good}"
+    assert saved.read_bytes() == torn
+    (note,) = log.history("audit-log")
+    assert note["action"] == "set_aside" and note["details"] == {"segment": number, "offset": good, "bytes": len(torn), "file": saved.name}
+    assert note["seq"] == entry["seq"] - 1
@@ -0,0 +1,105 @@
+import random
+import threading
+
+import pytest
+
+from bitmaps import BitmapIndex, members
+from config import HAZARD_AREAS, WORKFLOW_STATUSES
+from store import MemoryHazardStore
+
+STATIONS = ["Main Ramp", "North Ramp", "Terminal B", ""]
+RISKS = ["Low", "Moderate", "High", "Critical"]
+
+
+def _hazards(count, rng):
+    return [{"id": f"HZ-{i:05d}", "title": f"Report {i}", "status": rng.choice(WORKFLOW_STATUSES),
+             "category": rng.choice(HAZARD_AREAS), "station": rng.choice(STATIONS), "perceived_risk": rng.choice(RISKS)}
+            for i in range(count)]
+
+
+def _linear(store, **filters):
+    def keep(row):
+        for field, wanted in filters.items():
+            value = row.get(field) or ""
+            if isinstance(wanted, (list, tuple)) and value not in wanted or isinstance(wanted, str) and value != wanted:
+                return False
+        return True
+    return [r["id"] for r in store.all() if keep(r)]
+
+
+@pytest.fixture
+def index():
+    rng = random.Random(5)
+    store = MemoryHazardStore()
+    store.add_many(_hazards(800, rng))
+    return BitmapIndex(store)
+
+
+FILTERS = [
+    {},
+    {"status": "Submitted"},
+    {"status": ["Submitted", "Closed"], "station": "Main Ramp"},
+    {"category": HAZARD_AREAS[0], "perceived_risk": ("High", "Critical")},
+    {"station": ""},  # rows without a station
+    {"status": "No such status"},
+    {"status": None, "category": "", "station": []},  # empty filters are ignored
+]
+
+
+@pytest.mark.parametrize("filters", FILTERS, ids=repr)
+def test_select_and_counts_agree_with_a_linear_filter(index, filters):
+    def check():
+        expected = _linear(index.store, **{f: v for f, v in filters.items() if v not in (None, "", [])})
+        bits = index.select(**filters)
+        assert [r["id"] for r in index.rows(bits)] == expected
+        assert index.count(**filters) == len(expected)
+        for field in index.fields:
+            by_value = {}
+            for row in index.store.all():
+                if row["id"] in expected:
+                    value = row.get(field) or ""
+                    by_value[value] = by_value.get(value, 0) + 1
+            assert index.counts(field, bits) == by_value, field
+
+    check()
+    # Writes arrive through the change feed: edits, new rows and removals
+    rows = index.store.all()
+    for row in rows[:100]:
+        index.store.set_status(row["id"], "Closed")
+    index.store.add_many(_hazards(850, random.Random(6))[800:])
+    index.store.remove([r["id"] for r in rows[300:350]])
+    check()
+
+
+def test_unfiltered_counts_cover_the_live_rows(index):
+    index.store.remove([r["id"] for r in index.store.all()[:40]])
+    for field in index.fields:
+        counts = index.counts(field)
+        assert sum(counts.values()) == len(index.store.all()) == len(members(index.select())), field
+
+
+def test_select_reads_its_bitsets_from_one_refresh(index):
+    # A row moves and another thread refreshes between the select's two bitset reads: still counted once
+    row = next(r for r in index.store.all() if r["status"] == "Submitted")
+    wanted = ("Triage", "Submitted")
+    total = index.count(status=wanted)
+    refreshers = []
+
+    class Interleaved(dict):
+        def get(self, value, default=None):
+            bits = super().get(value, default)
+            if value == "Triage" and not refreshers:
+                index.store.set_status(row["id"], "Triage")
+                refreshers.append(threading.Thread(target=index.refresh))
+                refreshers[0].start()
+                refreshers[0].join(0.2)  # waits on the table lock while the select holds it
+            return bits
+
+    index._bitmaps["status"] = Interleaved(index._bitmaps["status"])
+    try:
+        assert index.count(status=wanted) == total
+    finally:
+        for t in refreshers:
+            t.join()
+    assert refreshers and index.count(status=wanted) == total
+    assert index.store.get(row["id"])["status"] == "Triage"
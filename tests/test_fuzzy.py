@@ -0,0 +1,56 @@
+import pytest
+
+import corpus
+from fuzzy import SpellingIndex, covers
+from query import Entity, QueryEngine
+from store import MemoryHazardStore
+
+EXTRA = (
+    {"id": "HZ-9000001", "title": "Pushback tractor stalled at Stand 12", "description": "Crew reported 7 times", "status": "Submitted"},
+    {"id": "HZ-9000002", "title": "Cone missing at stand 7", "description": "Pusback lane unmarked", "status": "Submitted"},
+    {"id": "HZ-9000003", "title": "Refuelling truck blocked wingtip clearance", "description": "", "status": "Triage"},
+)
+QUERIES = ["stand 7", "stand 1", "gate b12", "b1", "fod", "pusback", "pushback", "push back", "refuelling", "refueling",
+           "wing tip", "wingtip", "tractor pushback", "pushback stand 12", "hz-0001", "spill", "cone near", "no such text"]
+
+
+@pytest.fixture(scope="module")
+def engines():
+    store = MemoryHazardStore()
+    store.add_many(list(corpus.hazards(3000)))
+    for row in EXTRA:
+        store.add(dict(row, category="Airside / Ramp"))
+    engines = {}
+    for fuzzy in (False, True):
+        engines[fuzzy] = QueryEngine(store, fuzzy=fuzzy)
+        engines[fuzzy].register(Entity("hazards", "hazards", ()))
+    return engines
+
+
+def test_numbers_and_short_words_stay_next_to_their_neighbours():
+    spelling = SpellingIndex()
+    spelling.add_text("stand pushback tractor wing tip")
+    assert spelling.variants("stands 7") == (("stands 7", "stand 7"),)
+    assert spelling.variants("stand 7") is None  # nothing to try but the phrase itself
+    assert spelling.variants("pusback tractor") == (("pusback", "pushback"), ("tractor",))  # long words: any order
+    assert covers("wingtip\x03\x03", spelling.variants("wing tip"))
+    assert not covers("stand 12\x03\x03crew reported 7 times\x03\x03", spelling.variants("stands 7"))
+
+
+def test_fuzzy_keeps_the_exact_results_first_and_unchanged(engines):
+    for text in QUERIES:
+        exact = [r["id"] for r in engines[False].run("hazards", text)]
+        fuzzy = [r["id"] for r in engines[True].run("hazards", text)]
+        assert fuzzy[:len(exact)] == exact, text
+        assert len(fuzzy) >= len(exact) and len(set(fuzzy)) == len(fuzzy), text
+        for status in ("Submitted", "Triage"):
+            exact = [r["id"] for r in engines[False].run("hazards", text, status=status)]
+            assert [r["id"] for r in engines[True].run("hazards", text, status=status)][:len(exact)] == exact, (text, status)
+
+
+def test_fuzzy_does_not_scatter_a_number_across_the_report(engines):
+    found = [r["id"] for r in engines[True].run("hazards", "stand 7")]
+    assert "HZ-9000002" in found and "HZ-9000001" not in found
+    found = [r["id"] for r in engines[True].run("hazards", "pusback")]
+    assert found[0] == "HZ-9000002"  # the exact hit before the close spellings
+    assert "HZ-9000001" in found
@@ -0,0 +1,72 @@
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from ids import SequenceAllocator
+
+
+def _allocate(path, threads, per_thread):
+    """IDs taken by each of `threads` threads of one process, in the order each thread got them."""
+    allocator = SequenceAllocator(path, block_size=7, floors={"HZ": 6, "CA": 4, "INV": 4})
+    results = [[] for _ in range(threads)]
+
+    def worker(out):
+        for i in range(per_thread):
+            out.append(allocator.next_id(("HZ", "CA", "INV")[i % 3]))
+
+    pool = [threading.Thread(target=worker, args=(out,)) for out in results]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return results
+
+
+def test_unique_and_ordered_across_processes_and_threads(tmp_path):
+    path = str(tmp_path / "ids.db")
+    with ProcessPoolExecutor(max_workers=3) as ex:
+        per_thread = [ids for f in [ex.submit(_allocate, path, 4, 150) for _ in range(3)] for ids in f.result()]
+    all_ids = [i for ids in per_thread for i in ids]
+    assert len(all_ids) == 3 * 4 * 150
+    duplicates = sorted(i for i, n in Counter(all_ids).items() if n > 1)
+    assert not duplicates
+    for prefix, floor in (("HZ", 6), ("CA", 4), ("INV", 4)):
+        numbers = sorted(int(i.split("-")[1]) for i in all_ids if i.startswith(prefix + "-"))
+        assert numbers[0] >= floor, prefix
+    for ids in per_thread:
+        last = {}
+        for hid in ids:
+            prefix, n = hid.split("-")
+            assert int(n) > last.get(prefix, 0), (hid, last)
+            last[prefix] = int(n)
+
+
+def test_floor_and_format(tmp_path):
+    allocator = SequenceAllocator(str(tmp_path / "ids.db"), block_size=5, floors={"HZ": 6})
+    assert allocator.next_id("HZ") == "HZ-0006"
+    assert allocator.next_id("CA") == "CA-0001"
+
+
+def test_bulk_lease_does_not_overlap(tmp_path):
+    path = str(tmp_path / "ids.db")
+    a, b = SequenceAllocator(path, block_size=10), SequenceAllocator(path, block_size=10)
+    single = [a.next_id("HZ") for _ in range(3)]
+    bulk = b.next_ids("HZ", 25)
+    assert not set(single) & set(bulk)
+    assert a.next_id("HZ") not in bulk
+
+
+def test_memory_mode_is_thread_safe():
+    allocator = SequenceAllocator(None, block_size=3)
+    out = []
+
+    def take():
+        ids = [allocator.next_id("HZ") for _ in range(200)]
+        out.extend(ids)
+
+    threads = [threading.Thread(target=take) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(out)) == 1600
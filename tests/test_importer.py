@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from ids import SequenceAllocator
+from importer import import_file, import_path, load_status, validate_row
+from store import MemoryHazardStore
+
+GOOD = {"title": "Loose FOD near stand 4", "category": "Airside / Ramp", "status": "Closed",
+        "created_at": "2021-05-04T09:15:00+00:00"}
+
+
+def test_valid_row_is_normalised():
+    hazard = validate_row(dict(GOOD, id="OLD-17", tags="Safety; Quality", likelihood="4", severity="3", reporting_mode=""))
+    assert hazard["legacy_id"] == "OLD-17" and "id" not in hazard
+    assert hazard["tags"] == ["Safety", "Quality"]
+    assert hazard["reporting_mode"] == "Named"
+    assert (hazard["likelihood"], hazard["severity"]) == (4, 3) and hazard["risk_score"] == 12
+
+
+@pytest.mark.parametrize("raw, stored", [
+    ("2021-05-04T09:15:00+00:00", "2021-05-04T09:15:00+00:00"),
+    ("2021-05-04T01:30:00+02:00", "2021-05-03T23:30:00+00:00"),  # a day and a month earlier in UTC
+    ("2021-06-01T00:30:00+05:30", "2021-05-31T19:00:00+00:00"),
+    ("2021-05-04", "2021-05-04T00:00:00+00:00"),  # no offset: taken as UTC
+])
+def test_created_at_is_stored_in_utc(raw, stored):
+    assert validate_row(dict(GOOD, created_at=raw))["created_at"] == stored
+
+
+@pytest.mark.parametrize("change, reason", [
+    ({"title": " "}, "title is required"),
+    ({"category": "Galley"}, "unknown category 'Galley'"),
+    ({"subcategory": "Bird strike"}, "subcategory 'Bird strike' is not under 'Airside / Ramp'"),
+    ({"status": "Done"}, "unknown status 'Done'"),
+    ({"classification": "Gossip"}, "unknown classification 'Gossip'"),
+    ({"perceived_risk": "Extreme"}, "unknown perceived risk 'Extreme'"),
+    ({"tags": "Safety;Fun"}, "unknown tags ['Fun']"),
+    ({"tags": 3}, "tags must be a list or a ;-separated string, not int"),
+    ({"reporting_mode": "Secret"}, "unknown reporting mode 'Secret'"),
+    ({"created_at": ""}, "created_at is required"),
+    ({"created_at": "04/05/2021"}, "created_at '04/05/2021' is not an ISO date"),
+    ({"likelihood": "4"}, "likelihood and severity must both be integers 1–5"),
+    ({"likelihood": "6", "severity": "1"}, "likelihood and severity must both be integers 1–5"),
+])
+def test_bad_rows_are_rejected_with_a_reason(change, reason):
+    with pytest.raises(ValueError) as exc:
+        validate_row(dict(GOOD, **change))
+    assert str(exc.value) == reason
+
+
+def test_import_counts_and_reports_rejected_lines(tmp_path):
+    path = tmp_path / "history.jsonl"
+    rows = [GOOD, dict(GOOD, reporting_mode="Secret"), "not an object", dict(GOOD, title="Second")]
+    path.write_text("\n".join(json.dumps(r) for r in rows) + "\n{broken\n", encoding="utf-8")
+    store = MemoryHazardStore()
+    result = import_file(str(path), store, SequenceAllocator(None), batch_size=1)
+    assert (result.state, result.imported, result.rejected) == ("done", 2, 3)
+    assert result.errors[0] == "line 2: unknown reporting mode 'Secret'"
+    assert result.errors[1] == "line 3: expected a JSON object"
+    assert result.errors[2].startswith("line 5: invalid JSON")
+    assert sorted(h["title"] for h in store.all()) == ["Loose FOD near stand 4", "Second"]
+
+
+def test_import_path_stays_in_the_import_folder(tmp_path):
+    (tmp_path / "imports").mkdir()
+    (tmp_path / "imports" / "history.csv").write_text("title\n", encoding="utf-8")
+    (tmp_path / "secret.csv").write_text("title\n", encoding="utf-8")
+    folder = str(tmp_path / "imports")
+    assert import_path("history.csv", folder) == str(tmp_path / "imports" / "history.csv")
+    for name in ("../secret.csv", str(tmp_path / "secret.csv"), "missing.csv", ""):
+        with pytest.raises(ValueError):
+            import_path(name, folder)
+
+
+def test_failed_background_import_is_logged_and_recorded(monkeypatch, caplog):
+    import dash_app
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("disk gone")
+
+    monkeypatch.setattr(dash_app, "import_file", fail)
+    dash_app._run_import("/imports/history.csv")
+    status = load_status()
+    assert status["state"] == "failed" and status["errors"] == ["RuntimeError: disk gone"]
+    assert "HIRS import of /imports/history.csv failed" in caplog.text and "disk gone" in caplog.text
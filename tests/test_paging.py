@@ -0,0 +1,125 @@
+import pytest
+
+import corpus
+from bitmaps import sort_key
+from query import Entity, QueryEngine, sort_rows
+from store import MemoryHazardStore
+
+SAMPLES = ({"id": "HZ-0001", "title": "Vehicle-pedestrian conflict at gate B12", "status": "Submitted",
+            "category": "Airside / Ramp", "perceived_risk": "High"},)
+
+
+@pytest.fixture
+def engine():
+    store = MemoryHazardStore()
+    store.add_many(list(corpus.hazards(400)))
+    engine = QueryEngine(store, fuzzy=False)
+    engine.register(Entity("hazards", "hazards", SAMPLES, newest_first=True))
+    return engine
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+def _new(engine, n, **fields):
+    """n more reports, sorting anywhere (titles from the corpus)."""
+    start = len(engine.store.all())
+    rows = [dict(h.to_dict(), id=f"HZ-NEW-{start + i:04d}", **fields) for i, h in enumerate(corpus.hazards(n))]
+    engine.store.add_many(rows)
+    return rows
+
+
+# -- page: a cursor on a cached result --------------------------------------
+def test_next_continues_after_the_cursor_row_when_reports_arrive_at_the_top(engine):
+    rows = engine.run("hazards")
+    start, first = engine.page(rows, None, 25)
+    assert start == 0 and len(first) == 25
+    _new(engine, 10)  # newest first: the new reports go above the page being read
+    rows = engine.run("hazards")
+    start, second = engine.page(rows, {"after": first[-1]["id"], "at": 24}, 25)
+    assert _ids(rows[:10]) == [f"HZ-NEW-{i:04d}" for i in range(409, 399, -1)]
+    assert start == 35 and _ids(second) == _ids(rows[35:60])
+    start, back = engine.page(rows, {"before": second[0]["id"], "at": 35}, 25)
+    assert start == 10 and _ids(back) == _ids(first)
+
+
+def test_paging_every_row_once_while_writes_land_between_pages(engine):
+    seen, cursor = [], None
+    original = set(_ids(engine.run("hazards")))
+    while True:
+        rows = engine.run("hazards")
+        start, shown = engine.page(rows, cursor, 40)
+        seen.extend(_ids(shown))
+        if start + len(shown) >= len(rows):
+            break
+        cursor = {"after": shown[-1]["id"], "at": start + len(shown) - 1}
+        _new(engine, 3)
+    assert len(seen) == len(set(seen)), "a row was shown twice"
+    assert original <= set(seen), sorted(original - set(seen))[:5]
+
+
+def test_a_cursor_row_that_left_the_result_falls_back_to_its_position(engine):
+    rows = engine.run("hazards", status="Submitted")
+    _, first = engine.page(rows, None, 10)
+    engine.store.set_status(first[-1]["id"], "Closed")
+    rows_now = engine.run("hazards", status="Submitted")
+    start, shown = engine.page(rows_now, {"after": first[-1]["id"], "at": 9}, 10)
+    assert start == 9 and _ids(shown) == _ids(rows[10:20])  # the row below the one that left is not skipped
+    start, shown = engine.page(rows_now, {"before": first[-1]["id"], "at": 9}, 5)
+    assert start == 4 and _ids(shown) == _ids(rows[4:9])
+    start, shown = engine.page(rows_now, {"after": "HZ-GONE", "at": len(rows_now) + 50}, 10)
+    assert (start, _ids(shown)) == (len(rows_now) - 10, _ids(rows_now[-10:]))  # past the end: the last page
+
+
+# -- sorted_page: a cursor on a sort index ----------------------------------
+def _cursor(field, rows, start, after=True):
+    row = rows[-1] if after else rows[0]
+    at = start + len(rows) - 1 if after else start
+    return {"after" if after else "before": row["id"], "key": sort_key(field, row.get(field)), "at": at}
+
+
+@pytest.mark.parametrize("field,descending", [("title", False), ("title", True), ("perceived_risk", False),
+                                              ("status", True)])
+def test_sorted_pages_follow_the_sort_order_across_writes(engine, field, descending):
+    expected = sort_rows(engine.run("hazards"), field, descending)
+    start, first, total = engine.sorted_page("hazards", field, descending, None, 30)
+    assert (start, total) == (0, len(expected)) and _ids(first) == _ids(expected[:30])
+    # Rows added before and after the cursor, one moved across it, one removed, and the cursor row itself
+    _new(engine, 20)
+    engine.store.set_status(expected[40]["id"], "Closed")
+    engine.store.remove([expected[31]["id"], first[-1]["id"]])
+    expected = sort_rows(engine.run("hazards"), field, descending)
+    cursor = _cursor(field, first, 0)
+    anchor = (cursor["key"], cursor["after"])
+    following = [r for r in expected if ((sort_key(field, r.get(field)), r["id"]) < anchor if descending
+                                         else (sort_key(field, r.get(field)), r["id"]) > anchor)]
+    start, second, total = engine.sorted_page("hazards", field, descending, cursor, 30)
+    assert total == len(expected)
+    assert _ids(second) == _ids(following[:30])
+    start, back, _ = engine.sorted_page("hazards", field, descending, _cursor(field, second, start, after=False), 30)
+    above = [r for r in expected if r["id"] not in {x["id"] for x in following}]
+    assert _ids(back) == _ids(above[-30:] if len(above) >= 30 else expected[:30])  # else a full first page
+
+
+def test_sorted_paging_reaches_the_last_page_and_back_to_the_first(engine):
+    expected = sort_rows(engine.run("hazards", status="Submitted"), "title")
+    pages, cursor = [], None
+    while True:
+        start, shown, total = engine.sorted_page("hazards", "title", False, cursor, 7, status="Submitted")
+        assert total == len(expected)
+        if pages and _ids(shown) == pages[-1]:
+            break
+        pages.append(_ids(shown))
+        if start + len(shown) >= total:
+            break
+        cursor = _cursor("title", shown, start)
+    assert [i for page in pages for i in page] == _ids(expected)
+    start, shown, _ = engine.sorted_page("hazards", "title", False, _cursor("title", expected[7:14], 7, after=False), 7,
+                                         status="Submitted")
+    assert (start, _ids(shown)) == (0, _ids(expected[:7]))
+
+
+def test_sorting_by_a_field_without_a_sort_index_is_refused(engine):
+    with pytest.raises(ValueError, match="cannot be sorted by 'description'"):
+        engine.sorted_page("hazards", "description")
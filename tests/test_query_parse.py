@@ -0,0 +1,70 @@
+import pytest
+
+from query import Entity, QueryEngine, QuerySyntaxError
+from store import MemoryHazardStore
+
+
+@pytest.fixture(scope="module")
+def engine():
+    store = MemoryHazardStore()
+    store.add_many([
+        {"id": "HZ-0001", "title": "Note: FOD at stand 4", "status": "Triage", "category": "Airside / Ramp", "station": "Main Ramp",
+         "perceived_risk": "High", "created_at": "2026-02-03T10:00:00+00:00"},
+        {"id": "HZ-0002", "title": "Tug late, ETA=10 min", "status": "Closed", "category": "Airside / Ramp", "station": "Cargo",
+         "perceived_risk": "Low", "created_at": "2025-12-31T23:00:00+00:00"},
+    ])
+    engine = QueryEngine(store, fuzzy=False)
+    engine.register(Entity("hazards", "hazards"))
+    return engine
+
+
+@pytest.mark.parametrize("text, free, ids", [
+    ("Note: FOD at stand", "Note: FOD at stand", ["HZ-0001"]),
+    ("ETA=10", "ETA=10", ["HZ-0002"]),
+    ("note: fod", "note: fod", ["HZ-0001"]),
+    ("Note: FOD status:Triage", "Note: FOD", ["HZ-0001"]),
+    ("Note: FOD status:Closed", "Note: FOD", []),
+])
+def test_text_that_looks_like_a_term_is_searched(engine, text, free, ids):
+    assert engine.parse("hazards", text)["text"] == free
+    assert [h["id"] for h in engine.search("hazards", text)] == ids
+
+
+def test_known_fields_compile_to_filters_and_ranges(engine):
+    parsed = engine.parse("hazards", 'STATUS:triage,closed station:"Main Ramp" risk>=High created:>2026-01 fod')
+    assert parsed == {
+        "text": "fod",
+        "filters": {"status": ("Triage", "Closed"), "station": ("Main Ramp",), "perceived_risk": ("High", "Critical")},
+        "ranges": {"created_at": ("2026-02", None)},
+    }
+    assert [h["id"] for h in engine.search("hazards", "risk<High")] == ["HZ-0002"]
+
+
+@pytest.mark.parametrize("term, bounds", [
+    ("created:2026", ("2026", "2027")),
+    ("created:2025-12", ("2025-12", "2026-01")),
+    ("created:2025-12-31", ("2025-12-31", "2026-01-01")),
+    ("created>=2026-02", ("2026-02", None)),
+    ("created<=2026", (None, "2027")),
+    ("created<2026-02-29", None),  # not a date
+    ("created>=2025-12 created<2026-02", ("2025-12", "2026-02")),  # two terms: the overlap
+])
+def test_date_ranges(engine, term, bounds):
+    if bounds is None:
+        with pytest.raises(QuerySyntaxError, match="is not a valid date"):
+            engine.parse("hazards", term)
+    else:
+        assert engine.parse("hazards", term)["ranges"] == {"created_at": bounds}
+
+
+@pytest.mark.parametrize("text, message", [
+    ("status:Done", "No status 'Done'"),
+    ("status:", "'status:' needs a value"),
+    ("risk>Severe", "No risk 'Severe'. Levels: Low, Moderate, High, Critical"),
+    ("status>Triage", "status has no order: use status:value"),
+    ("created:last-week", "created: 'last-week' is not a date (YYYY, YYYY-MM or YYYY-MM-DD)"),
+])
+def test_bad_values_on_known_fields_are_errors(engine, text, message):
+    with pytest.raises(QuerySyntaxError) as exc:
+        engine.parse("hazards", text)
+    assert str(exc.value).startswith(message)
@@ -0,0 +1,106 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+import corpus
+
+NODE = shutil.which("node")
+pytestmark = pytest.mark.skipif(NODE is None, reason="assets/snapshot.js needs node outside the browser")
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "snapshot.js")
+# assets/snapshot.js outside the browser: the job on stdin, what its callbacks return on stdout
+HARNESS = r"""
+const fs = require("fs");
+const job = JSON.parse(fs.readFileSync(0, "utf8"));
+global.window = {dash_clientside: {no_update: {no_update: true}, callback_context: {triggered: []}}};
+eval(fs.readFileSync(job.script, "utf8"));
+const hirs = window.dash_clientside.hirs;
+let [snapshot] = hirs.mergeSnapshot(job.full, null);
+let [merged, version] = hirs.mergeSnapshot(job.delta, snapshot);
+const results = job.queries.map(q => {
+  window.dash_clientside.callback_context.triggered = [{prop_id: "hazards-search-request.data"}];
+  const out = hirs.filterHazards("/hazards", q.status, q.category, {text: q.text}, [], null, {size: q.size}, merged, job.templates, null, null);
+  return out[2] === window.dash_clientside.no_update ? out.slice(0, 2) : null;  // null: handed to the server
+});
+console.log(JSON.stringify({version, results}));
+"""
+WORDS = ["stand", "stand 7", "stand 1", "gate b12", "b1", "spill", "fuel", "cone", "pusback", "refuelling", "wing tip",
+         "wingtip", "refueling", "fod", "hz-0001", "new", "olfleck", "strasse", "é", "lighting near", "no such text", "note: cone", "ETA=10"]
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    """The first snapshot a browser gets, the delta it merges after writes, and the filter changes to replay."""
+    import dash_app
+    from config import HAZARD_AREAS, LIST_PAGE_SIZES, WORKFLOW_STATUSES
+    from snapshots import snapshot_delta
+
+    rng = random.Random(3)
+    hazards = [h.to_dict() for h in corpus.hazards(1500)]
+    hazards[0] = dict(hazards[0], title="Ölfleck at Stand 7 – pusback lane", description="Straße", area="B", station="")
+    hazards[1] = dict(hazards[1], title="Refuelling truck blocked wingtip clearance")
+    dash_app.STORE.add_many(hazards)
+    full = snapshot_delta(dash_app.STORE, None, dash_app.SAMPLE_HAZARDS)
+    # Status changes, new reports and removals made since the browser's snapshot
+    for h in rng.sample(hazards, 30):
+        dash_app.change_hazard_status(h["id"], rng.choice(WORKFLOW_STATUSES), "test")
+    added = [dict(h, id=h["id"] + "-NEW", title="New " + h["title"]) for h in hazards[:30]]
+    dash_app.STORE.add_many(added)
+    dash_app.STORE.remove([h["id"] for h in rng.sample(hazards[30:], 30)])
+    delta = snapshot_delta(dash_app.STORE, full["version"], dash_app.SAMPLE_HAZARDS)
+    queries = [{"text": text, "status": "", "category": "", "size": LIST_PAGE_SIZES[0]} for text in WORDS]
+    queries += [{"text": rng.choice([""] + WORDS), "status": rng.choice([""] * 3 + WORKFLOW_STATUSES),
+                "category": rng.choice([""] * 3 + HAZARD_AREAS), "size": rng.choice(LIST_PAGE_SIZES)} for _ in range(100)]
+    yield full, delta, queries
+    dash_app.STORE.remove([h["id"] for h in hazards + added])
+
+
+def _row_names(drawn) -> list:
+    """Report names in the order a drawn table shows them."""
+    if isinstance(drawn, list):
+        return [name for part in drawn for name in _row_names(part)]
+    if not isinstance(drawn, dict):
+        return []
+    props = drawn.get("props") or {}
+    if props.get("className") == "hazards-td-name":
+        return [props["children"]]
+    return _row_names(props.get("children"))
+
+
+@pytest.mark.parametrize("fuzzy", [False, True], ids=["exact", "fuzzy"])
+def test_browser_filter_draws_the_server_tables(snapshot, fuzzy, monkeypatch):
+    from plotly.io.json import to_json_plotly
+
+    import dash_app
+    from query import QueryEngine
+
+    full, delta, queries = snapshot
+    engine = QueryEngine(dash_app.STORE, fuzzy=fuzzy)
+    for entity in dash_app.QUERIES.entities.values():
+        engine.register(entity)
+    monkeypatch.setattr(dash_app, "QUERIES", engine)
+    templates = next(c.data for c in dash_app._client_filter_stores().children if c.id == "hazards-client-templates")
+    job = {"script": SCRIPT, "full": full, "delta": delta, "templates": templates, "queries": queries}
+    done = subprocess.run([NODE, "-e", HARNESS], input=json.dumps(job), capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+    out = json.loads(done.stdout)
+    # null: the merged snapshot holds a different number of rows than the server's
+    assert out["version"] == {"format": delta["format"], "version": delta["version"]}
+
+    differences = {}
+    for q, client in zip(queries, out["results"]):
+        table, view = dash_app._hazards_list(q["status"], q["category"], q["text"], [], None, {"size": q["size"]}, paging=False)
+        server = json.loads(to_json_plotly([table, view]))
+        if client is None:
+            differences[json.dumps(q)] = "handed to the server"
+            continue
+        if client[1]:
+            client[1].pop("client")
+        if client != server:
+            shown, expected = _row_names(client), _row_names(server)
+            differences[json.dumps(q)] = ({"browser": shown[:5], "server": expected[:5]} if shown != expected
+                                          else "same rows, drawn differently")
+    assert differences == {}
@@ -0,0 +1,110 @@
+import sqlite3
+import time
+
+import pytest
+
+from store import MemoryHazardStore, SqliteHazardStore, _now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return MemoryHazardStore() if request.param == "memory" else SqliteHazardStore(str(tmp_path / "hirs.db"))
+
+
+def _moment():
+    """A timestamp strictly between the writes before and after it."""
+    time.sleep(0.002)
+    moment = _now()
+    time.sleep(0.002)
+    return moment
+
+
+def _hazard(i, status="Submitted"):
+    return {"id": f"HZ-{i:04d}", "title": f"Report {i}", "status": status, "category": "Airside / Ramp"}
+
+
+def test_as_of_reads_see_each_revision(store):
+    before = _moment()
+    store.add_many([_hazard(1), _hazard(2)])
+    submitted = _moment()
+    store.set_status("HZ-0001", "Triage")
+    triaged = _moment()
+    store.set_status("HZ-0001", "Closed")
+    store.remove(["HZ-0002"])
+
+    assert store.get("HZ-0001", as_of=before) is None
+    assert store.get("HZ-0001", as_of=submitted)["status"] == "Submitted"
+    assert store.get("HZ-0001", as_of=triaged)["status"] == "Triage"
+    assert store.get("HZ-0001")["status"] == "Closed"
+    assert store.get("HZ-0002") is None
+    assert store.get("HZ-0002", as_of=triaged)["status"] == "Submitted"
+
+    assert store.count(as_of=before) == 0
+    assert store.count(as_of=triaged) == 2
+    assert store.count() == 1
+    assert store.count_by("status", as_of=triaged) == {"Triage": 1, "Submitted": 1}
+    assert [h["id"] for h in store.query(status="Submitted", as_of=submitted)] == ["HZ-0001", "HZ-0002"]
+
+
+def test_versions_are_stamped_and_fed_in_order(store):
+    start = store.current_version()
+    store.add_many([_hazard(1), _hazard(2)])
+    store.set_status("HZ-0002", "Triage")
+    store.add_linked("capa", {"id": "CA-0001", "hazard_id": "HZ-0002", "action": "Fix", "status": "Open"})
+    changes = store.changes_since(start)
+    assert [(kind, row_id) for _, kind, row_id, _ in changes] == [("hazards", "HZ-0001"), ("hazards", "HZ-0002"), ("hazards", "HZ-0002"), ("capa", "CA-0001")]
+    versions = [v for v, *_ in changes]
+    assert versions == sorted(versions) and versions[-1] == store.current_version()
+    assert store.get("HZ-0002")["version"] == versions[2]
+    assert store.changes_since(versions[1], limit=1)[0][0] == versions[2]
+
+
+def test_linked_rows_as_of(store):
+    store.add(_hazard(1))
+    before = _moment()
+    store.add_linked("capa", {"id": "CA-0001", "hazard_id": "HZ-0001", "action": "Fix", "status": "Open"})
+    after = _moment()
+    store.remove(["HZ-0001"])
+    assert store.linked("capa", as_of=before) == []
+    assert [r["id"] for r in store.linked("capa", ["HZ-0001"], as_of=after)] == ["CA-0001"]
+    assert store.linked("capa") == []
+
+
+def test_prune_history_keeps_current_revisions(store):
+    store.add(_hazard(1))
+    store.set_status("HZ-0001", "Triage")
+    moment = _moment()
+    store.set_status("HZ-0001", "Closed")
+    assert store.prune_history(_now()) >= 1
+    assert store.get("HZ-0001")["status"] == "Closed"
+    assert store.get("HZ-0001", as_of=moment) is None  # that revision was pruned
+
+
+def test_backfill_of_an_unversioned_database(tmp_path):
+    path = str(tmp_path / "hirs.db")
+    SqliteHazardStore(path).add_many([_hazard(1), _hazard(2)])
+    conn = sqlite3.connect(path)
+    with conn:  # as a database from before versioning
+        conn.execute("DELETE FROM versions")
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'versions'")
+        conn.execute("UPDATE hazards SET data = json_remove(data, '$.version')")
+    SqliteHazardStore(path)
+    store = SqliteHazardStore(path)  # a second worker starting must not backfill again
+    assert conn.execute("SELECT count(*) FROM versions").fetchone()[0] == 2
+    assert [store.get(f"HZ-{i:04d}")["version"] for i in (1, 2)] == [1, 2]
+    assert store.current_version() == 2
+
+
+def test_memory_as_of_reads_survive_a_clock_going_back(monkeypatch):
+    import store as store_module
+
+    clock = iter(["2026-03-01T10:00:00.000000+00:00", "2026-03-01T09:00:00.000000+00:00", "2026-03-01T11:00:00.000000+00:00"])
+    monkeypatch.setattr(store_module, "_now", lambda: next(clock))
+    store = MemoryHazardStore()
+    store.add(_hazard(1))
+    store.set_status("HZ-0001", "Triage")  # the clock went back an hour: stamped 10:00 all the same
+    store.add_linked("capa", {"id": "CA-0001", "hazard_id": "HZ-0001", "action": "Fix", "status": "Open"})
+    assert store.get("HZ-0001", as_of="2026-03-01T09:30:00+00:00") is None
+    assert store.get("HZ-0001", as_of="2026-03-01T10:30:00+00:00")["status"] == "Triage"
+    assert store.linked("capa", as_of="2026-03-01T10:30:00+00:00") == []
+    assert [r["id"] for r in store.linked("capa", as_of="2026-03-01T11:30:00+00:00")] == ["CA-0001"]